@@ -1,11 +1,23 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Header
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import Response
+from pydantic import BaseModel, Field
+import json
 import os
 import sys
+import tracemalloc
+from typing import Dict, List, Optional
 
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from qusai_core.pipeline.middleware import QusaiMiddleware
+from qusai_core.pipeline.admission import AdmissionController, AdmissionRejected
+from qusai_core.pipeline.sessions import SessionStore
+from qusai_core.ontology.sparql import QueryTimeout
+from qusai_core.pipeline.router import ModelRouter, Route
+from qusai_core.pipeline.profiling import RequestProfiler
+from qusai_core.pipeline.audit import AuditLog
+from qusai_core.ontology.registry import default_registry
+from qusai_core.llm.loader import create_model
 
 app = FastAPI()
 
@@ -17,37 +29,225 @@ app.add_middleware(
 )
 
 HF_TOKEN = os.environ.get("HF_TOKEN")
+ADMIN_TOKEN = os.environ.get("QUSAI_ADMIN_TOKEN")
+INFERENCE_URL = os.environ.get("QUSAI_INFERENCE_URL")  # e.g. dedicated endpoint or loadtest.py server
+LARGE_MODEL_ID = "Qwen/Qwen2.5-72B-Instruct"
+SMALL_MODEL_ID = os.environ.get("QUSAI_SMALL_MODEL")  # e.g. Qwen/Qwen2.5-7B-Instruct enables routing
+PROFILE_DIR = os.environ.get("QUSAI_PROFILE_DIR")  # enables per-request profiling (X-Qusai-Profile header)
+AUDIT_DIR = os.environ.get("QUSAI_AUDIT_DIR")  # enables the audit trail (rotating gzip JSONL)
+CACHE_MEMORY_MB = os.environ.get("QUSAI_CACHE_MEMORY_MB")  # budget for ontology context + query caches
+MEMORY_BUDGET_MB = os.environ.get("QUSAI_MEMORY_BUDGET_MB")  # process RSS that triggers cache eviction
+MAX_NEW_TOKENS = int(os.environ.get("QUSAI_MAX_NEW_TOKENS", "1024"))  # per-request cap (and default)
 middleware = None
 
+# Admission control (bounded queue + backpressure in front of the model)
+admission = AdmissionController(
+    max_concurrency=int(os.environ.get("QUSAI_MAX_CONCURRENCY", "4")),
+    max_queue_depth=int(os.environ.get("QUSAI_MAX_QUEUE_DEPTH", "32")),
+    default_timeout=float(os.environ.get("QUSAI_QUEUE_TIMEOUT", "30")),
+)
+
 @app.on_event("startup")
 async def startup():
     global middleware
     if not HF_TOKEN:
         raise ValueError("HF_TOKEN not set!")
+    model_kwargs = {"endpoint_url": INFERENCE_URL} if INFERENCE_URL else {}
+    if os.environ.get("QUSAI_TRACEMALLOC"):
+        # Before loading, so the ontology graph is measured exactly (costs CPU on every allocation)
+        tracemalloc.start()
+
+    # Opt-in profiling: writes per-request profiles to QUSAI_PROFILE_DIR
+    profiler = None
+    if PROFILE_DIR:
+        profiler = RequestProfiler(
+            PROFILE_DIR,
+            sample_rate=float(os.environ.get("QUSAI_PROFILE_SAMPLE_RATE", "0")),
+            max_fraction=float(os.environ.get("QUSAI_PROFILE_MAX_FRACTION", "0.01")),
+            mode=os.environ.get("QUSAI_PROFILE_MODE", "sampling")
+        )
+
+    # Audit trail of Mizan decisions, batched to disk by a background writer
+    audit = None
+    if AUDIT_DIR:
+        audit = AuditLog(
+            AUDIT_DIR,
+            max_queue=int(os.environ.get("QUSAI_AUDIT_QUEUE_SIZE", "10000")),
+            max_bytes=int(os.environ.get("QUSAI_AUDIT_MAX_BYTES", str(64 * 1024 * 1024))),
+            backup_count=int(os.environ.get("QUSAI_AUDIT_BACKUPS", "20"))
+        )
+
+    # Optional cascade: cheap queries go to a small model, the rest (and fallbacks) to 72B
+    router = None
+    if SMALL_MODEL_ID:
+        router = ModelRouter([
+            Route("small", create_model("hf_api", SMALL_MODEL_ID, api_token=HF_TOKEN, **model_kwargs), min_score=0),
+            Route("large", create_model("hf_api", LARGE_MODEL_ID, api_token=HF_TOKEN, **model_kwargs), min_score=1),
+        ])
+
     middleware = QusaiMiddleware(
-        repo_id="Qwen/Qwen2.5-72B-Instruct",
+        repo_id=LARGE_MODEL_ID,
         api_token=HF_TOKEN,
-        lazy_load=False
+        lazy_load=False,
+        max_new_tokens=MAX_NEW_TOKENS,
+        model_kwargs=model_kwargs,
+        router=router,
+        profiler=profiler,
+        audit=audit,
+        memory_budget_bytes=int(float(MEMORY_BUDGET_MB) * 2**20) if MEMORY_BUDGET_MB else None,
+        coalesce_timeout=float(os.environ.get("QUSAI_COALESCE_TIMEOUT", "120")),
+        ontology_kwargs={
+            "storage": os.environ.get("QUSAI_ONTOLOGY_STORAGE", "memory"),  # memory | sqlite | shards
+            "max_resident_shards": int(os.environ.get("QUSAI_MAX_RESIDENT_SHARDS", "64")),
+            "ingest_workers": int(os.environ.get("QUSAI_INGEST_WORKERS", "1")),
+            "cache_budget_bytes": int(float(CACHE_MEMORY_MB) * 2**20) if CACHE_MEMORY_MB else None,
+        },
+        session_store=SessionStore(
+            max_sessions=int(os.environ.get("QUSAI_MAX_SESSIONS", "256")),
+            ttl_seconds=float(os.environ.get("QUSAI_SESSION_TTL", "3600")),
+            persist_dir=os.environ.get("QUSAI_SESSION_DIR"),
+            max_model_states=int(os.environ.get("QUSAI_MAX_MODEL_STATES", "4"))
+        )
     )
+    if os.environ.get("QUSAI_WATCH_ONTOLOGY"):
+        middleware.ontology.start_watching(float(os.environ["QUSAI_WATCH_ONTOLOGY"]))
+
+@app.on_event("shutdown")
+def shutdown():
+    if middleware is not None and middleware.audit is not None:
+        middleware.audit.close()
+    if middleware is not None:
+        middleware.close()
+
+class DeltaRequest(BaseModel):
+    additions_path: Optional[str] = None
+    deletions_path: Optional[str] = None
+
+def require_admin(token: Optional[str]):
+    if not ADMIN_TOKEN or token != ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+class OntologyQueryRequest(BaseModel):
+    template: Optional[str] = None
+    sparql: Optional[str] = None
+    bindings: Dict[str, str] = {}
+    limit: int = 1000
+    timeout: float = 10.0
+
+MAX_QUERY_ROWS = int(os.environ.get("QUSAI_MAX_QUERY_ROWS", "10000"))
+MAX_QUERY_TIMEOUT = float(os.environ.get("QUSAI_MAX_QUERY_TIMEOUT", "30"))
 
 class ChatRequest(BaseModel):
     message: str
     arabic: bool = False
+    priority: str = "interactive"
+    session_id: Optional[str] = None
+    # Optional generation overrides; values beyond the server caps are clamped
+    max_new_tokens: Optional[int] = Field(None, ge=1)
+    temperature: Optional[float] = Field(None, ge=0)
+    top_p: Optional[float] = Field(None, gt=0, le=1)
+    stop: Optional[List[str]] = None
 
 @app.get("/")
 def root():
     return {"status": "QUSAI API Running", "model": "Qwen 72B"}
 
 @app.post("/chat")
-def chat(req: ChatRequest):
+def chat(req: ChatRequest, x_qusai_profile: Optional[str] = Header(None)):
+    try:
+        with admission.admit(priority=req.priority):
+            try:
+                query = req.message
+                if req.arabic:
+                    query += " (Answer in Arabic only)"
+                usage = {}
+                generation = {"max_new_tokens": req.max_new_tokens, "temperature": req.temperature,
+                              "top_p": req.top_p, "stop": req.stop}
+                response = middleware.process_query(query, session_id=req.session_id,
+                                                    profile=x_qusai_profile in ("1", "true"),
+                                                    generation=generation, usage=usage)
+                return {"response": response, "session_id": req.session_id, "usage": usage}
+            except Exception as e:
+                raise HTTPException(status_code=500, detail=str(e))
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=429,
+            detail=e.reason,
+            headers={"Retry-After": str(max(1, int(e.retry_after)))}
+        )
+
+@app.get("/metrics")
+def metrics():
+    stats = {"admission": admission.get_stats()}
+    if middleware is not None and middleware.router is not None:
+        stats["router"] = middleware.router.get_stats()
+    if middleware is not None and middleware.coalescer is not None:
+        stats["coalescing"] = middleware.coalescer.get_stats()
+    if middleware is not None and hasattr(middleware.model, "get_stats"):
+        stats["model"] = middleware.model.get_stats()
+    if middleware is not None and middleware.profiler is not None:
+        stats["profiling"] = middleware.profiler.get_stats()
+    if middleware is not None and middleware.audit is not None:
+        stats["audit"] = middleware.audit.get_stats()
+    stats["ontology_engines"] = default_registry.get_stats()
+    return stats
+
+@app.get("/metrics/memory")
+def memory_metrics():
+    """Approximate bytes per component; the first call after an ontology load measures the graph."""
+    if middleware is None:
+        raise HTTPException(status_code=503, detail="Not initialized")
+    return middleware.memory_usage()
+
+@app.get("/ontology/queries")
+def list_ontology_queries():
+    return {name: spec["text"] for name, spec in middleware.ontology.queries.templates.items()}
+
+@app.get("/ontology/root/{root}")
+def ontology_root(root: str, offset: int = 0, limit: int = 100):
+    limit = max(1, min(limit, MAX_QUERY_ROWS))
+    return {
+        "summary": middleware.ontology.get_root_summary(root),
+        "offset": offset,
+        "info": list(middleware.ontology.iter_root_info(root, offset=max(0, offset), limit=limit)),
+    }
+
+@app.post("/ontology/query")
+def ontology_query(req: OntologyQueryRequest, x_admin_token: Optional[str] = Header(None)):
+    # Public callers get the named templates; ad-hoc SPARQL is an admin tool
+    if req.sparql is not None:
+        require_admin(x_admin_token)
+    try:
+        rows = middleware.ontology.query(
+            template=req.template,
+            sparql=req.sparql,
+            bindings=req.bindings,
+            limit=max(1, min(req.limit, MAX_QUERY_ROWS)),
+            timeout=max(0.1, min(req.timeout, MAX_QUERY_TIMEOUT))
+        )
+    except QueryTimeout as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    # Rows are already materialized (bounded by limit and timeout): send them in one body
+    return Response(
+        "".join(json.dumps(row, ensure_ascii=False) + "\n" for row in rows),
+        media_type="application/x-ndjson"
+    )
+
+@app.post("/admin/ontology/reload")
+def reload_ontology(x_admin_token: Optional[str] = Header(None)):
+    require_admin(x_admin_token)
+    middleware.ontology.reload(background=True)
+    return {"status": "reloading", "version": middleware.ontology.version}
+
+@app.post("/admin/ontology/delta")
+def apply_ontology_delta(req: DeltaRequest, x_admin_token: Optional[str] = Header(None)):
+    require_admin(x_admin_token)
     try:
-        query = req.message
-        if req.arabic:
-            query += " (Answer in Arabic only)"
-        response = middleware.process_query(query)
-        return {"response": response}
+        return middleware.ontology.apply_delta(req.additions_path, req.deletions_path)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise HTTPException(status_code=400, detail=str(e))
 
 @app.get("/health")
 def health():
@@ -1,121 +1,568 @@
 import os
 import logging
+import importlib.util
+import threading
+import time
 from abc import ABC, abstractmethod
-try:
-    import torch
-    from transformers import AutoModelForCausalLM, AutoTokenizer, TextIteratorStreamer
-    from threading import Thread
-    TORCH_AVAILABLE = True
-except ImportError:
-    TORCH_AVAILABLE = False
-
-try:
-    from huggingface_hub import InferenceClient
-    HF_API_AVAILABLE = True
-except ImportError:
-    HF_API_AVAILABLE = False
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional, Sequence, Tuple, Type
+
+from qusai_core.utils.memory import deep_sizeof
+
+# Heavy backend libraries (torch, transformers, huggingface_hub) are imported
+# inside the backend that needs them, so importing this module stays cheap.
+TORCH_AVAILABLE = (
+    importlib.util.find_spec("torch") is not None
+    and importlib.util.find_spec("transformers") is not None
+)
+HF_API_AVAILABLE = importlib.util.find_spec("huggingface_hub") is not None
 
 logger = logging.getLogger(__name__)
 
+# Sampling defaults; per-request values are validated and capped by the caller
+DEFAULT_TEMPERATURE = 0.7
+DEFAULT_TOP_P = 0.9
+# ChatML turn delimiters: the answer is over once the model closes its turn
+DEFAULT_STOP_SEQUENCES = ("<|im_end|>", "<|im_start|>")
+# TGI's default --max-stop-sequences; endpoints reject requests carrying more
+SERVER_MAX_STOP_SEQUENCES = 4
+
+def truncate_at_stop(text: str, stop: Optional[Sequence[str]]) -> Tuple[str, bool]:
+    """Cuts text at the earliest stop sequence. Returns (text, stopped)."""
+    cut = min((i for i in (text.find(seq) for seq in (stop or ()) if seq) if i != -1), default=-1)
+    return (text[:cut], True) if cut != -1 else (text, False)
+
+
 class ModelInterface(ABC):
+    """
+    Generation arguments shared by all backends:
+      - stop: sequences that end generation (not included in the output)
+      - stopping_criteria: called with the text generated so far; True ends generation
+      - usage: caller-owned dict filled with prompt_tokens / completion_tokens / finish_reason
+    """
+
     @abstractmethod
-    def generate(self, prompt: str, max_new_tokens: int = 100) -> str:
+    def generate(self, prompt: str, max_new_tokens: int = 100,
+                 temperature: float = DEFAULT_TEMPERATURE, top_p: float = DEFAULT_TOP_P,
+                 stop: Optional[Sequence[str]] = None,
+                 stopping_criteria: Optional[Callable[[str], bool]] = None,
+                 usage: Optional[Dict] = None) -> str:
         pass
-    
+
     @abstractmethod
     def load(self):
         pass
 
+    def count_tokens(self, text: str) -> int:
+        """Approximate token count (~4 chars/token); backends with a tokenizer override this."""
+        return max(1, len(text) // 4)
+
+    def memory_usage(self) -> Dict:
+        """Approximate bytes held in this process per component (remote backends hold none)."""
+        return {}
+
+    def generate_incremental(self, prompt: str, state: Dict, max_new_tokens: int = 512, **params) -> str:
+        """
+        Generates for a prompt that extends a previous one in the same conversation.
+        `state` is owned by the caller's session; backends may keep reusable caches in it.
+        """
+        return self.generate(prompt, max_new_tokens=max_new_tokens, **params)
+
+
+# Backend Registry: name -> ModelInterface subclass
+BACKENDS: Dict[str, Type[ModelInterface]] = {}
+
+def register_backend(name: str):
+    """Class decorator registering a ModelInterface under a backend name."""
+    def decorator(cls: Type[ModelInterface]) -> Type[ModelInterface]:
+        BACKENDS[name] = cls
+        return cls
+    return decorator
+
+def create_model(backend: str, repo_id: str, **kwargs) -> ModelInterface:
+    """
+    Instantiates the named backend.
+    Only the selected backend's dependencies get imported (at load time).
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown model backend '{backend}'. Available: {', '.join(sorted(BACKENDS))}")
+    return BACKENDS[backend](repo_id, **kwargs)
+
+
+@register_backend("transformers")
 class TransformersModel(ModelInterface):
     """
     GPU-Accelerated Loader using Hugging Face Transformers.
     Designed for HF Spaces with ZeroGPU (A100).
+    Also supports a CPU profile (dtype choice, dynamic int8, thread count, torch.compile)
+    and assisted (speculative) decoding with a small draft model from the same family.
     """
-    def __init__(self, repo_id: str):
+    WARMUP_PROMPT = "<|im_start|>user\nSalam<|im_end|>\n<|im_start|>assistant\n"
+
+    def __init__(self,
+                 repo_id: str,
+                 device: str = "auto",
+                 dtype: Optional[str] = None,
+                 quantize_int8: bool = False,
+                 num_threads: Optional[int] = None,
+                 compile_model: bool = False,
+                 warmup: bool = True,
+                 draft_repo_id: Optional[str] = None,
+                 draft_tokens: int = 5,
+                 baseline_every: int = 50):
         self.repo_id = repo_id
+        self.device = device
+        # bfloat16 on GPU; float32 on CPU (dynamic int8 quantization also requires float32 weights)
+        self.dtype = dtype or ("float32" if device == "cpu" or quantize_int8 else "bfloat16")
+        self.quantize_int8 = quantize_int8
+        self.num_threads = num_threads
+        self.compile_model = compile_model
+        self.warmup = warmup
+        self.draft_repo_id = draft_repo_id
+        self.draft_tokens = draft_tokens
+        # With a draft model, every Nth generation decodes without it to keep the speedup baseline fresh
+        self.baseline_every = baseline_every
+        self._generations = 0
         self.model = None
         self.tokenizer = None
+        self.draft_model = None
+        self.draft_tokenizer = None
+        self._draft_shares_vocab = True
         self.is_ready = False
+        self.stats: Dict = {"settings": self._settings(), "tokens_generated": 0, "generation_seconds": 0.0}
+        # Concurrent generate() calls update the shared stats under this lock
+        self._stats_lock = threading.Lock()
+        # Assisted decoding counters; forward passes are counted with hooks on both models,
+        # into the counters of the generate() call running on the current thread
+        self._call_forwards = threading.local()
+        self.speculative: Dict = {"tokens": 0, "seconds": 0.0, "target_forwards": 0, "draft_forwards": 0,
+                                  "baseline_tokens": 0, "baseline_seconds": 0.0}
+
+    def _settings(self) -> Dict:
+        return {
+            "device": self.device,
+            "dtype": self.dtype,
+            "quantize_int8": self.quantize_int8,
+            "num_threads": self.num_threads,
+            "compile": self.compile_model,
+            "draft_model": self.draft_repo_id,
+        }
 
     def load(self):
         try:
-            logger.info(f"Loading {self.repo_id} on GPU...")
-            
+            import torch
+            from transformers import AutoModelForCausalLM, AutoTokenizer
+
+            logger.info(f"Loading {self.repo_id} ({self._settings()})...")
+
+            if self.num_threads:
+                torch.set_num_threads(self.num_threads)
+
             self.tokenizer = AutoTokenizer.from_pretrained(self.repo_id)
             self.model = AutoModelForCausalLM.from_pretrained(
                 self.repo_id,
-                torch_dtype=torch.bfloat16,
-                device_map="auto"
+                torch_dtype=getattr(torch, self.dtype),
+                device_map="cpu" if self.device == "cpu" else self.device,
+                low_cpu_mem_usage=True
             )
-            
+            self.model.eval()
+
+            if self.quantize_int8:
+                if self.device != "cpu":
+                    logger.warning("Dynamic int8 quantization only runs on CPU; skipping.")
+                else:
+                    self.model = torch.ao.quantization.quantize_dynamic(
+                        self.model, {torch.nn.Linear}, dtype=torch.qint8
+                    )
+                    logger.info("Applied dynamic int8 quantization to Linear layers.")
+
+            if self.compile_model:
+                self.model.forward = torch.compile(self.model.forward, dynamic=True)
+
+            if self.draft_repo_id:
+                self._load_draft(torch, AutoModelForCausalLM, AutoTokenizer)
+
             self.is_ready = True
-            logger.info("✓ Model Loaded Successfully (GPU/Transformers)")
-            
+            logger.info(f"✓ Model Loaded Successfully ({self.device}/Transformers)")
+
+            if self.warmup:
+                self._warmup()
+
         except Exception as e:
             logger.error(f"Failed to load Transformers model: {e}")
 
-    def generate(self, prompt: str, max_new_tokens: int = 512) -> str:
+    def _load_draft(self, torch, AutoModelForCausalLM, AutoTokenizer):
+        """Loads the draft model next to the target; generation falls back to plain decoding if this fails."""
+        try:
+            self.draft_tokenizer = AutoTokenizer.from_pretrained(self.draft_repo_id)
+            self.draft_model = AutoModelForCausalLM.from_pretrained(
+                self.draft_repo_id,
+                torch_dtype=getattr(torch, self.dtype),
+                device_map="cpu" if self.device == "cpu" else self.device,
+                low_cpu_mem_usage=True
+            )
+            self.draft_model.eval()
+            if self.quantize_int8 and self.device == "cpu":
+                self.draft_model = torch.ao.quantization.quantize_dynamic(
+                    self.draft_model, {torch.nn.Linear}, dtype=torch.qint8
+                )
+            self.draft_model.generation_config.num_assistant_tokens = self.draft_tokens
+            self._draft_shares_vocab = self.draft_tokenizer.get_vocab() == self.tokenizer.get_vocab()
+
+            def counter(name):
+                def hook(module, args, output):
+                    self._count_forward(name)
+                return hook
+            self.model.register_forward_hook(counter("target"))
+            self.draft_model.register_forward_hook(counter("draft"))
+            logger.info(f"✓ Draft model {self.draft_repo_id} loaded for assisted decoding")
+        except Exception as e:
+            logger.error(f"Failed to load draft model {self.draft_repo_id}, decoding without it: {e}")
+            self.draft_model = None
+
+    def _assist_kwargs(self, use_draft: bool = True) -> Dict:
+        """generate() kwargs for assisted decoding (tokenizers too when the vocabularies differ)."""
+        if self.draft_model is None or not use_draft:
+            return {}
+        with self._stats_lock:
+            self._generations += 1
+            generation = self._generations
+        if self.baseline_every and generation % self.baseline_every == 0:
+            return {}
+        kwargs = {"assistant_model": self.draft_model}
+        if not self._draft_shares_vocab:
+            kwargs.update(tokenizer=self.tokenizer, assistant_tokenizer=self.draft_tokenizer)
+        return kwargs
+
+    def _warmup(self, max_new_tokens: int = 8):
+        """Runs a short generation so the first real request doesn't pay lazy-init (and compile) costs."""
+        start = time.perf_counter()
+        self.generate(self.WARMUP_PROMPT, max_new_tokens=max_new_tokens)
+        warmup_seconds = round(time.perf_counter() - start, 3)
+        if self.draft_model is not None:
+            # Warm the plain path too; it is the baseline the speedup is measured against
+            self.generate(self.WARMUP_PROMPT, max_new_tokens=max_new_tokens, use_draft=False)
+        # Keep steady-state throughput separate from warmup
+        with self._stats_lock:
+            self.stats.update(warmup_seconds=warmup_seconds, tokens_generated=0, generation_seconds=0.0)
+            self.speculative.update(tokens=0, seconds=0.0, target_forwards=0, draft_forwards=0,
+                                    baseline_tokens=0, baseline_seconds=0.0)
+        if self.draft_model is not None:
+            # First baseline sample, so the speedup is reported from the first request on
+            self.generate(self.WARMUP_PROMPT, max_new_tokens=4 * max_new_tokens, use_draft=False)
+        logger.info(f"Warmup finished in {self.stats['warmup_seconds']}s")
+
+    def tokens_per_sec(self) -> float:
+        with self._stats_lock:
+            tokens, seconds = self.stats["tokens_generated"], self.stats["generation_seconds"]
+        return tokens / seconds if seconds else 0.0
+
+    def get_stats(self) -> Dict:
+        with self._stats_lock:
+            stats = dict(self.stats)
+        stats["tokens_per_sec"] = round(self.tokens_per_sec(), 2)
+        if self.draft_model is not None:
+            stats["speculative"] = self.speculative_stats()
+        return stats
+
+    def memory_usage(self) -> Dict:
+        # state_dict() references (not copies) weights and buffers, including quantized packed params
+        usage = {}
+        if self.model is not None:
+            usage["model"] = deep_sizeof(self.model.state_dict())
+        if self.draft_model is not None:
+            usage["draft_model"] = deep_sizeof(self.draft_model.state_dict())
+        if self.tokenizer is not None:
+            # Python-side only: the Rust tokenizer backing fast tokenizers is not visible
+            usage["tokenizer"] = deep_sizeof(self.tokenizer)
+        return usage
+
+    def speculative_stats(self) -> Dict:
+        """
+        Each assisted step runs the target once and emits its accepted draft tokens plus one
+        of its own, so accepted = tokens - target forwards; proposed = draft forwards.
+        The speedup compares against plain decoding: one measured run after warmup,
+        then every `baseline_every`th generation (and any use_draft=False call).
+        """
+        with self._stats_lock:
+            spec = dict(self.speculative)
+        accepted = spec["tokens"] - spec["target_forwards"]
+        assisted_rate = spec["tokens"] / spec["seconds"] if spec["seconds"] else 0.0
+        baseline_rate = spec["baseline_tokens"] / spec["baseline_seconds"] if spec["baseline_seconds"] else 0.0
+        return {
+            **spec,
+            "acceptance_rate": round(max(0, accepted) / spec["draft_forwards"], 3) if spec["draft_forwards"] else 0.0,
+            "tokens_per_target_forward": round(spec["tokens"] / spec["target_forwards"], 2) if spec["target_forwards"] else 0.0,
+            "assisted_tokens_per_sec": round(assisted_rate, 2),
+            "baseline_tokens_per_sec": round(baseline_rate, 2),
+            "speedup": round(assisted_rate / baseline_rate, 2) if assisted_rate and baseline_rate else None,
+        }
+
+    def count_tokens(self, text: str) -> int:
+        if self.tokenizer is None:
+            return super().count_tokens(text)
+        return len(self.tokenizer(text).input_ids)
+
+    @contextmanager
+    def _count_forwards(self):
+        """Yields this call's forward-pass counters; the hooks fill them on this thread only."""
+        forwards = {"target": 0, "draft": 0}
+        self._call_forwards.counts = forwards
+        try:
+            yield forwards
+        finally:
+            self._call_forwards.counts = None
+
+    def _count_forward(self, name: str):
+        forwards = getattr(self._call_forwards, "counts", None)
+        if forwards is not None:
+            forwards[name] += 1
+
+    def _record(self, new_tokens: int, elapsed: float, prefill_tokens: int,
+                assisted: bool = False, forwards: Optional[Dict] = None):
+        with self._stats_lock:
+            self.stats["tokens_generated"] += new_tokens
+            self.stats["generation_seconds"] += elapsed
+            if assisted:
+                self.speculative["tokens"] += new_tokens
+                self.speculative["seconds"] += elapsed
+                self.speculative["target_forwards"] += forwards["target"]
+                self.speculative["draft_forwards"] += forwards["draft"]
+            elif self.draft_model is not None:
+                self.speculative["baseline_tokens"] += new_tokens
+                self.speculative["baseline_seconds"] += elapsed
+        logger.info(f"Generated {new_tokens} tokens in {elapsed:.2f}s "
+                    f"({new_tokens / max(elapsed, 1e-9):.1f} tok/s, prefill {prefill_tokens}, {self.dtype}, {self.device})")
+
+    def _sampling_kwargs(self, temperature: float, top_p: float) -> Dict:
+        if temperature <= 0:
+            return {"do_sample": False}
+        return {"do_sample": True, "temperature": temperature, "top_p": top_p}
+
+    def _stopping_kwargs(self, prompt_length: int, stop, stopping_criteria) -> Dict:
+        """StoppingCriteriaList checking stop sequences every token and the callable every few tokens."""
+        if not stop and stopping_criteria is None:
+            return {}
+        import torch
+        from transformers import StoppingCriteria, StoppingCriteriaList
+
+        tokenizer = self.tokenizer
+        check_every = 8
+
+        class TextStoppingCriteria(StoppingCriteria):
+            def __call__(self, input_ids, scores, **kwargs):
+                new_ids = input_ids[0, prompt_length:]
+                done = False
+                if stop:
+                    # Stop sequences can only complete in the last few tokens
+                    tail = tokenizer.decode(new_ids[-16:], skip_special_tokens=False)
+                    done = any(seq in tail for seq in stop)
+                if not done and stopping_criteria is not None and len(new_ids) % check_every == 0:
+                    done = bool(stopping_criteria(tokenizer.decode(new_ids, skip_special_tokens=True)))
+                return torch.full((input_ids.shape[0],), done, dtype=torch.bool, device=input_ids.device)
+
+        return {"stopping_criteria": StoppingCriteriaList([TextStoppingCriteria()])}
+
+    def _finish(self, new_tokens, prompt_tokens: int, max_new_tokens: int, stop, usage: Optional[Dict],
+                **extra) -> str:
+        """Decodes new tokens, cuts at the first stop sequence and fills `usage`."""
+        text, stopped = truncate_at_stop(self.tokenizer.decode(new_tokens, skip_special_tokens=True), stop)
+        if usage is not None:
+            usage.update(prompt_tokens=prompt_tokens, completion_tokens=len(new_tokens),
+                         finish_reason="length" if len(new_tokens) >= max_new_tokens and not stopped else "stop",
+                         **extra)
+        return text.strip()
+
+    def generate(self, prompt: str, max_new_tokens: int = 512,
+                 temperature: float = DEFAULT_TEMPERATURE, top_p: float = DEFAULT_TOP_P,
+                 stop: Optional[Sequence[str]] = None,
+                 stopping_criteria: Optional[Callable[[str], bool]] = None,
+                 usage: Optional[Dict] = None,
+                 use_draft: bool = True) -> str:
         if not self.is_ready:
             return "[Model Not Loaded]"
-            
+
         try:
+            import torch
+
             inputs = self.tokenizer(prompt, return_tensors="pt").to(self.model.device)
-            
-            with torch.no_grad():
+            prompt_length = inputs.input_ids.shape[1]
+            assist = self._assist_kwargs(use_draft)
+
+            start = time.perf_counter()
+            with torch.inference_mode(), self._count_forwards() as forwards:
                 outputs = self.model.generate(
                     **inputs,
                     max_new_tokens=max_new_tokens,
-                    temperature=0.7,
-                    do_sample=True,
-                    top_p=0.9
+                    **self._sampling_kwargs(temperature, top_p),
+                    **self._stopping_kwargs(prompt_length, stop, stopping_criteria),
+                    **assist
                 )
-            
+            elapsed = time.perf_counter() - start
+
             # Decode only the new tokens
-            generated_text = self.tokenizer.decode(outputs[0][inputs.input_ids.shape[1]:], skip_special_tokens=True)
-            return generated_text.strip()
+            new_tokens = outputs[0][prompt_length:]
+            self._record(len(new_tokens), elapsed, prompt_length, bool(assist), forwards)
+            return self._finish(new_tokens, prompt_length, max_new_tokens, stop, usage)
 
         except Exception as e:
             logger.error(f"Generation Error: {e}")
             return f"Error: {e}"
 
+    def generate_incremental(self, prompt: str, state: Dict, max_new_tokens: int = 512,
+                             temperature: float = DEFAULT_TEMPERATURE, top_p: float = DEFAULT_TOP_P,
+                             stop: Optional[Sequence[str]] = None,
+                             stopping_criteria: Optional[Callable[[str], bool]] = None,
+                             usage: Optional[Dict] = None) -> str:
+        """
+        Reuses the conversation's KV cache: the cache is cropped to the longest
+        token prefix shared with the new prompt, so only new tokens are prefilled.
+        """
+        if not self.is_ready:
+            return "[Model Not Loaded]"
+
+        try:
+            import torch
+
+            input_ids = self.tokenizer(prompt, return_tensors="pt").input_ids.to(self.model.device)
 
+            past = None
+            cached_ids = state.get("input_ids")
+            cache = state.get("past_key_values")
+            if cached_ids is not None and hasattr(cache, "crop"):
+                # Keep at least one prompt token uncached so generate has something to prefill
+                n = min(cached_ids.shape[1], input_ids.shape[1] - 1)
+                same = cached_ids[0, :n] == input_ids[0, :n]
+                prefix = n if bool(same.all()) else int(same.int().argmin())
+                if prefix > 0:
+                    cache.crop(prefix)
+                    past = cache
+            reused = past.get_seq_length() if past is not None else 0
+            assist = self._assist_kwargs()
+
+            start = time.perf_counter()
+            with torch.inference_mode(), self._count_forwards() as forwards:
+                outputs = self.model.generate(
+                    input_ids=input_ids,
+                    attention_mask=torch.ones_like(input_ids),
+                    past_key_values=past,
+                    max_new_tokens=max_new_tokens,
+                    return_dict_in_generate=True,
+                    **self._sampling_kwargs(temperature, top_p),
+                    **self._stopping_kwargs(input_ids.shape[1], stop, stopping_criteria),
+                    **assist
+                )
+            elapsed = time.perf_counter() - start
+
+            sequences = outputs.sequences
+            cache = outputs.past_key_values
+            state["past_key_values"] = cache
+            state["input_ids"] = sequences[:, :cache.get_seq_length()] if hasattr(cache, "get_seq_length") else None
+
+            new_tokens = sequences[0][input_ids.shape[1]:]
+            self._record(len(new_tokens), elapsed, input_ids.shape[1] - reused, bool(assist), forwards)
+            return self._finish(new_tokens, input_ids.shape[1], max_new_tokens, stop, usage,
+                                cached_prompt_tokens=reused)
+
+        except Exception as e:
+            logger.error(f"Generation Error: {e}")
+            state.clear()
+            return f"Error: {e}"
+
+
+@register_backend("transformers_cpu")
+class TransformersCPUModel(TransformersModel):
+    """
+    CPU profile of TransformersModel for GPU-less nodes.
+    Defaults to float32 weights; enable quantize_int8 for dynamic int8 Linear layers.
+    """
+    def __init__(self, repo_id: str, **kwargs):
+        kwargs.setdefault("device", "cpu")
+        super().__init__(repo_id, **kwargs)
+
+
+@register_backend("hf_api")
 class HFInferenceModel(ModelInterface):
     """
     API-based inference using HuggingFace Inference API.
     Designed for serverless deployment (Render, Railway, etc.)
+    `endpoint_url` targets a dedicated endpoint (or the local load-test server) instead of the hub model.
+    At most `max_stop_sequences` stop sequences go to the server; the rest are applied client-side.
     """
-    def __init__(self, repo_id: str, api_token: str):
+    def __init__(self, repo_id: str, api_token: str, endpoint_url: Optional[str] = None,
+                 max_stop_sequences: int = SERVER_MAX_STOP_SEQUENCES):
         if not HF_API_AVAILABLE:
             raise ImportError("huggingface_hub not installed. Run: pip install huggingface_hub")
 
         self.repo_id = repo_id
         self.api_token = api_token
+        self.endpoint_url = endpoint_url
+        self.max_stop_sequences = max_stop_sequences
         self.client = None
         self.is_ready = False
 
     def load(self):
         try:
-            logger.info(f"Initializing HF Inference API client for {self.repo_id}...")
-            self.client = InferenceClient(model=self.repo_id, token=self.api_token)
+            from huggingface_hub import InferenceClient
+
+            target = self.endpoint_url or self.repo_id
+            logger.info(f"Initializing HF Inference API client for {target}...")
+            self.client = InferenceClient(model=target, token=self.api_token)
             self.is_ready = True
             logger.info("✓ HF Inference API client ready")
         except Exception as e:
             logger.error(f"Failed to initialize HF API client: {e}")
 
-    def generate(self, prompt: str, max_new_tokens: int = 512) -> str:
+    def generate(self, prompt: str, max_new_tokens: int = 512,
+                 temperature: float = DEFAULT_TEMPERATURE, top_p: float = DEFAULT_TOP_P,
+                 stop: Optional[Sequence[str]] = None,
+                 stopping_criteria: Optional[Callable[[str], bool]] = None,
+                 usage: Optional[Dict] = None) -> str:
         if not self.is_ready:
             return "[Model Not Loaded]"
 
         try:
-            response = self.client.text_generation(
-                prompt,
-                max_new_tokens=max_new_tokens,
-                temperature=0.7,
-                top_p=0.9,
-                do_sample=True,
-                return_full_text=False
-            )
-            return response.strip()
+            server_stop = list(stop or ())[:self.max_stop_sequences]
+            client_stop = list(stop or ())[self.max_stop_sequences:]
+            if client_stop:
+                # Stream so generation also ends on the stop sequences the server can't take
+                criteria = stopping_criteria
+                stopping_criteria = lambda t: (any(seq in t for seq in client_stop)
+                                               or (criteria is not None and bool(criteria(t))))
+            kwargs = dict(max_new_tokens=max_new_tokens, return_full_text=False, details=True,
+                          stop=server_stop or None)
+            if temperature > 0:
+                kwargs.update(do_sample=True, temperature=temperature, top_p=top_p)
+            else:
+                kwargs.update(do_sample=False)
+
+            if stopping_criteria is None:
+                response = self.client.text_generation(prompt, **kwargs)
+                text = response.generated_text
+                details = response.details
+                completion_tokens = details.generated_tokens if details else self.count_tokens(text)
+                finish_reason = details.finish_reason if details else None
+            else:
+                # Stream so a custom criterion can end generation early (closing the stream cancels it)
+                text, completion_tokens, finish_reason = "", 0, None
+                for chunk in self.client.text_generation(prompt, stream=True, **kwargs):
+                    completion_tokens += 1
+                    if not chunk.token.special:
+                        text += chunk.token.text
+                    if chunk.details is not None:
+                        finish_reason = chunk.details.finish_reason
+                    if completion_tokens % 8 == 0 and stopping_criteria(text):
+                        finish_reason = "stopping_criteria"
+                        break
+
+            text, stopped = truncate_at_stop(text, stop)
+            if stopped:
+                # Cut here at a stop sequence: the server saw none and may report "length"
+                finish_reason = "stop"
+            if usage is not None:
+                usage.update(prompt_tokens=self.count_tokens(prompt), completion_tokens=completion_tokens,
+                             finish_reason=str(finish_reason or "length"))
+            return text.strip()
         except Exception as e:
             logger.error(f"API Generation Error: {e}")
             return f"Error: {e}"
@@ -1,8 +1,15 @@
 import json
 import logging
+import os
+from itertools import chain, islice
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
 from pathlib import Path
-from functools import lru_cache
-from typing import List, Dict, Optional, Set, Tuple
+from typing import List, Dict, Iterator, Optional, Set, Tuple
 
 import rdflib
 from rdflib import Graph, Literal
@@ -11,62 +18,236 @@ from qusai_core.utils.constants import (
     ALIGN, QURAN, ROOT, LEMMA, 
     DEFAULT_ONTOLOGY_PATH, DEFAULT_GRAMMAR_PATH
 )
+from qusai_core.ontology.sparql import PreparedQueryRegistry
+from qusai_core.ontology.aggregates import RootAggregates
+from qusai_core.ontology.sqlite_store import SQLiteTripleStore
+from qusai_core.ontology.shards import ShardedOntology, build_shards, default_shard_dir
+from qusai_core.ontology.ingest import parallel_parse
+from qusai_core.utils.arabic import RootTrie
+from qusai_core.utils.memory import allocation_tracker, deep_sizeof
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_MAPPING_PATH = Path(__file__).parent.parent / "utils" / "concept_mapping.json"
+
+class _ReadWriteLock:
+    """Many concurrent readers, one writer. Only in-place graph edits (deltas) take the write side."""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._readers = 0
+        self._writing = False
+
+    @contextmanager
+    def read(self):
+        with self._cond:
+            while self._writing:
+                self._cond.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                self._cond.notify_all()
+
+    @contextmanager
+    def write(self):
+        with self._cond:
+            while self._writing or self._readers:
+                self._cond.wait()
+            self._writing = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writing = False
+                self._cond.notify_all()
+
+
 class OntologyEngine:
     """
     Core engine for interacting with the Quranic Root Ontology (v3).
     Handles loading, querying, and context extraction.
     """
     
-    def __init__(self, ontology_path: Optional[Path] = None, grammar_path: Optional[Path] = None):
+    def __init__(self,
+                 ontology_path: Optional[Path] = None,
+                 grammar_path: Optional[Path] = None,
+                 storage: str = "memory",
+                 db_path: Optional[Path] = None,
+                 shard_dir: Optional[Path] = None,
+                 max_resident_shards: int = 64,
+                 ingest_workers: int = 1,
+                 max_context_cache: int = 128,
+                 cache_budget_bytes: Optional[int] = None):
         self.ontology_path = ontology_path or DEFAULT_ONTOLOGY_PATH
         self.grammar_path = grammar_path or DEFAULT_GRAMMAR_PATH
+        # "memory": rdflib in-memory graph; "sqlite": disk-backed store built from the TTL once;
+        # "shards": per-root shards loaded on first use (see qusai_core.ontology.shards)
+        if storage not in ("memory", "sqlite", "shards"):
+            raise ValueError(f"Unknown ontology storage '{storage}'")
+        self.storage = storage
+        self.db_path = Path(db_path) if db_path else Path(str(self.ontology_path) + ".sqlite")
+        self.shard_dir = Path(shard_dir) if shard_dir else default_shard_dir(self.ontology_path)
+        self.max_resident_shards = max_resident_shards
+        # >1: cold loads parse a cached N-Triples copy of the TTL in a process pool
+        self.ingest_workers = ingest_workers
         self.graph: Optional[Graph] = None
+        self.shards: Optional[ShardedOntology] = None
         self.grammar_rules: List[Dict] = []
+        self.mapping_path = DEFAULT_MAPPING_PATH
         self.concept_map: Dict[str, str] = {}
+        self.aggregates: Optional[RootAggregates] = None
+        self.root_trie = RootTrie()  # Arabic-script / Buckwalter query path
         self._is_loaded = False
-        
+
+        # Hot-reload state: version bumps on every swap/delta; derived caches key on it
+        self.version = 0
+        self._lock = _ReadWriteLock()
+        self._reload_lock = threading.Lock()
+        self._watcher: Optional[threading.Thread] = None
+        self._stop_watching = threading.Event()
+        self._mtimes: Dict[Path, float] = {}
+        # SQLite storage: stamp of the last delta applied to the shared database file
+        self._delta_stamp: Optional[str] = None
+        self._delta_checked = 0.0
+
+        # Prepared SPARQL templates + result cache
+        self.queries = PreparedQueryRegistry()
+
+        # Context cache (LRU keyed on query, limit and version) with byte accounting;
+        # context + query-result caches are trimmed to cache_budget_bytes when set
+        self.max_context_cache = max_context_cache
+        self.cache_budget_bytes = cache_budget_bytes
+        # (query, limit, version) -> (context, mapped (term, root) pairs)
+        self._context_cache: "OrderedDict[tuple, Tuple[str, List[Tuple[str, str]]]]" = OrderedDict()
+        self._context_cache_bytes = 0
+        self._cache_lock = threading.Lock()
+        self._cache_counters = {"hits": 0, "misses": 0, "evictions": 0, "budget_evictions": 0}
+        # Graph bytes measured by tracemalloc while loading (if tracing); sizes cached per version
+        self._graph_traced_bytes: Optional[int] = None
+        self._memory_snapshot: Optional[Tuple[int, Dict]] = None
+        self._memory_lock = threading.Lock()
+
         # Load Concept Mapping
-        mapping_path = Path(__file__).parent.parent / "utils" / "concept_mapping.json"
-        if mapping_path.exists():
+        self.concept_map = self._load_concept_map()
+
+    def _load_concept_map(self) -> Dict[str, str]:
+        if self.mapping_path.exists():
             try:
-                with open(mapping_path, 'r', encoding='utf-8') as f:
-                    self.concept_map = json.load(f)
-                logger.info(f"Loaded {len(self.concept_map)} concept mappings.")
+                with open(self.mapping_path, 'r', encoding='utf-8') as f:
+                    concept_map = json.load(f)
+                logger.info(f"Loaded {len(concept_map)} concept mappings.")
+                return concept_map
             except Exception as e:
                 logger.error(f"Failed to load concept mapping: {e}")
+        return {}
 
-    def load(self):
-        """Loads the RDF graph and grammar rules into memory."""
-        if self._is_loaded:
-            return
-
-        # Load Grammar Rules
+    def _load_grammar_rules(self) -> List[Dict]:
         if self.grammar_path.exists():
             try:
                 with open(self.grammar_path, 'r', encoding='utf-8') as f:
                     data = json.load(f)
-                    self.grammar_rules = data if isinstance(data, list) else data.get('rules', [])
-                logger.info(f"Loaded {len(self.grammar_rules)} grammar rules.")
+                    rules = data if isinstance(data, list) else data.get('rules', [])
+                logger.info(f"Loaded {len(rules)} grammar rules.")
+                return rules
             except Exception as e:
                 logger.error(f"Failed to load grammar rules: {e}")
         else:
             logger.warning(f"Grammar rules file not found: {self.grammar_path}")
+        return []
+
+    def _new_graph(self) -> Graph:
+        graph = rdflib.Graph()
+        graph.bind("align", ALIGN)
+        graph.bind("quran", QURAN)
+        graph.bind("root", ROOT)
+        graph.bind("lemma", LEMMA)
+        return graph
+
+    def _build_graph(self) -> Graph:
+        if self.storage == "sqlite":
+            return self._build_sqlite_graph()
+        logger.info(f"Loading ontology from {self.ontology_path}...")
+        graph = self._new_graph()
+        if self.ingest_workers > 1:
+            return parallel_parse(self.ontology_path, graph, self.ingest_workers)
+        graph.parse(str(self.ontology_path), format="turtle")
+        logger.info(f"Loaded {len(graph):,} triples.")
+        return graph
+
+    def _build_sqlite_graph(self) -> Graph:
+        """Opens the SQLite store, (re)building it from the TTL only when the source changed."""
+        st = os.stat(self.ontology_path)
+        signature = f"{st.st_size}:{int(st.st_mtime)}"
+
+        store = None
+        if self.db_path.exists():
+            store = SQLiteTripleStore(self.db_path)
+            if store.get_meta("source_signature") != signature:
+                store.close()
+                store = None
+        if store is None:
+            logger.info(f"Building SQLite ontology store from {self.ontology_path}...")
+            store = SQLiteTripleStore.build_from_file(
+                self.ontology_path, self.db_path,
+                namespaces={"align": ALIGN, "quran": QURAN, "root": ROOT, "lemma": LEMMA},
+                meta={"source_signature": signature}
+            )
+
+        graph = Graph(store=store)
+        logger.info(f"Opened SQLite ontology store {self.db_path} ({len(graph):,} triples).")
+        return graph
+
+    def _build_aggregates(self, graph: Graph, persist: bool = True) -> RootAggregates:
+        """Loads persisted per-root aggregates if fresh, otherwise computes (and persists) them."""
+        if persist:
+            aggregates = RootAggregates.load(self.ontology_path)
+            if aggregates is not None:
+                return aggregates
+        aggregates = RootAggregates.build(lambda p: ((s, o) for s, _, o in graph.triples((None, p, None))))
+        if persist:
+            aggregates.save(self.ontology_path)
+        return aggregates
+
+    def load(self):
+        """
+        Loads the RDF graph and grammar rules into memory.
+        Safe to call from every holder of a shared engine: only the first call loads.
+        """
+        if self._is_loaded:
+            return
+        with self._reload_lock:
+            if not self._is_loaded:
+                self._load()
+
+    def _load(self):
+        # Load Grammar Rules
+        self.grammar_rules = self._load_grammar_rules()
 
+        # Sharded: manifest only, shards are parsed on first use
+        if self.storage == "shards":
+            try:
+                self.shards = self._open_shards()
+                self.aggregates = RootAggregates.load(self.ontology_path) if self.ontology_path.exists() else None
+                self.root_trie = RootTrie(self.shards.roots)
+                self._is_loaded = True
+                self._mtimes = self._source_mtimes()
+            except Exception as e:
+                logger.error(f"Failed to open ontology shards: {e}")
+                raise
         # Load RDF Graph
-        if self.ontology_path.exists():
-            logger.info(f"Loading ontology from {self.ontology_path}...")
-            self.graph = rdflib.Graph()
-            self.graph.bind("align", ALIGN)
-            self.graph.bind("quran", QURAN)
-            self.graph.bind("root", ROOT)
-            self.graph.bind("lemma", LEMMA)
+        elif self.ontology_path.exists():
             try:
-                self.graph.parse(str(self.ontology_path), format="turtle")
-                logger.info(f"Loaded {len(self.graph):,} triples.")
+                with allocation_tracker() as traced:
+                    self.graph = self._build_graph()
+                self._graph_traced_bytes = traced.get("bytes")
+                self.aggregates = self._build_aggregates(self.graph)
+                self.root_trie = RootTrie(self.aggregates.roots)
                 self._is_loaded = True
+                self._mtimes = self._source_mtimes()
+                self._delta_stamp = self._read_delta_stamp()
             except Exception as e:
                 logger.error(f"Failed to parse ontology: {e}")
                 raise
@@ -74,41 +255,307 @@ class OntologyEngine:
             logger.error(f"Ontology file not found: {self.ontology_path}")
             # We treat this as a critical failure for the engine
             # but allow initialization to proceed so checks can fail gracefully
-            
+
     def is_ready(self) -> bool:
-        return self._is_loaded and self.graph is not None
+        return self._is_loaded and (self.graph is not None or self.shards is not None)
+
+    def _open_shards(self) -> ShardedOntology:
+        """Opens the shard manifest, partitioning the TTL first if shards are missing or stale."""
+        if not ShardedOntology.is_fresh(self.shard_dir, self.ontology_path):
+            build_shards(self.ontology_path, self.shard_dir)
+        shards = ShardedOntology(self.shard_dir, max_resident=self.max_resident_shards)
+        logger.info(f"Opened ontology shard manifest {self.shard_dir} ({len(shards.roots):,} roots, {len(shards):,} triples).")
+        return shards
+
+    def _graph_for_root(self, root: str) -> Optional[Graph]:
+        """The graph holding a root's triples: its shard when sharded, else the whole graph."""
+        if self.shards is not None:
+            return self.shards.graph_for_root(root)
+        return self.graph
+
+    # --- Hot Reload ---
+
+    def _source_mtimes(self) -> Dict[Path, float]:
+        mtimes = {}
+        for path in (self.ontology_path, self.grammar_path, self.mapping_path):
+            try:
+                mtimes[path] = os.stat(path).st_mtime
+            except OSError:
+                continue
+        return mtimes
+
+    def _invalidate_caches(self):
+        """Drops every cache derived from the graph or concept map."""
+        self.version += 1
+        with self._cache_lock:
+            self._context_cache.clear()
+            self._context_cache_bytes = 0
+        self.queries.clear_results()
+
+    def reload(self, background: bool = True) -> Optional[threading.Thread]:
+        """
+        Rebuilds graph, concept map and grammar rules from disk, then swaps them in atomically.
+        In-flight readers finish on the old graph; the swap waits for them, and the old
+        graph (e.g. its SQLite connections) is closed afterwards.
+        """
+        if background:
+            thread = threading.Thread(target=self.reload, kwargs={"background": False},
+                                      name="ontology-reload", daemon=True)
+            thread.start()
+            return thread
+
+        with self._reload_lock:
+            start = time.perf_counter()
+            mtimes = self._source_mtimes()
+            graph, shards = None, None
+            try:
+                if self.storage == "shards":
+                    shards = self._open_shards()
+                else:
+                    with allocation_tracker() as traced:
+                        graph = self._build_graph()
+            except Exception as e:
+                logger.error(f"Ontology reload failed, keeping current graph: {e}")
+                return None
+            if shards is not None:
+                aggregates = RootAggregates.load(self.ontology_path) if self.ontology_path.exists() else None
+                root_trie = RootTrie(shards.roots)
+            else:
+                aggregates = self._build_aggregates(graph)
+                root_trie = RootTrie(aggregates.roots)
+            concept_map = self._load_concept_map()
+            grammar_rules = self._load_grammar_rules()
+
+            # Swap under the write lock: readers see either the old or the new state, never a mix
+            with self._lock.write():
+                old_graph = self.graph
+                self.graph, self.shards = graph, shards
+                self._graph_traced_bytes = traced.get("bytes") if graph is not None else None
+                self.aggregates, self.root_trie = aggregates, root_trie
+                self.concept_map, self.grammar_rules = concept_map, grammar_rules
+                self._is_loaded = True
+                self._mtimes = mtimes
+                self._delta_stamp = self._read_delta_stamp()
+                self._invalidate_caches()
+            if old_graph is not None and old_graph is not graph:
+                old_graph.close()
+            logger.info(f"Ontology reloaded (v{self.version}) in {time.perf_counter() - start:.1f}s")
+        return None
+
+    def apply_delta(self, additions_path: Optional[Path] = None, deletions_path: Optional[Path] = None) -> Dict:
+        """
+        Applies N-Triples delta files to the loaded graph in place, without re-parsing the ontology.
+        Readers are paused only for the duration of the edit.
+        Deltas are not written back to the source; a full reload() re-reads the source files.
+        """
+        if not self.is_ready():
+            raise RuntimeError("Ontology not loaded; cannot apply delta")
+        if self.storage == "shards":
+            raise RuntimeError("Deltas are not supported with sharded storage; edit the source and reload")
+
+        added = self._new_graph()
+        removed = self._new_graph()
+        if additions_path:
+            added.parse(str(additions_path), format="nt")
+        if deletions_path:
+            removed.parse(str(deletions_path), format="nt")
+
+        with self._reload_lock, self._lock.write():
+            for triple in removed:
+                self.graph.remove(triple)
+            for triple in added:
+                self.graph.add(triple)
+            if self.storage == "sqlite":
+                # Edits landed in the database file; force a rebuild from the source on next load
+                self.graph.store.set_meta("source_signature", "modified")
+                # Other workers on the same file notice the new stamp and refresh their caches
+                self._delta_stamp = uuid.uuid4().hex
+                self.graph.store.set_meta("delta_stamp", self._delta_stamp)
+            # In-memory only: the persisted aggregates still describe the source file
+            self.aggregates = self._build_aggregates(self.graph, persist=False)
+            self.root_trie = RootTrie(self.aggregates.roots)
+            self._graph_traced_bytes = None  # edited in place: re-measure with sizing helpers
+            self._invalidate_caches()
+
+        logger.info(f"Applied ontology delta (v{self.version}): +{len(added)} / -{len(removed)} triples")
+        return {"added": len(added), "removed": len(removed), "version": self.version}
+
+    def _read_delta_stamp(self) -> Optional[str]:
+        if self.storage != "sqlite" or self.graph is None:
+            return None
+        return self.graph.store.get_meta("delta_stamp")
+
+    def _check_shared_store(self, interval: float = 1.0):
+        """
+        SQLite storage: another worker may have applied a delta to the shared database.
+        At most once per `interval`, compares the delta stamp and, if it moved, rebuilds
+        the aggregates and drops every cache.
+        """
+        if self.storage != "sqlite" or self.graph is None:
+            return
+        now = time.monotonic()
+        if now - self._delta_checked < interval:
+            return
+        self._delta_checked = now
+        if self._read_delta_stamp() == self._delta_stamp:
+            return
+        with self._reload_lock, self._lock.write():
+            stamp = self._read_delta_stamp()
+            if stamp == self._delta_stamp:
+                return
+            self.aggregates = self._build_aggregates(self.graph, persist=False)
+            self.root_trie = RootTrie(self.aggregates.roots)
+            self._delta_stamp = stamp
+            self._invalidate_caches()
+        logger.info(f"Shared ontology database changed by another worker; caches refreshed (v{self.version})")
+
+    def start_watching(self, interval: float = 5.0):
+        """Polls the source files and reloads in the background when any of them changes."""
+        if self._watcher and self._watcher.is_alive():
+            return
+        self._stop_watching.clear()
+
+        def _watch():
+            while not self._stop_watching.wait(interval):
+                if self._source_mtimes() != self._mtimes:
+                    logger.info("Ontology sources changed on disk; reloading...")
+                    self.reload(background=False)
+
+        self._watcher = threading.Thread(target=_watch, name="ontology-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self):
+        self._stop_watching.set()
+
+    def is_current(self) -> bool:
+        """True unless the loaded data is older than the source files on disk."""
+        return not self._is_loaded or self._source_mtimes() == self._mtimes
+
+    def close(self):
+        """Stops watching and drops the graph, shards and caches (closing a SQLite store)."""
+        self.stop_watching()
+        with self._reload_lock, self._lock.write():
+            if self.graph is not None:
+                self.graph.close()
+            self.graph, self.shards = None, None
+            self._is_loaded = False
+            self._invalidate_caches()
+
+    # --- Queries ---
+
+    def map_query_roots(self, query: str) -> List[Tuple[str, str]]:
+        """
+        Maps query terms to Buckwalter roots as (term, root) pairs:
+        English keywords via the concept map, Arabic-script words and bare
+        Buckwalter roots via the root trie.
+        """
+        concept_map = self.concept_map
+        keywords = [w.lower() for w in query.split() if len(w) > 3][:5]
+        pairs = [(kw, concept_map[kw]) for kw in keywords if kw in concept_map]
+        return pairs + self.root_trie.roots_for_query(query)
 
-    @lru_cache(maxsize=128)
     def get_context(self, query: str, limit: int = 15) -> str:
         """
         Retrieves relevant graph triples based on keywords in the query.
-        Uses concept mapping to bridge English terms to Arabic Roots (Buckwalter).
+        Uses concept mapping to bridge English terms to Arabic Roots (Buckwalter);
+        Arabic-script queries are normalized and matched against the ontology's roots.
         """
+        return self.get_context_and_roots(query, limit)[0]
+
+    def get_context_and_roots(self, query: str, limit: int = 15) -> Tuple[str, List[Tuple[str, str]]]:
+        """get_context plus the (term, root) pairs it was built from, cached together."""
         if not self.is_ready():
-            return ""
-        
-        # 1. Extract Keywords & Map to Roots
-        keywords = [w.lower() for w in query.split() if len(w) > 3][:5]
-        mapped_roots = []
-        for kw in keywords:
-            if kw in self.concept_map:
-                mapped_roots.append(self.concept_map[kw])
+            return "", []
+        self._check_shared_store()
+        with self._lock.read():
+            # Keyed on version so a result computed against a swapped-out graph is never served
+            key = (query, limit, self.version)
+            with self._cache_lock:
+                entry = self._context_cache.get(key)
+                if entry is not None:
+                    self._context_cache.move_to_end(key)
+                    self._cache_counters["hits"] += 1
+                    return entry
+                self._cache_counters["misses"] += 1
+            pairs = self.map_query_roots(query)
+            entry = (self._build_context(query, limit, pairs), pairs)
+            self._cache_context(key, entry)
+            return entry
+
+    @staticmethod
+    def _context_entry_size(query: str, entry: tuple) -> int:
+        context, pairs = entry
+        return (sys.getsizeof(query) + sys.getsizeof(context) + sys.getsizeof(pairs)
+                + sum(sys.getsizeof(term) + sys.getsizeof(root) for term, root in pairs))
+
+    def _cache_context(self, key: tuple, entry: tuple):
+        with self._cache_lock:
+            if key in self._context_cache:
+                return
+            self._context_cache[key] = entry
+            self._context_cache_bytes += self._context_entry_size(key[0], entry)
+            while len(self._context_cache) > self.max_context_cache:
+                self._pop_context()
+                self._cache_counters["evictions"] += 1
+        if self.cache_budget_bytes is not None:
+            self.trim_caches(self.cache_budget_bytes)
+
+    def _pop_context(self) -> int:
+        (query, _, _), entry = self._context_cache.popitem(last=False)
+        size = self._context_entry_size(query, entry)
+        self._context_cache_bytes -= size
+        return size
+
+    def trim_caches(self, max_bytes: int = 0) -> int:
+        """
+        Evicts least recently used context / query-result entries until both caches
+        together hold at most max_bytes. Returns the bytes freed.
+        """
+        freed = 0
+        while self._context_cache_bytes + self.queries.result_bytes > max_bytes:
+            # Take from whichever cache is larger
+            if self._context_cache_bytes >= self.queries.result_bytes:
+                with self._cache_lock:
+                    size = self._pop_context() if self._context_cache else 0
+            else:
+                size = self.queries.evict_oldest()
+            if size == 0:
+                break
+            freed += size
+            with self._cache_lock:
+                self._cache_counters["budget_evictions"] += 1
+        return freed
+
+    def _build_context(self, query: str, limit: int, pairs: List[Tuple[str, str]]) -> str:
+        # 1. Keywords mapped to roots (see map_query_roots)
+        mapped_roots = list(dict.fromkeys(root for _, root in pairs))
         
         relevant_triples: Set[str] = set()
-        
+
+        # 2a. Root summaries from the precomputed aggregate tables (no graph scan)
+        summaries = []
+        if self.aggregates is not None:
+            for root_val in dict.fromkeys(mapped_roots):
+                line = self.aggregates.context_line(root_val)
+                if line:
+                    summaries.append(line)
+
         # 2. Priority Search: Look for mapped roots directly
         for root_val in mapped_roots:
+            graph = self._graph_for_root(root_val)
+            if graph is None:
+                continue
             # Construct the Root URI
             root_uri = ROOT[root_val]
             
             # Find occurrences of this root (Segments that have this root)
             # Pattern: ?segment quran:hasRoot root:?root_val
-            for s, p, o in self.graph.triples((None, QURAN.hasRoot, root_uri)):
+            for s, p, o in graph.triples((None, QURAN.hasRoot, root_uri)):
                 s_short = self._shorten_uri(s)
                 root_short = self._shorten_uri(o)
                 
                 # Get the Lemma if available for this segment to add semantic richness
-                lemma_triples = list(self.graph.triples((s, QURAN.hasLemma, None)))
+                lemma_triples = list(graph.triples((s, QURAN.hasLemma, None)))
                 if lemma_triples:
                     lemma_short = self._shorten_uri(lemma_triples[0][2])
                     relevant_triples.add(f"{s_short} --[hasRoot]--> {root_short} (Lemma: {lemma_short})")
@@ -128,7 +575,36 @@ class OntologyEngine:
             # Only perform if we really need more context and didn't find specific roots
             pass # Skipping naive scan for performance in this v2 optimization, relying on Mapping.
 
-        return "\n".join(relevant_triples)
+        return "\n".join(chain(summaries, relevant_triples))
+
+    def query(self,
+              template: Optional[str] = None,
+              sparql: Optional[str] = None,
+              bindings: Optional[Dict[str, str]] = None,
+              limit: int = 1000,
+              timeout: float = 10.0) -> List[Dict]:
+        """
+        Runs a named prepared query template (or an ad-hoc read-only SPARQL query).
+        Results are cached per template, bindings and ontology version.
+        With sharded storage only templates bound to a `root` can run (against its shard).
+        """
+        if not self.is_ready():
+            return []
+        self._check_shared_store()
+        with self._lock.read():
+            graph = self.graph
+            if self.shards is not None:
+                root = (bindings or {}).get("root")
+                if template is None or root is None:
+                    raise ValueError("Sharded ontology storage only supports query templates bound to a root")
+                graph = self.shards.graph_for_root(root)
+                if graph is None:
+                    return []
+            rows = self.queries.run(graph, self.version, template=template, sparql=sparql,
+                                    bindings=bindings, limit=limit, timeout=timeout)
+        if self.cache_budget_bytes is not None:
+            self.trim_caches(self.cache_budget_bytes)
+        return rows
 
     def _shorten_uri(self, uri) -> str:
         """Helper to make URIs readable in context."""
@@ -144,25 +620,90 @@ class OntologyEngine:
         Tries to find information about a specific Arabic root.
         """
         if not self.is_ready(): return []
-        
+        return list(self.iter_root_info(root_term))
+
+    def iter_root_info(self, root_term: str, offset: int = 0, limit: Optional[int] = None) -> Iterator[str]:
+        """
+        Paginated variant of get_root_info: yields lines [offset, offset + limit). Only the
+        requested page is materialised, and the read lock is released before the first yield,
+        so a slow consumer never holds off reloads or deltas.
+        """
+        if not self.is_ready(): return
+
         # This assumes root_term matches the label or URI segment
-        results = []
         # Construct a potential URI
         target_uri = ROOT[root_term]
-        
-        # Find everything about this root
-        for s, p, o in self.graph.triples((target_uri, None, None)):
-             results.append(f"Root({root_term}) has {self._shorten_uri(p)}: {self._shorten_uri(o)}")
-             
-        # Find things that link TO this root
-        for s, p, o in self.graph.triples((None, None, target_uri)):
-             results.append(f"{self._shorten_uri(s)} links to Root({root_term})")
-             
-        return results
+
+        with self._lock.read():
+            graph = self._graph_for_root(root_term)
+            if graph is None:
+                return
+
+            # Find everything about this root
+            outgoing = (f"Root({root_term}) has {self._shorten_uri(p)}: {self._shorten_uri(o)}"
+                        for s, p, o in graph.triples((target_uri, None, None)))
+
+            # Find things that link TO this root
+            incoming = (f"{self._shorten_uri(s)} links to Root({root_term})"
+                        for s, p, o in graph.triples((None, None, target_uri)))
+
+            stop = None if limit is None else offset + limit
+            rows = list(islice(chain(outgoing, incoming), offset, stop))
+        yield from rows
+
+    def get_root_summary(self, root_term: str) -> Optional[Dict]:
+        """O(1) root summary (occurrences, lemmas, surahs, co-occurring roots) from the aggregate tables."""
+        if self.aggregates is None:
+            return None
+        return self.aggregates.summary(root_term)
 
     def get_stats(self) -> Dict:
-        return {
+        stats = {
             "triples": len(self.graph) if self.graph else 0,
             "rules": len(self.grammar_rules),
-            "loaded": self._is_loaded
+            "loaded": self._is_loaded,
+            "version": self.version
         }
+        if self.shards is not None:
+            stats["triples"] = len(self.shards)
+            stats["shards"] = self.shards.get_stats()
+        with self._cache_lock:
+            stats["context_cache"] = {**self._cache_counters, "entries": len(self._context_cache),
+                                      "bytes": self._context_cache_bytes}
+        return stats
+
+    def memory_usage(self) -> Dict:
+        """
+        Approximate bytes per component, for /metrics/memory (get_stats does not call this).
+        Graph and index sizes only change with the version, so they are measured once per
+        version (the first call after a load can take seconds on a large graph) without
+        holding the read lock; cache sizes are tracked as entries are added and evicted.
+        """
+        with self._memory_lock:
+            snapshot = self._memory_snapshot
+            if snapshot is None or snapshot[0] != self.version:
+                with self._lock.read():
+                    version, graph, traced = self.version, self.graph, self._graph_traced_bytes
+                    aggregates, root_trie = self.aggregates, self.root_trie
+                    concept_map, grammar_rules = self.concept_map, self.grammar_rules
+                if traced is not None:
+                    graph_bytes, method = traced, "tracemalloc"
+                else:
+                    graph_bytes = deep_sizeof(graph.store) if graph is not None else 0
+                    method = "sizeof"
+                snapshot = self._memory_snapshot = (version, {
+                    "graph": graph_bytes,
+                    "graph_measured_by": method,
+                    "indexes": {
+                        "aggregates": deep_sizeof(aggregates) if aggregates is not None else 0,
+                        "root_trie": deep_sizeof(root_trie),
+                        "concept_map": deep_sizeof(concept_map),
+                        "grammar_rules": deep_sizeof(grammar_rules),
+                    },
+                })
+        usage = dict(snapshot[1])
+        if self.shards is not None:
+            usage["shards"] = self.shards.resident_bytes()
+        usage["caches"] = {"context": self._context_cache_bytes, "query_results": self.queries.result_bytes}
+        usage["cache_budget"] = self.cache_budget_bytes
+        return usage
@@ -0,0 +1,139 @@
+"""
+Parallel ontology ingestion.
+
+The Turtle source is converted once to line-oriented N-Triples (cached next to it as
+`<ttl>.nt`, with its prefixes and source signature in the header). Cold loads then split
+the N-Triples file at line boundaries, parse the chunks in a process pool and merge
+them, in source order, into the engine's graph.
+"""
+import io
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import rdflib
+from rdflib import Graph
+from rdflib.plugins.parsers.ntriples import W3CNTriplesParser
+from rdflib.term import URIRef
+
+from qusai_core.ontology.sqlite_store import _InsertionOrderStore
+
+logger = logging.getLogger(__name__)
+
+NT_SUFFIX = ".nt"
+SIGNATURE_HEADER = "# source-signature: "
+PREFIX_HEADER = "# prefix: "
+CHUNKS_PER_WORKER = 4
+
+def ntriples_path(ontology_path: Path) -> Path:
+    return Path(str(ontology_path) + NT_SUFFIX)
+
+def _source_signature(ontology_path: Path) -> str:
+    st = os.stat(ontology_path)
+    return f"{st.st_size}:{int(st.st_mtime)}"
+
+def _read_header(nt_path: Path) -> Tuple[Optional[str], Dict[str, URIRef]]:
+    signature, prefixes = None, {}
+    with open(nt_path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.startswith("#"):
+                break
+            if line.startswith(SIGNATURE_HEADER):
+                signature = line[len(SIGNATURE_HEADER):].strip()
+            elif line.startswith(PREFIX_HEADER):
+                prefix, _, uri = line[len(PREFIX_HEADER):].strip().partition(" ")
+                prefixes[prefix] = URIRef(uri)
+    return signature, prefixes
+
+def convert_to_ntriples(ontology_path: Path, nt_path: Optional[Path] = None) -> Path:
+    """Serial one-off Turtle -> N-Triples conversion, keeping parse order and prefix bindings."""
+    nt_path = Path(nt_path) if nt_path else ntriples_path(ontology_path)
+    collector = _InsertionOrderStore()
+    rdflib.Graph(store=collector).parse(str(ontology_path), format="turtle")
+
+    # Per-process temp name: workers converting at the same time never share a file
+    tmp_path = nt_path.with_name(f"{nt_path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(f"{SIGNATURE_HEADER}{_source_signature(ontology_path)}\n")
+        for prefix, uri in collector.bound.items():
+            if prefix:
+                f.write(f"{PREFIX_HEADER}{prefix} {uri}\n")
+        f.writelines(f"{s.n3()} {p.n3()} {o.n3()} .\n" for s, p, o in collector.ordered)
+    os.replace(tmp_path, nt_path)
+    logger.info(f"Converted {ontology_path} to N-Triples at {nt_path} ({len(collector.ordered):,} triples)")
+    return nt_path
+
+def ensure_ntriples(ontology_path: Path) -> Path:
+    """Returns the cached N-Triples file, converting first if it is missing or stale."""
+    nt_path = ntriples_path(ontology_path)
+    if nt_path.exists():
+        signature, _ = _read_header(nt_path)
+        if signature == _source_signature(ontology_path):
+            return nt_path
+    return convert_to_ntriples(ontology_path, nt_path)
+
+def _chunk_ranges(path: Path, chunks: int) -> List[Tuple[int, int]]:
+    """Splits a file into byte ranges that start and end on line boundaries."""
+    size = os.path.getsize(path)
+    bounds = [0]
+    with open(path, "rb") as f:
+        for i in range(1, chunks):
+            f.seek(max(bounds[-1], size * i // chunks))
+            f.readline()
+            bounds.append(min(f.tell(), size))
+    bounds.append(size)
+    return [(start, end) for start, end in zip(bounds, bounds[1:]) if end > start]
+
+
+class _LabelBNodes(dict):
+    """bnode_context that keeps N-Triples labels, so a blank node split across chunks stays one node."""
+
+    def get(self, key, default=None):
+        return key
+
+
+class _CollectSink:
+    """Collects triples with terms interned: repeated terms pickle once and stay shared after merge."""
+    __slots__ = ("triples", "terms")
+
+    def __init__(self):
+        self.triples = []
+        self.terms = {}
+
+    def triple(self, s, p, o):
+        terms = self.terms
+        self.triples.append((terms.setdefault(s, s), terms.setdefault(p, p), terms.setdefault(o, o)))
+
+
+def _parse_chunk(args: Tuple[str, int, int]) -> List[Tuple]:
+    path, start, end = args
+    with open(path, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+    sink = _CollectSink()
+    W3CNTriplesParser(sink).parse(io.BytesIO(data), bnode_context=_LabelBNodes())
+    return sink.triples
+
+def parallel_parse(ontology_path: Path, graph: Graph, workers: int) -> Graph:
+    """Parses the ontology into `graph` using a pool of `workers` processes."""
+    start = time.perf_counter()
+    nt_path = ensure_ntriples(ontology_path)
+    _, prefixes = _read_header(nt_path)
+    ranges = _chunk_ranges(nt_path, workers * CHUNKS_PER_WORKER)
+
+    # spawn: the API loads the ontology from a process that already runs threads
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        # map() yields in submission order, so insertion order matches a serial parse
+        for triples in pool.map(_parse_chunk, ((str(nt_path), s, e) for s, e in ranges)):
+            graph.addN((s, p, o, graph) for s, p, o in triples)
+
+    for prefix, uri in prefixes.items():
+        graph.bind(prefix, uri, override=False)
+    logger.info(f"Parsed {len(graph):,} triples with {workers} workers in {time.perf_counter() - start:.2f}s "
+                f"({len(ranges)} chunks)")
+    return graph
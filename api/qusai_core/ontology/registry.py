@@ -0,0 +1,85 @@
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from qusai_core.ontology.engine import OntologyEngine
+from qusai_core.utils.constants import DEFAULT_ONTOLOGY_PATH
+
+logger = logging.getLogger(__name__)
+
+class _Entry:
+    __slots__ = ("engine", "refs")
+
+    def __init__(self, engine: OntologyEngine):
+        self.engine = engine
+        self.refs = 0
+
+
+class OntologyRegistry:
+    """
+    Process-wide pool of OntologyEngines, so middleware instances (A/B variants, routed
+    models, tests) share one loaded graph with its indexes and caches.
+
+    Engines are keyed on their configuration (ontology path, storage, ...) and the source
+    version on disk: an engine whose data is older than the files (and was not hot-reloaded)
+    is not handed out again, and a fresh one is created instead. Holders call `release()`;
+    an engine is closed once its last holder releases it.
+    """
+
+    def __init__(self):
+        self._entries: Dict[Tuple, List[_Entry]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _config_key(kwargs: Dict) -> Tuple:
+        config = dict(kwargs)
+        config["ontology_path"] = Path(config.get("ontology_path") or DEFAULT_ONTOLOGY_PATH).resolve()
+        return tuple(sorted((name, str(value)) for name, value in config.items()))
+
+    def acquire(self, **engine_kwargs) -> OntologyEngine:
+        """Returns a shared engine for this configuration (not necessarily loaded yet)."""
+        key = self._config_key(engine_kwargs)
+        with self._lock:
+            entries = self._entries.setdefault(key, [])
+            entry = next((e for e in entries if e.engine.is_current()), None)
+            if entry is None:
+                entry = _Entry(OntologyEngine(**engine_kwargs))
+                entries.append(entry)
+                logger.info(f"Created shared ontology engine for {dict(key)['ontology_path']} "
+                            f"({len(entries)} version(s) held)")
+            entry.refs += 1
+            return entry.engine
+
+    def release(self, engine: OntologyEngine):
+        """Drops one reference; the last one closes the engine."""
+        with self._lock:
+            for key, entries in self._entries.items():
+                entry = next((e for e in entries if e.engine is engine), None)
+                if entry is not None:
+                    break
+            else:
+                logger.error("Released an ontology engine that is not in the registry")
+                return
+            entry.refs -= 1
+            if entry.refs > 0:
+                return
+            entries.remove(entry)
+            if not entries:
+                del self._entries[key]
+        engine.close()
+        logger.info("Closed shared ontology engine (no holders left)")
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {
+                "engines": [
+                    {"ontology_path": dict(key)["ontology_path"], "storage": dict(key).get("storage", "memory"),
+                     "version": entry.engine.version, "loaded": entry.engine.is_ready(), "references": entry.refs}
+                    for key, entries in self._entries.items() for entry in entries
+                ]
+            }
+
+
+# Shared by every QusaiMiddleware in the process (unless created with shared_ontology=False)
+default_registry = OntologyRegistry()
@@ -0,0 +1,267 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Dict, Iterator, List, Optional
+
+from rdflib import Graph, Literal, Namespace
+from rdflib.store import Store
+from rdflib.plugins.sparql import prepareQuery
+from rdflib.plugins.sparql.parserutils import CompValue
+
+from qusai_core.utils.constants import ALIGN, QURAN, ROOT, LEMMA
+from qusai_core.utils.memory import deep_sizeof
+
+logger = logging.getLogger(__name__)
+
+INIT_NS = {"align": ALIGN, "quran": QURAN, "root": ROOT, "lemma": LEMMA}
+
+# Named templates. "params" maps each bindable variable to the namespace its value
+# lives in (None = plain literal).
+QUERY_TEMPLATES: Dict[str, Dict] = {
+    "root_segments": {
+        "text": "SELECT ?segment ?lemma WHERE { ?segment quran:hasRoot ?root . OPTIONAL { ?segment quran:hasLemma ?lemma } }",
+        "params": {"root": ROOT},
+    },
+    "root_lemmas": {
+        "text": "SELECT ?lemma (COUNT(?segment) AS ?count) WHERE { ?segment quran:hasRoot ?root ; quran:hasLemma ?lemma } GROUP BY ?lemma ORDER BY DESC(?count)",
+        "params": {"root": ROOT},
+    },
+    "lemma_roots": {
+        "text": "SELECT DISTINCT ?root WHERE { ?segment quran:hasLemma ?lemma ; quran:hasRoot ?root }",
+        "params": {"lemma": LEMMA},
+    },
+    "root_properties": {
+        "text": "SELECT ?p ?o WHERE { ?root ?p ?o }",
+        "params": {"root": ROOT},
+    },
+}
+
+READ_ONLY_QUERY_TYPES = {"SelectQuery", "AskQuery", "ConstructQuery", "DescribeQuery"}
+# Algebra nodes that make rdflib fetch remote data (SSRF): SERVICE, FROM / FROM NAMED
+REMOTE_ALGEBRA_NODES = {"ServiceGraphPattern", "DatasetClause"}
+
+class QueryTimeout(Exception):
+    """Raised when a query exceeds its time budget."""
+
+
+def _remote_nodes(node) -> List[str]:
+    """Names of algebra nodes under `node` that would fetch remote data."""
+    found, stack, seen = [], [node], set()
+    while stack:
+        item = stack.pop()
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+        if isinstance(item, CompValue):
+            if item.name in REMOTE_ALGEBRA_NODES:
+                found.append(item.name)
+            stack.extend(item.values())
+        elif isinstance(item, dict):
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple)):
+            stack.extend(item)
+    return found
+
+class _DeadlineStore(Store):
+    """
+    Read-only view of a graph that raises QueryTimeout from triple lookups once the deadline
+    passes. rdflib evaluates joins, sorts and groups by pulling triples, so this stops a
+    runaway query at its next lookup without interrupting the thread from outside.
+    """
+
+    def __init__(self, graph: Graph, deadline: float):
+        super().__init__()
+        self.graph = graph
+        self.deadline = deadline
+
+    def triples(self, triple_pattern, context=None):
+        for triple in self.graph.triples(triple_pattern):
+            if time.monotonic() > self.deadline:
+                raise QueryTimeout
+            yield triple, iter((None,))
+
+    def __len__(self, context=None) -> int:
+        return len(self.graph)
+
+    def namespace(self, prefix):
+        return self.graph.store.namespace(prefix)
+
+    def prefix(self, namespace):
+        return self.graph.store.prefix(namespace)
+
+    def namespaces(self):
+        return self.graph.store.namespaces()
+
+
+class PreparedQueryRegistry:
+    """
+    Compiles SPARQL once (prepareQuery) and caches results.
+    Result cache is keyed on (query, bindings, limit, ontology version); results larger
+    than max_result_bytes are returned but not cached. Queries run on a small pool of
+    reusable worker threads (`max_workers`).
+    """
+
+    def __init__(self, templates: Optional[Dict[str, Dict]] = None,
+                 max_prepared: int = 128, max_results: int = 256,
+                 max_result_bytes: int = 4 * 1024 * 1024,
+                 max_workers: int = 2):
+        self.templates = dict(templates or QUERY_TEMPLATES)
+        self.max_prepared = max_prepared
+        self.max_results = max_results
+        self.max_result_bytes = max_result_bytes
+        self._prepared: "OrderedDict[str, object]" = OrderedDict()
+        self._results: "OrderedDict[tuple, List[Dict]]" = OrderedDict()
+        self._result_sizes: Dict[tuple, int] = {}
+        self.result_bytes = 0  # approximate, see qusai_core.utils.memory
+        self._lock = threading.Lock()
+        self._workers = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="sparql-query")
+        self.hits = 0
+        self.misses = 0
+
+    def register(self, name: str, text: str, params: Optional[Dict[str, Optional[Namespace]]] = None):
+        self.templates[name] = {"text": text, "params": params or {}}
+        self._prepared.pop(name, None)
+
+    def _prepare(self, key: str, text: str):
+        with self._lock:
+            prepared = self._prepared.get(key)
+            if prepared is not None:
+                self._prepared.move_to_end(key)
+                return prepared
+
+        prepared = prepareQuery(text, initNs=INIT_NS)
+        if prepared.algebra.name not in READ_ONLY_QUERY_TYPES:
+            raise ValueError(f"Only read-only queries are allowed (got {prepared.algebra.name})")
+        remote = _remote_nodes(prepared.algebra)
+        if remote:
+            raise ValueError(f"Queries may only read the local ontology (found {', '.join(sorted(set(remote)))})")
+
+        with self._lock:
+            self._prepared[key] = prepared
+            while len(self._prepared) > self.max_prepared:
+                self._prepared.popitem(last=False)
+        return prepared
+
+    def _bind(self, params: Dict[str, Optional[Namespace]], bindings: Dict[str, str]) -> Dict:
+        unknown = set(bindings) - set(params)
+        if unknown:
+            raise ValueError(f"Unknown parameters: {', '.join(sorted(unknown))}")
+        return {
+            name: (params[name][value] if params[name] is not None else Literal(value))
+            for name, value in bindings.items()
+        }
+
+    def clear_results(self):
+        with self._lock:
+            self._results.clear()
+            self._result_sizes.clear()
+            self.result_bytes = 0
+
+    def _pop_oldest(self) -> int:
+        key, _ = self._results.popitem(last=False)
+        size = self._result_sizes.pop(key, 0)
+        self.result_bytes -= size
+        return size
+
+    def evict_oldest(self) -> int:
+        """Drops the least recently used result; returns the bytes freed (0 if empty)."""
+        with self._lock:
+            return self._pop_oldest() if self._results else 0
+
+    def run(self, graph, version: int,
+            template: Optional[str] = None,
+            sparql: Optional[str] = None,
+            bindings: Optional[Dict[str, str]] = None,
+            limit: int = 1000,
+            timeout: float = 10.0) -> List[Dict]:
+        """Executes a named template (with bindings) or an ad-hoc read-only query."""
+        bindings = bindings or {}
+        if template is not None:
+            if template not in self.templates:
+                raise KeyError(f"Unknown query template '{template}'")
+            spec = self.templates[template]
+            prepared = self._prepare(template, spec["text"])
+            init_bindings = self._bind(spec.get("params", {}), bindings)
+            query_key = template
+        elif sparql is not None:
+            prepared = self._prepare(sparql, sparql)
+            init_bindings = {}
+            query_key = sparql
+        else:
+            raise ValueError("Either template or sparql is required")
+
+        cache_key = (query_key, tuple(sorted(bindings.items())), limit, version)
+        with self._lock:
+            cached = self._results.get(cache_key)
+            if cached is not None:
+                self._results.move_to_end(cache_key)
+                self.hits += 1
+                return cached
+            self.misses += 1
+
+        rows = self._execute(graph, prepared, init_bindings, limit, timeout)
+        size = deep_sizeof(rows)
+
+        with self._lock:
+            if cache_key not in self._results and size <= self.max_result_bytes:
+                self._results[cache_key] = rows
+                self._result_sizes[cache_key] = size
+                self.result_bytes += size
+            while len(self._results) > self.max_results:
+                self._pop_oldest()
+        return rows
+
+    def _execute(self, graph, prepared, init_bindings: Dict, limit: int, timeout: float) -> List[Dict]:
+        """
+        Evaluates on the worker pool. rdflib has no native timeout and sorts, groups and
+        joins before the first row, so the query reads through a _DeadlineStore that stops
+        it at the next triple lookup (or result row) past the deadline. Time spent queued
+        for a worker counts against the budget.
+        """
+        deadline = time.monotonic() + timeout
+        future = self._workers.submit(self._collect, graph, prepared, init_bindings, limit, deadline)
+        try:
+            # Small grace period for the worker to notice the deadline itself
+            return future.result(timeout + 1.0)
+        except (QueryTimeout, FutureTimeout):
+            future.cancel()
+            raise QueryTimeout(f"Query exceeded {timeout}s") from None
+
+    def _collect(self, graph, prepared, init_bindings: Dict, limit: int, deadline: float) -> List[Dict]:
+        rows = []
+        for row in self._rows(Graph(store=_DeadlineStore(graph, deadline), identifier=graph.identifier,
+                                    namespace_manager=graph.namespace_manager),
+                              prepared, init_bindings, limit):
+            if time.monotonic() > deadline:
+                raise QueryTimeout
+            rows.append(row)
+        return rows
+
+    def _rows(self, graph, prepared, init_bindings: Dict, limit: int) -> Iterator[Dict]:
+        result = graph.query(prepared, initBindings=init_bindings)
+
+        if result.type == "ASK":
+            yield {"ask": bool(result.askAnswer)}
+            return
+
+        for i, row in enumerate(result):
+            if i >= limit:
+                break
+            if result.type == "SELECT":
+                yield {str(var): (str(row[var]) if row[var] is not None else None) for var in result.vars}
+            else:
+                s, p, o = row
+                yield {"s": str(s), "p": str(p), "o": str(o)}
+
+    def get_stats(self) -> Dict:
+        return {
+            "templates": len(self.templates),
+            "prepared": len(self._prepared),
+            "cached_results": len(self._results),
+            "result_bytes": self.result_bytes,
+            "max_result_bytes": self.max_result_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
@@ -0,0 +1,325 @@
+import logging
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Tuple
+
+import rdflib
+from rdflib.store import Store
+from rdflib.term import URIRef
+from rdflib.util import from_n3
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS terms (id INTEGER PRIMARY KEY, n3 TEXT NOT NULL UNIQUE);
+CREATE TABLE IF NOT EXISTS triples (seq INTEGER PRIMARY KEY, s INTEGER NOT NULL, p INTEGER NOT NULL, o INTEGER NOT NULL);
+CREATE TABLE IF NOT EXISTS namespaces (prefix TEXT PRIMARY KEY, uri TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+"""
+
+# Covering indexes. `seq` (insertion order) sits before the remaining column so
+# every lookup streams rows in the same order the in-memory store would.
+INDEXES = """
+CREATE UNIQUE INDEX IF NOT EXISTS idx_spo ON triples (s, p, o);
+CREATE INDEX IF NOT EXISTS idx_po ON triples (p, o, seq, s);
+CREATE INDEX IF NOT EXISTS idx_sp ON triples (s, p, seq, o);
+CREATE INDEX IF NOT EXISTS idx_os ON triples (o, seq, s, p);
+"""
+
+# One prepared statement per triple-pattern shape (bound parts: s, p, o).
+# Ordering mirrors rdflib's Memory store: insertion order, grouped by first-seen key where it nests.
+PATTERN_SQL = {
+    (True, True, True): "SELECT s, p, o FROM triples WHERE s = ? AND p = ? AND o = ?",
+    (True, True, False): "SELECT s, p, o FROM triples WHERE s = ? AND p = ? ORDER BY seq",
+    (True, False, True): "SELECT s, p, o FROM (SELECT s, p, o, seq, MIN(seq) OVER (PARTITION BY p) AS g "
+                         "FROM triples WHERE s = ?) WHERE o = ? ORDER BY g, seq",
+    (True, False, False): "SELECT s, p, o FROM triples WHERE s = ? ORDER BY MIN(seq) OVER (PARTITION BY p), seq",
+    (False, True, True): "SELECT s, p, o FROM triples WHERE p = ? AND o = ? ORDER BY seq",
+    (False, True, False): "SELECT s, p, o FROM triples WHERE p = ? ORDER BY MIN(seq) OVER (PARTITION BY o), seq",
+    (False, False, True): "SELECT s, p, o FROM triples WHERE o = ? ORDER BY MIN(seq) OVER (PARTITION BY s), seq",
+    (False, False, False): "SELECT s, p, o FROM triples ORDER BY seq",
+}
+
+class _Lease:
+    """A pooled connection checked out by one thread; nested store calls on that thread reuse it."""
+    __slots__ = ("conn", "depth")
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+        self.depth = 0
+
+
+class SQLiteTripleStore(Store):
+    """
+    Disk-backed rdflib Store on SQLite for low-memory deployments.
+    Terms are dictionary-encoded as integers; triples are served from covering indexes
+    with parameterized (statement-cached) queries. Memory use is bounded by the SQLite
+    page cache (`cache_kib` in total, split across a pool of at most `max_connections`
+    connections) plus an LRU of decoded terms (`term_cache_size`).
+    """
+
+    context_aware = False
+    formula_aware = False
+    transaction_aware = False
+    graph_aware = False
+
+    def __init__(self, db_path: Path, cache_kib: int = 16384, term_cache_size: int = 65536,
+                 max_connections: int = 4, pool_timeout: float = 30.0):
+        super().__init__()
+        self.db_path = Path(db_path)
+        self.cache_kib = cache_kib
+        self.max_connections = max(1, max_connections)
+        self.pool_timeout = pool_timeout
+        self._local = threading.local()  # this thread's current lease
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._connections = []  # every pooled connection, so close() releases them all
+        self._connections_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._len: Optional[int] = None
+
+        self._decode = lru_cache(maxsize=term_cache_size)(self._decode_uncached)
+        self._encode = lru_cache(maxsize=term_cache_size)(self._encode_uncached)
+
+        with self._connection() as conn:
+            conn.executescript(SCHEMA)
+            conn.executescript(INDEXES)
+            conn.commit()
+
+    # --- Connections ---
+
+    def _checkout(self) -> sqlite3.Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._connections_lock:
+            if len(self._connections) < self.max_connections:
+                # Each connection gets an equal share of the page-cache budget
+                conn = sqlite3.connect(str(self.db_path), check_same_thread=False, cached_statements=64)
+                conn.execute(f"PRAGMA cache_size=-{max(64, int(self.cache_kib) // self.max_connections)}")
+                conn.execute("PRAGMA mmap_size=0")
+                self._connections.append(conn)
+                return conn
+        try:
+            return self._idle.get(timeout=self.pool_timeout)
+        except queue.Empty:
+            raise RuntimeError(f"No SQLite connection free after {self.pool_timeout}s "
+                               f"({self.max_connections} in use)") from None
+
+    @contextmanager
+    def _connection(self) -> Iterator[sqlite3.Connection]:
+        """
+        A pooled connection for the current thread. Nested calls (e.g. decoding terms while
+        iterating triples) reuse the thread's lease, so a thread never waits on the pool
+        while holding a connection; the connection returns to the pool when the outermost
+        call finishes (for triples(), when the iterator is exhausted or closed).
+        """
+        lease = getattr(self._local, "lease", None)
+        if lease is None or lease.depth == 0:
+            lease = self._local.lease = _Lease(self._checkout())
+        lease.depth += 1
+        try:
+            yield lease.conn
+        finally:
+            lease.depth -= 1
+            if lease.depth == 0:
+                self._idle.put(lease.conn)
+
+    def close(self, commit_pending_transaction: bool = False):
+        """Closes every pooled connection; callers must be done with the store."""
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            if commit_pending_transaction:
+                conn.commit()
+            conn.close()
+        self._idle = queue.LifoQueue()
+        self._local = threading.local()
+
+    # --- Term dictionary ---
+
+    def _decode_uncached(self, term_id: int):
+        with self._connection() as conn:
+            row = conn.execute("SELECT n3 FROM terms WHERE id = ?", (term_id,)).fetchone()
+        return from_n3(row[0])
+
+    def _encode_uncached(self, n3: str) -> Optional[int]:
+        with self._connection() as conn:
+            row = conn.execute("SELECT id FROM terms WHERE n3 = ?", (n3,)).fetchone()
+        return row[0] if row else None
+
+    def _term_id(self, term, create: bool = False) -> Optional[int]:
+        n3 = term.n3()
+        term_id = self._encode(n3)
+        if term_id is None and create:
+            with self._connection() as conn:
+                term_id = conn.execute("INSERT INTO terms (n3) VALUES (?)", (n3,)).lastrowid
+            self._encode.cache_clear()
+        return term_id
+
+    # --- Store API ---
+
+    def triples(self, triple_pattern, context=None) -> Iterator[Tuple[Tuple, Iterator]]:
+        ids = []
+        for term in triple_pattern:
+            if term is None:
+                continue
+            term_id = self._term_id(term)
+            if term_id is None:
+                return  # unknown term: nothing can match
+            ids.append(term_id)
+
+        sql = PATTERN_SQL[tuple(term is not None for term in triple_pattern)]
+        with self._connection() as conn:
+            cursor = conn.execute(sql, ids)
+            try:
+                while True:
+                    rows = cursor.fetchmany(512)
+                    if not rows:
+                        break
+                    for s, p, o in rows:
+                        yield (self._decode(s), self._decode(p), self._decode(o)), iter((None,))
+            finally:
+                cursor.close()
+
+    def __len__(self, context=None) -> int:
+        if self._len is None:
+            with self._connection() as conn:
+                self._len = conn.execute("SELECT COUNT(*) FROM triples").fetchone()[0]
+        return self._len
+
+    def add(self, triple, context=None, quoted: bool = False):
+        with self._write_lock, self._connection() as conn:
+            s, p, o = (self._term_id(term, create=True) for term in triple)
+            conn.execute("INSERT OR IGNORE INTO triples (s, p, o) VALUES (?, ?, ?)", (s, p, o))
+            conn.commit()
+            self._len = None
+        super().add(triple, context, quoted)
+
+    def remove(self, triple_pattern, context=None):
+        with self._write_lock, self._connection() as conn:
+            matches = [t for t, _ in self.triples(triple_pattern)]
+            for triple in matches:
+                s, p, o = (self._term_id(term) for term in triple)
+                conn.execute("DELETE FROM triples WHERE s = ? AND p = ? AND o = ?", (s, p, o))
+                super().remove(triple, context)
+            conn.commit()
+            self._len = None
+
+    def contexts(self, triple=None):
+        return iter(())
+
+    # --- Namespaces ---
+
+    def bind(self, prefix: str, namespace: URIRef, override: bool = True):
+        with self._write_lock, self._connection() as conn:
+            if override:
+                conn.execute("DELETE FROM namespaces WHERE uri = ?", (str(namespace),))
+                conn.execute("INSERT OR REPLACE INTO namespaces (prefix, uri) VALUES (?, ?)", (prefix, str(namespace)))
+            else:
+                conn.execute("INSERT OR IGNORE INTO namespaces (prefix, uri) VALUES (?, ?)", (prefix, str(namespace)))
+            conn.commit()
+
+    def namespace(self, prefix: str) -> Optional[URIRef]:
+        with self._connection() as conn:
+            row = conn.execute("SELECT uri FROM namespaces WHERE prefix = ?", (prefix,)).fetchone()
+        return URIRef(row[0]) if row else None
+
+    def prefix(self, namespace: URIRef) -> Optional[str]:
+        with self._connection() as conn:
+            row = conn.execute("SELECT prefix FROM namespaces WHERE uri = ?", (str(namespace),)).fetchone()
+        return row[0] if row else None
+
+    def namespaces(self):
+        with self._connection() as conn:
+            rows = conn.execute("SELECT prefix, uri FROM namespaces").fetchall()
+        for prefix, uri in rows:
+            yield prefix, URIRef(uri)
+
+    # --- Build ---
+
+    def get_meta(self, key: str) -> Optional[str]:
+        with self._connection() as conn:
+            row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key: str, value: str):
+        with self._write_lock, self._connection() as conn:
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+            conn.commit()
+
+    @classmethod
+    def build_from_file(cls, source_path: Path, db_path: Path, format: str = "turtle",
+                        namespaces: Optional[Dict[str, URIRef]] = None,
+                        meta: Optional[Dict[str, str]] = None, **kwargs) -> "SQLiteTripleStore":
+        """
+        Parses the source once and bulk-loads it into a fresh database (written next to db_path,
+        then renamed into place so open readers keep the previous file).
+        Triples keep parse order, which is what the in-memory store's lookups follow.
+        """
+        collector = _InsertionOrderStore()
+        graph = rdflib.Graph(store=collector)
+        for prefix, uri in (namespaces or {}).items():
+            graph.bind(prefix, uri)
+        graph.parse(str(source_path), format=format)
+
+        db_path = Path(db_path)
+        tmp_path = db_path.with_name(db_path.name + ".tmp")
+        tmp_path.unlink(missing_ok=True)
+
+        conn = sqlite3.connect(str(tmp_path))
+        conn.execute("PRAGMA journal_mode=OFF")
+        conn.execute("PRAGMA synchronous=OFF")
+        conn.executescript(SCHEMA)
+
+        term_ids: Dict[str, int] = {}
+        def term_id(term) -> int:
+            n3 = term.n3()
+            if n3 not in term_ids:
+                term_ids[n3] = len(term_ids) + 1
+            return term_ids[n3]
+
+        rows = ((term_id(s), term_id(p), term_id(o)) for s, p, o in collector.ordered)
+        conn.executemany("INSERT INTO triples (s, p, o) VALUES (?, ?, ?)", rows)
+        conn.executemany("INSERT INTO terms (id, n3) VALUES (?, ?)", ((i, n3) for n3, i in term_ids.items()))
+        conn.executemany("INSERT INTO namespaces (prefix, uri) VALUES (?, ?)",
+                         ((prefix, str(uri)) for prefix, uri in collector.bound.items()))
+        conn.executemany("INSERT INTO meta (key, value) VALUES (?, ?)", (meta or {}).items())
+        conn.executescript(INDEXES)
+        conn.commit()
+        conn.execute("ANALYZE")
+        conn.close()
+
+        os.replace(tmp_path, db_path)
+        logger.info(f"Built SQLite triple store at {db_path} ({len(collector.ordered):,} triples, {len(term_ids):,} terms)")
+        return cls(db_path, **kwargs)
+
+
+class _InsertionOrderStore(Store):
+    """Write-only store used while bulk loading: records unique triples in parse order."""
+
+    def __init__(self):
+        super().__init__()
+        self.ordered: Dict[Tuple, None] = {}
+        self.bound: Dict[str, URIRef] = {}
+
+    def add(self, triple, context=None, quoted: bool = False):
+        self.ordered[triple] = None
+
+    def bind(self, prefix: str, namespace: URIRef, override: bool = True):
+        if override or prefix not in self.bound:
+            self.bound[prefix] = URIRef(namespace)
+
+    def namespace(self, prefix: str) -> Optional[URIRef]:
+        return self.bound.get(prefix)
+
+    def prefix(self, namespace: URIRef) -> Optional[str]:
+        return next((p for p, uri in self.bound.items() if uri == namespace), None)
+
+    def namespaces(self):
+        return iter(list(self.bound.items()))
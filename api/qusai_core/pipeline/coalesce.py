@@ -0,0 +1,100 @@
+import hashlib
+import logging
+import threading
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+def normalize_query(text: str) -> str:
+    """Case- and whitespace-insensitive form used for coalescing keys."""
+    return " ".join(text.lower().split())
+
+def coalesce_key(*parts) -> str:
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(repr(part).encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+        self.abandoned = False  # leader was cancelled before producing a result
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical calls: the first caller (leader) runs the work,
+    later callers with the same key wait for and share its result.
+
+    Cancellation: a follower that times out just detaches (the leader keeps going).
+    If the leader is cancelled (BaseException such as KeyboardInterrupt/SystemExit or
+    an async cancellation), waiting followers elect a new leader instead of failing.
+    Ordinary exceptions are shared with the followers (counted as `shared_errors`, not
+    as saved generations).
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, _Call] = {}
+        self._lock = threading.Lock()
+        self._counters = {"leaders": 0, "generations_saved": 0, "follower_timeouts": 0, "leader_cancellations": 0,
+                          "shared_errors": 0}
+
+    def do(self, key: str, fn: Callable[[], object], timeout: Optional[float] = None):
+        while True:
+            with self._lock:
+                call = self._calls.get(key)
+                if call is None:
+                    call = self._calls[key] = _Call()
+                    self._counters["leaders"] += 1
+                    leader = True
+                else:
+                    call.waiters += 1
+                    leader = False
+
+            if leader:
+                return self._lead(key, call, fn)
+
+            if not call.done.wait(timeout):
+                with self._lock:
+                    call.waiters -= 1
+                    self._counters["follower_timeouts"] += 1
+                raise TimeoutError("Timed out waiting for coalesced generation")
+
+            if call.abandoned:
+                continue  # leader cancelled: retry, possibly as the new leader
+
+            if call.error is not None:
+                with self._lock:
+                    self._counters["shared_errors"] += 1
+                raise call.error
+            with self._lock:
+                self._counters["generations_saved"] += 1
+            return call.result
+
+    def _lead(self, key: str, call: _Call, fn: Callable[[], object]):
+        try:
+            call.result = fn()
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        except BaseException:
+            call.abandoned = True
+            with self._lock:
+                self._counters["leader_cancellations"] += 1
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+                if call.waiters:
+                    logger.info(f"[COALESCE] shared one generation with {call.waiters} waiting request(s)")
+            call.done.set()
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {**self._counters, "in_flight": len(self._calls)}
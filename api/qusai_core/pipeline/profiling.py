@@ -0,0 +1,143 @@
+import cProfile
+import itertools
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict
+
+logger = logging.getLogger(__name__)
+
+PROFILE_MODES = ("sampling", "cprofile")
+
+class _StackSampler:
+    """
+    Samples one thread's Python stack at a fixed interval from a helper thread.
+    Overhead on the profiled thread is only the GIL hand-offs; output is collapsed stacks.
+    """
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            frames = []
+            while frame is not None:
+                code = frame.f_code
+                name = getattr(code, "co_qualname", code.co_name)
+                frames.append(f"{os.path.basename(code.co_filename)}:{name}")
+                frame = frame.f_back
+            if frames:
+                self.stacks[";".join(reversed(frames))] += 1
+
+    def write(self, path: Path):
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class RequestProfiler:
+    """
+    Opt-in per-request profiling.
+    A request is profiled when explicitly asked for (e.g. a request header) or picked by
+    `sample_rate`; either way the share of profiled requests never exceeds `max_fraction`.
+
+    Modes:
+      - "sampling": low-overhead stack sampler, writes collapsed stacks (`.folded`,
+        for flamegraph.pl / speedscope).
+      - "cprofile": deterministic cProfile, writes pstats (`.prof`, for snakeviz / pstats).
+        Only one cProfile session can run at a time; concurrent requests go unprofiled.
+    """
+
+    def __init__(self,
+                 output_dir: Path,
+                 sample_rate: float = 0.0,
+                 max_fraction: float = 0.01,
+                 mode: str = "sampling",
+                 interval: float = 0.005):
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode '{mode}' (expected one of {PROFILE_MODES})")
+        self.output_dir = Path(output_dir)
+        self.sample_rate = max(0.0, min(sample_rate, 1.0))
+        self.max_fraction = max(0.0, min(max_fraction, 1.0))
+        self.mode = mode
+        self.interval = interval
+
+        self._lock = threading.Lock()
+        self._seq = itertools.count()
+        self._cprofile_active = False
+        self._counters = {"requests": 0, "profiled": 0, "requested": 0, "refused_budget": 0}
+
+    def _should_profile(self, force: bool) -> bool:
+        with self._lock:
+            self._counters["requests"] += 1
+            if force:
+                self._counters["requested"] += 1
+            elif random.random() >= self.sample_rate:
+                return False
+            # Budget: one profile up front, then at most max_fraction of traffic seen so far
+            if self._counters["profiled"] + 1 > self.max_fraction * self._counters["requests"] + 1:
+                self._counters["refused_budget"] += 1
+                return False
+            if self.mode == "cprofile":
+                if self._cprofile_active:
+                    return False
+                self._cprofile_active = True
+            self._counters["profiled"] += 1
+            return True
+
+    @contextmanager
+    def profile(self, name: str = "request", force: bool = False):
+        """Profiles the enclosed block if selected; yields the output path (or None)."""
+        if not self._should_profile(force):
+            yield None
+            return
+
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        stem = f"{time.strftime('%Y%m%d-%H%M%S')}_{name}_{os.getpid()}_{next(self._seq)}"
+        start = time.perf_counter()
+        if self.mode == "cprofile":
+            path = self.output_dir / f"{stem}.prof"
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+                try:
+                    yield path
+                finally:
+                    profiler.disable()
+                profiler.dump_stats(str(path))
+            finally:
+                with self._lock:
+                    self._cprofile_active = False
+        else:
+            path = self.output_dir / f"{stem}.folded"
+            sampler = _StackSampler(threading.get_ident(), self.interval)
+            sampler.start()
+            try:
+                yield path
+            finally:
+                sampler.stop()
+            sampler.write(path)
+        logger.info(f"[PROFILE] {name} took {time.perf_counter() - start:.2f}s -> {path}")
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {**self._counters, "mode": self.mode, "sample_rate": self.sample_rate,
+                    "max_fraction": self.max_fraction}
@@ -0,0 +1,131 @@
+import logging
+import re
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from qusai_core.llm.loader import ModelInterface
+
+logger = logging.getLogger(__name__)
+
+ARABIC_SCRIPT = re.compile(r"[؀-ۿ]")
+FAILURE_PREFIXES = ("Error:", "[Model Not Loaded]")
+
+class Route:
+    """A named backend that serves queries scoring at least `min_score`."""
+
+    def __init__(self, name: str, model: ModelInterface, min_score: int = 0):
+        self.name = name
+        self.model = model
+        self.min_score = min_score
+        self.requests = 0
+        self.failures = 0
+        self.total_seconds = 0.0
+
+
+class ModelRouter:
+    """
+    Cascading router over several backends, ordered from cheapest to largest.
+    Picks a route from cheap query features; escalates to the next larger route
+    when a backend fails or its output is rejected (e.g. by the Asr check).
+    """
+
+    def __init__(self,
+                 routes: List[Route],
+                 long_query_words: int = 40,
+                 many_roots: int = 3,
+                 large_context_lines: int = 10,
+                 fallback: bool = True):
+        if not routes:
+            raise ValueError("ModelRouter needs at least one route")
+        self.routes = sorted(routes, key=lambda r: r.min_score)
+        self.long_query_words = long_query_words
+        self.many_roots = many_roots
+        self.large_context_lines = large_context_lines
+        self.fallback = fallback
+        self.escalations = 0
+        self._lock = threading.Lock()
+
+    @property
+    def largest(self) -> ModelInterface:
+        return self.routes[-1].model
+
+    def load(self):
+        for route in self.routes:
+            route.model.load()
+
+    def features(self, user_input: str, context: str, mapped_roots: int) -> Dict:
+        words = len(user_input.split())
+        return {
+            "words": words,
+            "mapped_roots": mapped_roots,
+            "context_lines": context.count("\n") + 1 if context else 0,
+            "arabic": bool(ARABIC_SCRIPT.search(user_input)) or "arabic" in user_input.lower(),
+        }
+
+    def score(self, features: Dict) -> int:
+        score = 0
+        if features["words"] > self.long_query_words:
+            score += 1
+        if features["mapped_roots"] >= self.many_roots:
+            score += 1
+        if features["context_lines"] > self.large_context_lines:
+            score += 1
+        if features["arabic"]:
+            score += 1
+        return score
+
+    def choose(self, features: Dict) -> int:
+        score = self.score(features)
+        index = 0
+        for i, route in enumerate(self.routes):
+            if route.min_score <= score:
+                index = i
+        return index
+
+    def run(self,
+            features: Dict,
+            call: Callable[[Route], str],
+            accept: Optional[Callable[[str], bool]] = None) -> Tuple[str, str]:
+        """
+        Generates via the chosen route, escalating on failure/rejection.
+        Returns (text, route_name).
+        """
+        index = self.choose(features)
+        text = ""
+        while True:
+            route = self.routes[index]
+            start = time.perf_counter()
+            text = call(route)
+            elapsed = time.perf_counter() - start
+
+            failed = not text or text.startswith(FAILURE_PREFIXES)
+            rejected = not failed and accept is not None and not accept(text)
+            with self._lock:
+                route.requests += 1
+                route.total_seconds += elapsed
+                route.failures += int(failed or rejected)
+
+            logger.info(f"[ROUTER] route={route.name} score={self.score(features)} features={features} "
+                        f"latency={elapsed:.2f}s{' FAILED' if failed else ''}{' REJECTED' if rejected else ''}")
+
+            if (failed or rejected) and self.fallback and index < len(self.routes) - 1:
+                index += 1
+                with self._lock:
+                    self.escalations += 1
+                continue
+            return text, route.name
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {
+                "escalations": self.escalations,
+                "routes": {
+                    r.name: {
+                        "requests": r.requests,
+                        "failures": r.failures,
+                        "avg_latency_s": round(r.total_seconds / r.requests, 3) if r.requests else 0.0,
+                    }
+                    for r in self.routes
+                },
+            }
@@ -0,0 +1,225 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from qusai_core.utils.memory import deep_sizeof
+
+logger = logging.getLogger(__name__)
+
+class Session:
+    """
+    State of one conversation.
+    Keeps the turns with their token counts, the ontology context each turn carried,
+    and an opaque model state (e.g. the KV cache for TransformersModel).
+    """
+
+    def __init__(self, session_id: str):
+        self.session_id = session_id
+        self.system_prompt: Optional[str] = None
+        self.system_context: List[str] = []  # ontology triples in the system prompt (always sent)
+        self.turns: List[Dict] = []  # {"role", "content", "tokens"[, "context"]}
+        self.model_state: Dict = {}  # not persisted
+        self.last_access = time.monotonic()
+        self.lock = threading.Lock()
+
+    def add_turn(self, role: str, content: str, tokens: int, context: Optional[List[str]] = None):
+        turn = {"role": role, "content": content, "tokens": tokens}
+        if context:
+            turn["context"] = context
+        self.turns.append(turn)
+
+    def reset(self):
+        """Forgets the conversation (e.g. the client cleared or rewound its history)."""
+        self.system_prompt = None
+        self.system_context = []
+        self.turns = []
+        self.model_state = {}
+
+    def visible_context(self, turns: List[Dict]) -> Set[str]:
+        """Context lines the model sees when the prompt holds `turns` (plus the system prompt)."""
+        lines = set(self.system_context)
+        for turn in turns:
+            lines.update(turn.get("context", ()))
+        return lines
+
+    def window(self, token_budget: int) -> List[Dict]:
+        """
+        Most recent turns that fit in the token budget (sliding window, whole turns only).
+        The latest turn is always kept.
+        """
+        kept, used = [], 0
+        for turn in reversed(self.turns):
+            if kept and used + turn["tokens"] > token_budget:
+                break
+            kept.append(turn)
+            used += turn["tokens"]
+        return list(reversed(kept))
+
+    def to_dict(self) -> Dict:
+        return {
+            "session_id": self.session_id,
+            "system_prompt": self.system_prompt,
+            "system_context": self.system_context,
+            "turns": self.turns,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Session":
+        session = cls(data["session_id"])
+        session.system_prompt = data.get("system_prompt")
+        session.turns = data.get("turns", [])
+        # Older files kept one flat list of sent lines; dropping it only means some get resent
+        session.system_context = data.get("system_context", [])
+        return session
+
+
+class SessionStore:
+    """
+    In-memory conversation store with LRU and TTL eviction.
+    Optionally persists sessions (without model state) as JSON files in persist_dir.
+    At most `max_model_states` sessions keep a model state (e.g. a GPU KV cache);
+    the least recently used idle ones lose theirs first.
+    """
+
+    def __init__(self,
+                 max_sessions: int = 256,
+                 ttl_seconds: float = 3600.0,
+                 persist_dir: Optional[Path] = None,
+                 max_model_states: int = 4):
+        self.max_sessions = max_sessions
+        self.max_model_states = max(1, max_model_states)
+        self.ttl_seconds = ttl_seconds
+        self.persist_dir = Path(persist_dir) if persist_dir else None
+        if self.persist_dir:
+            self.persist_dir.mkdir(parents=True, exist_ok=True)
+        self._sessions: "OrderedDict[str, Session]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _path(self, session_id: str) -> Path:
+        # Hashed: any client-chosen id maps to its own, filesystem-safe file name
+        return self.persist_dir / f"{hashlib.sha256(session_id.encode('utf-8')).hexdigest()[:32]}.json"
+
+    def _expire(self):
+        now = time.monotonic()
+        expired = [sid for sid, s in self._sessions.items() if now - s.last_access > self.ttl_seconds]
+        for sid in expired:
+            del self._sessions[sid]
+            if self.persist_dir:
+                self._path(sid).unlink(missing_ok=True)
+
+    def _load_from_disk(self, session_id: str) -> Optional[Session]:
+        if not self.persist_dir:
+            return None
+        path = self._path(session_id)
+        if not path.exists():
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return Session.from_dict(json.load(f))
+        except Exception as e:
+            logger.error(f"Failed to load session {session_id}: {e}")
+            return None
+
+    def get_or_create(self, session_id: str) -> Tuple[Session, bool]:
+        """Returns (session, created)."""
+        with self._lock:
+            self._expire()
+            session = self._sessions.get(session_id)
+            created = False
+            if session is None:
+                session = self._load_from_disk(session_id)
+                if session is None:
+                    session = Session(session_id)
+                    created = True
+                self._sessions[session_id] = session
+            self._sessions.move_to_end(session_id)
+            session.last_access = time.monotonic()
+
+            while len(self._sessions) > self.max_sessions:
+                evicted_id, _ = self._sessions.popitem(last=False)
+                logger.info(f"Evicted session {evicted_id} (LRU)")
+            self._limit_model_states(session)
+            return session, created
+
+    def _limit_model_states(self, current: Session):
+        """Keeps room for `current`'s model state by clearing the oldest idle ones. Holds self._lock."""
+        holders = [s for s in self._sessions.values() if s.model_state and s is not current]
+        excess = len(holders) - (self.max_model_states - 1)
+        for session in holders:  # oldest first
+            if excess <= 0:
+                break
+            if session.lock.acquire(blocking=False):
+                try:
+                    session.model_state = {}
+                    excess -= 1
+                finally:
+                    session.lock.release()
+
+    def save(self, session: Session):
+        if not self.persist_dir:
+            return
+        try:
+            with open(self._path(session.session_id), 'w', encoding='utf-8') as f:
+                json.dump(session.to_dict(), f, ensure_ascii=False)
+        except Exception as e:
+            logger.error(f"Failed to persist session {session.session_id}: {e}")
+
+    def restore(self, data: Dict, model_state: Optional[Dict] = None) -> Session:
+        """
+        Installs a session's turns and context from `to_dict()` output, e.g. state that came
+        back from a generation run in another process. The model state is only replaced when
+        one is given.
+        """
+        session, _ = self.get_or_create(data["session_id"])
+        restored = Session.from_dict(data)
+        with session.lock:
+            session.system_prompt = restored.system_prompt
+            session.system_context = restored.system_context
+            session.turns = restored.turns
+            if model_state is not None:
+                session.model_state = model_state
+        self.save(session)
+        return session
+
+    def drop(self, session_id: str):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+        if self.persist_dir:
+            self._path(session_id).unlink(missing_ok=True)
+
+    def _idle_sessions(self):
+        """Yields sessions not in use by a request, holding each one's lock while yielded."""
+        with self._lock:
+            sessions = list(self._sessions.values())
+        for session in sessions:
+            if session.lock.acquire(blocking=False):
+                try:
+                    yield session
+                finally:
+                    session.lock.release()
+
+    def memory_usage(self) -> Dict:
+        """Approximate bytes held by idle sessions; sessions busy generating are skipped."""
+        usage = {"sessions": len(self._sessions), "sized": 0, "turns": 0, "model_state": 0}
+        for session in self._idle_sessions():
+            usage["sized"] += 1
+            usage["turns"] += deep_sizeof([session.system_prompt, session.system_context, session.turns])
+            usage["model_state"] += deep_sizeof(session.model_state)
+        return usage
+
+    def release_model_states(self) -> int:
+        """Drops idle sessions' model state (e.g. KV caches); it is rebuilt on the next turn."""
+        released = 0
+        for session in self._idle_sessions():
+            if session.model_state:
+                session.model_state = {}
+                released += 1
+        return released
+
+    def __len__(self) -> int:
+        return len(self._sessions)
@@ -0,0 +1,78 @@
+"""
+Memory accounting helpers.
+
+`deep_sizeof` walks an object graph and sums `sys.getsizeof` (plus `nbytes` for
+numpy arrays / torch tensors). It is approximate: interned or shared objects are
+counted once per call, and memory held by C extensions is invisible to it. When
+tracemalloc is tracing, `allocation_tracker` measures what a block allocated.
+"""
+import os
+import sys
+import tracemalloc
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+_ATOMIC = (str, bytes, bytearray, int, float, complex, bool, type(None))
+
+def deep_sizeof(obj) -> int:
+    """Approximate bytes retained by `obj` and everything reachable from it."""
+    seen = set()
+    stack = [obj]
+    total = 0
+    while stack:
+        o = stack.pop()
+        if id(o) in seen:
+            continue
+        seen.add(id(o))
+        total += sys.getsizeof(o)
+        if isinstance(o, _ATOMIC) or isinstance(o, type):
+            continue
+        try:
+            nbytes = getattr(o, "nbytes", None)
+        except Exception:  # e.g. tensors whose storage cannot report a size
+            nbytes = None
+        if isinstance(nbytes, int):
+            total += nbytes  # array/tensor buffer
+            continue
+        if isinstance(o, dict):
+            stack.extend(o.keys())
+            stack.extend(o.values())
+        elif isinstance(o, (list, tuple, set, frozenset)):
+            stack.extend(o)
+        else:
+            attrs = getattr(o, "__dict__", None)
+            if attrs is not None:
+                stack.append(attrs)
+            for slot in getattr(type(o), "__slots__", ()):
+                value = getattr(o, slot, None)
+                if value is not None:
+                    stack.append(value)
+    return total
+
+def process_rss() -> Optional[int]:
+    """Resident set size of this process in bytes (Linux), or None."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+def traced_memory() -> Optional[Dict]:
+    """tracemalloc's current/peak traced bytes, if tracing is on."""
+    if not tracemalloc.is_tracing():
+        return None
+    current, peak = tracemalloc.get_traced_memory()
+    return {"current": current, "peak": peak}
+
+@contextmanager
+def allocation_tracker():
+    """Yields a dict that receives "bytes" (net traced allocation) if tracemalloc is tracing."""
+    result = {}
+    if not tracemalloc.is_tracing():
+        yield result
+        return
+    before = tracemalloc.get_traced_memory()[0]
+    try:
+        yield result
+    finally:
+        result["bytes"] = tracemalloc.get_traced_memory()[0] - before
@@ -0,0 +1,71 @@
+"""
+CPU inference benchmark for TransformersModel.
+
+Loads the model once per setting (dtype / dynamic int8 / threads / torch.compile),
+runs a warmup plus a few timed generations, and prints tokens/sec per setting.
+
+Usage:
+    python bench_cpu_inference.py --repo-id Qwen/Qwen2.5-0.5B-Instruct --threads 8
+    python bench_cpu_inference.py --repo-id Qwen/Qwen2.5-1.5B-Instruct --draft-repo-id Qwen/Qwen2.5-0.5B-Instruct
+"""
+import argparse
+import logging
+
+from qusai_core.llm.loader import TransformersCPUModel
+
+PROMPT = (
+    "<|im_start|>system\nYou are QUSAI.<|im_end|>\n"
+    "<|im_start|>user\nTell me what the topological forms of Jinn are.<|im_end|>\n"
+    "<|im_start|>assistant\n"
+)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark CPU inference settings.")
+    parser.add_argument("--repo-id", default="Qwen/Qwen2.5-0.5B-Instruct")
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--max-new-tokens", type=int, default=64)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--compile", action="store_true", help="Also benchmark torch.compile variants")
+    parser.add_argument("--draft-repo-id", default=None, help="Also benchmark assisted decoding with this draft model")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format='%(message)s')
+
+    settings = [
+        {"dtype": "float32"},
+        {"dtype": "bfloat16"},
+        {"dtype": "float32", "quantize_int8": True},
+    ]
+    if args.compile:
+        settings += [dict(s, compile_model=True) for s in settings]
+    if args.draft_repo_id:
+        settings.append({"dtype": "float32", "draft_repo_id": args.draft_repo_id})
+
+    results = []
+    for setting in settings:
+        model = TransformersCPUModel(args.repo_id, num_threads=args.threads, **setting)
+        model.load()
+        if not model.is_ready:
+            print(f"Skipping {setting}: model failed to load")
+            continue
+        for _ in range(args.runs):
+            model.generate(PROMPT, max_new_tokens=args.max_new_tokens)
+        stats = model.get_stats()
+        results.append((stats["settings"], stats.get("warmup_seconds", 0.0), stats["tokens_per_sec"],
+                        stats.get("speculative")))
+        del model
+
+    print("=" * 60)
+    print(f"CPU inference: {args.repo_id}")
+    print("=" * 60)
+    for settings_used, warmup, tps, spec in results:
+        label = f"{settings_used['dtype']}{' +int8' if settings_used['quantize_int8'] else ''}{' +compile' if settings_used['compile'] else ''}"
+        if spec is not None:
+            label += " +draft"
+        print(f"  {label:<28} warmup {warmup:6.2f}s   {tps:7.2f} tok/s")
+        if spec is not None:
+            print(f"  {'':<28} acceptance {spec['acceptance_rate']:.2f}   "
+                  f"{spec['tokens_per_target_forward']:.2f} tok/step   speedup {spec['speedup'] or 0:.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Import-time benchmark for the QUSAI pipeline.
+
+Runs `python -X importtime -c "import qusai_core.pipeline.middleware"` in a
+fresh interpreter and reports the cumulative import cost, the heaviest
+top-level packages, and whether any model backend libraries were pulled in.
+
+Usage:
+    python bench_import_time.py [module] [--runs N]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+BACKEND_LIBS = ("torch", "transformers", "huggingface_hub", "accelerate")
+
+def run_importtime(module: str, cwd: str):
+    """Returns a list of (self_us, cumulative_us, depth, name) rows."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=cwd, capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"Import failed:\n{proc.stderr}")
+
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            self_us, cum_us, name = line[len("import time:"):].split("|")
+        except ValueError:
+            continue
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((int(self_us), int(cum_us), depth, name.strip()))
+    return rows
+
+def summarize(rows, module: str):
+    total_us = next((cum for _, cum, _, name in rows if name == module), 0)
+    per_package = defaultdict(int)
+    for self_us, _, _, name in rows:
+        per_package[name.split(".")[0]] += self_us
+    loaded_backends = sorted({name.split(".")[0] for *_, name in rows} & set(BACKEND_LIBS))
+    return total_us, per_package, loaded_backends
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure import time of a qusai_core module.")
+    parser.add_argument("module", nargs="?", default="qusai_core.pipeline.middleware")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    cwd = os.path.dirname(os.path.abspath(__file__))
+    totals = []
+    for _ in range(args.runs):
+        rows = run_importtime(args.module, cwd)
+        total_us, per_package, loaded_backends = summarize(rows, args.module)
+        totals.append(total_us)
+
+    print("=" * 60)
+    print(f"Import time: {args.module} ({args.runs} runs)")
+    print("=" * 60)
+    print(f"Median: {statistics.median(totals) / 1000:.1f} ms | Min: {min(totals) / 1000:.1f} ms")
+    print(f"\nTop {args.top} packages by self time (last run):")
+    for name, us in sorted(per_package.items(), key=lambda kv: kv[1], reverse=True)[:args.top]:
+        print(f"  {name:<30} {us / 1000:8.1f} ms")
+    print(f"\nBackend libraries imported: {', '.join(loaded_backends) or 'none'}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Ontology ingestion benchmark: serial Turtle parse vs parallel N-Triples ingestion.
+
+The first parallel run converts the TTL to `<ttl>.nt` (cached); the timings below
+exclude that one-off step and check that both paths load the same triples.
+
+Usage:
+    python bench_ontology_ingest.py [path/to/ontology.ttl] --workers 2,4,8,16 --runs 3
+"""
+import argparse
+import logging
+import os
+import statistics
+import time
+from pathlib import Path
+
+from rdflib import BNode
+
+from qusai_core.ontology.engine import OntologyEngine
+from qusai_core.ontology.ingest import ensure_ntriples
+from qusai_core.utils.constants import DEFAULT_ONTOLOGY_PATH
+
+def time_load(path: Path, workers: int, runs: int):
+    timings, graph = [], None
+    for _ in range(runs):
+        engine = OntologyEngine(ontology_path=path, ingest_workers=workers)
+        start = time.perf_counter()
+        graph = engine._build_graph()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings), graph
+
+def fingerprint(graph):
+    """Triples without blank nodes (whose ids differ per parse) plus the total count."""
+    ground = {t for t in graph if not any(isinstance(term, BNode) for term in t)}
+    return ground, len(graph), dict(graph.namespaces())
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark serial vs parallel ontology ingestion.")
+    parser.add_argument("ontology", nargs="?", type=Path, default=DEFAULT_ONTOLOGY_PATH)
+    parser.add_argument("--workers", default=f"2,4,{os.cpu_count() or 1}", help="Comma-separated pool sizes")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format='%(message)s')
+
+    start = time.perf_counter()
+    ensure_ntriples(args.ontology)
+    convert_seconds = time.perf_counter() - start
+
+    serial, reference = time_load(args.ontology, 1, args.runs)
+    expected = fingerprint(reference)
+
+    print("=" * 60)
+    print(f"Ontology ingestion: {args.ontology} ({len(reference):,} triples, {os.cpu_count()} CPUs)")
+    print("=" * 60)
+    print(f"  {'N-Triples conversion (one-off)':<32} {convert_seconds:7.2f}s")
+    print(f"  {'serial turtle':<32} {serial:7.2f}s   1.00x")
+    for workers in sorted({int(w) for w in args.workers.split(",")}):
+        if workers < 2:
+            continue
+        seconds, graph = time_load(args.ontology, workers, args.runs)
+        same = fingerprint(graph) == expected
+        print(f"  {f'parallel x{workers}':<32} {seconds:7.2f}s   {serial / seconds:4.2f}x"
+              f"{'' if same else '   MISMATCH'}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+"""
+Load-test harness for the QUSAI API.
+
+Starts a local stand-in for the Hugging Face text-generation endpoint
+(wire-compatible with InferenceClient.text_generation, including SSE streaming),
+and drives /chat at configurable concurrency and arrival rates.
+
+Usage:
+    # Fake inference server only (point HFInferenceModel at it via QUSAI_INFERENCE_URL)
+    python loadtest.py server --port 8081 --latency 0.3 --token-rate 40 --error-rate 0.01
+
+    # Drive an already running API
+    python loadtest.py run --url http://127.0.0.1:8000/chat --concurrency 1,4,16 --duration 30
+
+    # Everything offline: fake server + API (uvicorn) + sweep
+    python loadtest.py all --concurrency 1,2,4,8,16 --rate 0 --duration 20
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SAMPLE_QUERIES = [
+    "Tell me what the topological forms of Jinn are",
+    "What is the relationship between mercy and the Lord?",
+    "Salam",
+    "Could aliens be a kind of hidden creation?",
+    "Explain worship and servitude in the Quranic roots",
+]
+
+FILLER_WORDS = ("the root", "jnn", "signifies", "that which", "is hidden", "from the senses", "and",
+                "Allah", "knows best", "ontologically", "contingent", "upon", "the Source")
+
+# --- Fake Inference Server ---
+
+class FakeInferenceHandler(BaseHTTPRequestHandler):
+    """Mimics a TGI text-generation endpoint: POST {"inputs", "parameters", "stream"}."""
+
+    protocol_version = "HTTP/1.1"
+    config = {"latency": 0.2, "token_rate": 50.0, "error_rate": 0.0, "max_tokens": 256, "max_stop_sequences": 4}
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        params = request.get("parameters") or {}
+        cfg = self.config
+
+        time.sleep(cfg["latency"])
+        if random.random() < cfg["error_rate"]:
+            self._send_json(503, {"error": "Injected failure (fake inference server)"})
+            return
+
+        stop = params.get("stop") or []
+        if len(stop) > cfg["max_stop_sequences"]:
+            self._send_json(422, {"error": f"Input validation error: `stop` supports up to "
+                                           f"{cfg['max_stop_sequences']} stop sequences. Given: {len(stop)}",
+                                  "error_type": "validation"})
+            return
+
+        n_tokens = min(int(params.get("max_new_tokens") or cfg["max_tokens"]), cfg["max_tokens"])
+        tokens = [random.choice(FILLER_WORDS) + " " for _ in range(n_tokens)]
+        delay = 1.0 / cfg["token_rate"] if cfg["token_rate"] > 0 else 0.0
+
+        if not request.get("stream"):
+            time.sleep(delay * n_tokens)
+            details = {"finish_reason": "length", "generated_tokens": n_tokens, "seed": None, "prefill": [], "tokens": []}
+            self._send_json(200, [{"generated_text": "".join(tokens), "details": details}])
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for i, text in enumerate(tokens):
+            time.sleep(delay)
+            last = i == n_tokens - 1
+            event = {
+                "index": i,
+                "token": {"id": i, "text": text, "logprob": 0.0, "special": False},
+                "generated_text": "".join(tokens) if last else None,
+                "details": {"finish_reason": "length", "generated_tokens": n_tokens, "seed": None} if last else None,
+            }
+            chunk = f"data:{json.dumps(event)}\n\n".encode()
+            try:
+                self.wfile.write(f"{len(chunk):X}\r\n".encode() + chunk + b"\r\n")
+                self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                return  # client stopped early (stop sequence / stopping criteria)
+        self.wfile.write(b"0\r\n\r\n")
+
+
+def start_fake_server(port: int, **config) -> ThreadingHTTPServer:
+    handler = type("ConfiguredHandler", (FakeInferenceHandler,), {"config": {**FakeInferenceHandler.config, **config}})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+# --- Load Driver ---
+
+def _post_chat(url: str, timeout: float):
+    body = json.dumps({"message": random.choice(SAMPLE_QUERIES)}).encode()
+    request = urllib.request.Request(url, data=body, headers={"Content-Type": "application/json"})
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            payload = json.loads(response.read() or b"{}")
+            status = response.status
+            # Backends report generation failures in-band ("Error: ..."); count them as errors
+            if str(payload.get("response", "")).startswith("Error:"):
+                status = 502
+    except urllib.error.HTTPError as e:
+        status = e.code
+    except Exception:
+        status = 0
+    return status, time.perf_counter() - start
+
+
+def run_load(url: str, concurrency: int, duration: float, rate: float, timeout: float):
+    """
+    Closed loop when rate == 0 (each worker sends back-to-back);
+    otherwise open loop with Poisson arrivals at `rate` req/s, capped at `concurrency` in flight.
+    """
+    results = []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def record(outcome):
+        with lock:
+            results.append(outcome)
+
+    started = time.perf_counter()
+    if rate <= 0:
+        def worker():
+            while time.perf_counter() < deadline:
+                record(_post_chat(url, timeout))
+        threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    else:
+        slots = threading.Semaphore(concurrency)
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            next_arrival = time.perf_counter()
+            while next_arrival < deadline:
+                time.sleep(max(0.0, next_arrival - time.perf_counter()))
+                if not slots.acquire(blocking=False):
+                    record((-1, 0.0))  # dropped client-side: too many in flight
+                else:
+                    future = pool.submit(_post_chat, url, timeout)
+                    future.add_done_callback(lambda f: (record(f.result()), slots.release()))
+                next_arrival += random.expovariate(rate)
+    elapsed = time.perf_counter() - started
+    return summarize(results, elapsed, concurrency)
+
+
+def summarize(results, elapsed: float, concurrency: int):
+    ok = sorted(latency for status, latency in results if status == 200)
+    def pct(p):
+        return ok[min(len(ok) - 1, int(len(ok) * p))] * 1000 if ok else 0.0
+    return {
+        "concurrency": concurrency,
+        "requests": len(results),
+        "throughput_rps": len(ok) / elapsed if elapsed else 0.0,
+        "p50_ms": pct(0.50),
+        "p95_ms": pct(0.95),
+        "p99_ms": pct(0.99),
+        "mean_ms": statistics.mean(ok) * 1000 if ok else 0.0,
+        "error_rate": 1 - len(ok) / len(results) if results else 0.0,
+        "rejected_429": sum(1 for status, _ in results if status == 429),
+        "client_dropped": sum(1 for status, _ in results if status == -1),
+    }
+
+
+def print_report(rows):
+    print("=" * 96)
+    print(f"{'conc':>5} {'reqs':>7} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'mean ms':>9} {'err%':>7} {'429':>6} {'drop':>6}")
+    print("-" * 96)
+    for r in rows:
+        print(f"{r['concurrency']:>5} {r['requests']:>7} {r['throughput_rps']:>8.2f} {r['p50_ms']:>9.0f} "
+              f"{r['p95_ms']:>9.0f} {r['p99_ms']:>9.0f} {r['mean_ms']:>9.0f} {r['error_rate'] * 100:>6.1f}% "
+              f"{r['rejected_429']:>6} {r['client_dropped']:>6}")
+    print("=" * 96)
+    best = max(rows, key=lambda r: r["throughput_rps"], default=None)
+    if best:
+        print(f"Peak throughput {best['throughput_rps']:.2f} req/s at concurrency {best['concurrency']}")
+
+
+def sweep(args):
+    rows = []
+    for concurrency in [int(c) for c in args.concurrency.split(",")]:
+        print(f"Running concurrency={concurrency} for {args.duration}s...")
+        rows.append(run_load(args.url, concurrency, args.duration, args.rate, args.timeout))
+    print_report(rows)
+
+
+def _wait_for(url: str, timeout: float = 120.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=2):
+                return
+        except Exception:
+            time.sleep(0.5)
+    raise RuntimeError(f"Timed out waiting for {url}")
+
+# --- CLI ---
+
+def main():
+    parser = argparse.ArgumentParser(description="QUSAI load-test harness.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def add_server_args(p):
+        p.add_argument("--port", type=int, default=8081)
+        p.add_argument("--latency", type=float, default=0.2, help="Seconds before the first token")
+        p.add_argument("--token-rate", type=float, default=50.0, help="Tokens per second")
+        p.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 503")
+        p.add_argument("--max-tokens", type=int, default=256)
+
+    def add_run_args(p):
+        p.add_argument("--url", default="http://127.0.0.1:8000/chat")
+        p.add_argument("--concurrency", default="1,4,16", help="Comma-separated sweep")
+        p.add_argument("--duration", type=float, default=20.0)
+        p.add_argument("--rate", type=float, default=0.0, help="Arrival rate req/s (0 = closed loop)")
+        p.add_argument("--timeout", type=float, default=120.0)
+
+    add_server_args(sub.add_parser("server", help="Run the fake inference server"))
+    add_run_args(sub.add_parser("run", help="Drive an existing /chat endpoint"))
+    p_all = sub.add_parser("all", help="Fake server + API + sweep")
+    add_server_args(p_all)
+    add_run_args(p_all)
+    p_all.add_argument("--api-port", type=int, default=8000)
+
+    args = parser.parse_args()
+    server_config = {}
+    if args.command in ("server", "all"):
+        server_config = dict(latency=args.latency, token_rate=args.token_rate,
+                             error_rate=args.error_rate, max_tokens=args.max_tokens)
+
+    if args.command == "server":
+        start_fake_server(args.port, **server_config)
+        print(f"Fake inference server on http://127.0.0.1:{args.port} ({server_config})")
+        threading.Event().wait()
+    elif args.command == "run":
+        sweep(args)
+    else:
+        start_fake_server(args.port, **server_config)
+        env = dict(os.environ, HF_TOKEN=os.environ.get("HF_TOKEN", "loadtest"),
+                   QUSAI_INFERENCE_URL=f"http://127.0.0.1:{args.port}")
+        api_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "api")
+        api = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--port", str(args.api_port), "--log-level", "warning"],
+            cwd=api_dir, env=env
+        )
+        try:
+            _wait_for(f"http://127.0.0.1:{args.api_port}/health")
+            args.url = f"http://127.0.0.1:{args.api_port}/chat"
+            sweep(args)
+        finally:
+            api.terminate()
+            api.wait()
+
+if __name__ == "__main__":
+    main()
@@ -1,32 +1,91 @@
 import logging
 import gradio as gr
 import os
+import time
 try:
     import spaces
 except ImportError:
-    # Fallback for local testing without 'spaces'
+    # Fallback for local testing without 'spaces' (supports @GPU and @GPU(duration=...))
     class spaces:
         @staticmethod
-        def GPU(func):
+        def GPU(func=None, duration=None):
+            if func is None:
+                return lambda f: f
             return func
 
 from qusai_core.pipeline.middleware import QusaiMiddleware
+from qusai_core.llm.throughput import ThroughputEstimator
 
 # Configure Logging
 logging.basicConfig(level=logging.INFO, format='%(message)s')
 
 # Initialize Middleware with Transformers (GPU Native)
 # We use the standard HF repo now, not GGUF
+MODEL_ID = "Qwen/Qwen2.5-7B-Instruct"
+MAX_NEW_TOKENS = int(os.environ.get("QUSAI_MAX_NEW_TOKENS", "1024"))
+CONCURRENCY_LIMIT = int(os.environ.get("QUSAI_GRADIO_CONCURRENCY", "2"))
+QUEUE_SIZE = int(os.environ.get("QUSAI_GRADIO_QUEUE_SIZE", "32"))
+PROMPT_OVERHEAD_TOKENS = 800  # system prompt + ontology context
+
 middleware = QusaiMiddleware(
-    repo_id="Qwen/Qwen2.5-7B-Instruct",
-    lazy_load=False
+    repo_id=MODEL_ID,
+    lazy_load=False,
+    max_new_tokens=MAX_NEW_TOKENS,
+    draft_repo_id=os.environ.get("QUSAI_DRAFT_MODEL")  # e.g. Qwen/Qwen2.5-0.5B-Instruct
 )
 
-@spaces.GPU(duration=120) # Request GPU for up to 120s per generation
-def chat_interface(message, history, arabic_only):
+# ZeroGPU runs the GPU function in a worker process, so throughput is measured here
+# (around the call) rather than read from the model's own stats.
+throughput = ThroughputEstimator(max_seconds=int(os.environ.get("QUSAI_GPU_MAX_DURATION", "120")))
+
+def _prompt_tokens(message, history) -> int:
+    tokens = middleware.model.count_tokens(message) + PROMPT_OVERHEAD_TOKENS
+    for item in history or []:
+        content = item.get("content") if isinstance(item, dict) else " ".join(str(part) for part in item)
+        if isinstance(content, str):
+            tokens += middleware.model.count_tokens(content)
+    return min(tokens, middleware.history_token_budget + PROMPT_OVERHEAD_TOKENS)
+
+def _gpu_duration(message, history, session_id, session_state):
+    """ZeroGPU duration (seconds) for this request, from measured tokens/sec."""
+    return throughput.duration(MODEL_ID, _prompt_tokens(message, history), middleware.max_new_tokens)
+
+@spaces.GPU(duration=_gpu_duration)
+def _generate_on_gpu(message, history, session_id, session_state):
+    """
+    Runs in the ZeroGPU worker process: the session goes in and comes back explicitly,
+    since changes the worker makes to its copy of the store are not seen by this process.
+    KV caches stay on the worker's GPU and are not sent back (the next turn prefills again).
+    """
+    started = time.time()
+    if session_state is not None:
+        middleware.sessions.restore(session_state)
+    usage = {}
+    response = middleware.process_query(message, session_id=session_id, history=history, usage=usage)
+    session_state = middleware.sessions.get_or_create(session_id)[0].to_dict() if session_id else None
+    return response, usage, started, time.time() - started, session_state
+
+def chat_interface(message, history, arabic_only, request: gr.Request = None):
     if arabic_only:
         message = f"{message} (Please answer strictly in Arabic / العربية)"
-    return middleware.process_query(message)
+    # One server-side session per browser session; history seeds it after eviction/restart
+    session_id = request.session_hash if request is not None else None
+
+    session_state = middleware.sessions.get_or_create(session_id)[0].to_dict() if session_id else None
+
+    # Time spent in the Gradio queue is not visible here: this measures the wait for a GPU
+    handler_started = time.time()
+    prompt_tokens = _prompt_tokens(message, history)
+    budget = _gpu_duration(message, history, session_id, session_state)
+    response, usage, started, elapsed, session_state = _generate_on_gpu(message, history, session_id, session_state)
+    if session_state is not None:
+        middleware.sessions.restore(session_state)
+
+    new_tokens = usage.get("completion_tokens", middleware.model.count_tokens(response))
+    throughput.record(MODEL_ID, new_tokens, elapsed, usage.get("prompt_tokens", prompt_tokens))
+    status = (f"⏱️ GPU wait {max(0.0, started - handler_started):.1f}s · GPU budget {budget}s · "
+              f"{new_tokens} tokens in {elapsed:.1f}s ({throughput.decode_rate(MODEL_ID):.1f} tok/s)")
+    return response, status
 
 # Gradio UI
 with gr.Blocks(title="QUSAI v2 - Mizan") as demo:
@@ -43,11 +102,18 @@ with gr.Blocks(title="QUSAI v2 - Mizan") as demo:
     with gr.Row():
         arabic_check = gr.Checkbox(label="Output in Arabic Only (مخرجات عربية فقط)", value=False)
     
+    status = gr.Markdown("⏱️ Waiting for the first query...")
+
     chatbot = gr.ChatInterface(
         fn=chat_interface,
         additional_inputs=[arabic_check],
-        type="messages"
+        additional_outputs=[status],
+        type="messages",
+        concurrency_limit=CONCURRENCY_LIMIT
     )
 
+# Bounded queue: excess users get a "queue full" error instead of piling up behind ZeroGPU
+demo.queue(default_concurrency_limit=CONCURRENCY_LIMIT, max_size=QUEUE_SIZE)
+
 if __name__ == "__main__":
     demo.launch()
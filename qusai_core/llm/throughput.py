@@ -0,0 +1,67 @@
+import logging
+import math
+import threading
+from typing import Dict
+
+logger = logging.getLogger(__name__)
+
+class ThroughputEstimator:
+    """
+    Tracks measured decode throughput (tokens/sec) per model and turns it into a
+    time budget for a request, e.g. the ZeroGPU `duration` of a generation.
+
+    budget = overhead + prompt_tokens / prefill_rate + max_new_tokens / decode_rate,
+    times a safety factor, clamped to [min_seconds, max_seconds].
+    Until a model has been measured, `default_decode_rate` is used.
+    """
+
+    def __init__(self,
+                 default_decode_rate: float = 25.0,
+                 prefill_rate: float = 2000.0,
+                 overhead_seconds: float = 5.0,
+                 safety_factor: float = 1.3,
+                 min_seconds: int = 15,
+                 max_seconds: int = 120,
+                 smoothing: float = 0.3):
+        self.default_decode_rate = default_decode_rate
+        self.prefill_rate = prefill_rate
+        self.overhead_seconds = overhead_seconds
+        self.safety_factor = safety_factor
+        self.min_seconds = min_seconds
+        self.max_seconds = max_seconds
+        self.smoothing = smoothing
+        self._rates: Dict[str, float] = {}
+        self._samples: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def decode_rate(self, model_id: str) -> float:
+        with self._lock:
+            return self._rates.get(model_id, self.default_decode_rate)
+
+    def record(self, model_id: str, new_tokens: int, elapsed: float, prompt_tokens: int = 0):
+        """Folds one measured generation into the model's tokens/sec (EMA)."""
+        # `elapsed` is time inside the generation call, so the fixed overhead is not subtracted
+        decode_seconds = elapsed - prompt_tokens / self.prefill_rate
+        if new_tokens <= 0 or decode_seconds <= 0:
+            return
+        rate = new_tokens / decode_seconds
+        with self._lock:
+            previous = self._rates.get(model_id)
+            self._rates[model_id] = rate if previous is None else (
+                self.smoothing * rate + (1 - self.smoothing) * previous)
+            self._samples[model_id] = self._samples.get(model_id, 0) + 1
+
+    def duration(self, model_id: str, prompt_tokens: int, max_new_tokens: int) -> int:
+        """Seconds to reserve for a generation of up to max_new_tokens."""
+        seconds = (self.overhead_seconds
+                   + prompt_tokens / self.prefill_rate
+                   + max_new_tokens / self.decode_rate(model_id))
+        seconds *= self.safety_factor
+        return int(min(self.max_seconds, max(self.min_seconds, math.ceil(seconds))))
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {
+                model_id: {"tokens_per_sec": round(rate, 2), "samples": self._samples.get(model_id, 0)}
+                for model_id, rate in self._rates.items()
+            }
@@ -0,0 +1,206 @@
+import logging
+import os
+import re
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from qusai_core.utils.constants import QURAN, ROOT, LEMMA
+
+logger = logging.getLogger(__name__)
+
+# Segment local names carry their location, e.g. ".../2_255_3" or ".../segment/2:255:3"
+LOCATION_PATTERN = re.compile(r"(\d+)\D+(\d+)")
+
+INDEX_SUFFIX = ".root_index.npz"
+INDEX_FORMAT = 2
+TOP_COOCCURRING = 20
+
+def _csr(rows: List[List[Tuple[int, int]]]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Packs per-root lists of (id, count) into offsets / ids / counts columns."""
+    offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+    for i, row in enumerate(rows):
+        offsets[i + 1] = offsets[i] + len(row)
+    ids = np.fromiter((k for row in rows for k, _ in row), dtype=np.int32, count=int(offsets[-1]))
+    counts = np.fromiter((c for row in rows for _, c in row), dtype=np.int32, count=int(offsets[-1]))
+    return offsets, ids, counts
+
+
+def _ranked(counts: Counter, top: Optional[int] = None) -> List[Tuple]:
+    """Most common first; ties broken by key so the tables do not depend on set/hash order."""
+    return sorted(counts.items(), key=lambda item: (-item[1], item[0]))[:top]
+
+
+class RootAggregates:
+    """
+    Per-root aggregate tables, stored as compact columnar arrays (CSR layout).
+    Built once from the graph and persisted next to the ontology file.
+    """
+
+    def __init__(self):
+        self.roots: List[str] = []
+        self.root_ids: Dict[str, int] = {}
+        self.lemmas: List[str] = []
+        self.columns: Dict[str, np.ndarray] = {}
+
+    @staticmethod
+    def index_path(ontology_path: Path) -> Path:
+        return Path(str(ontology_path) + INDEX_SUFFIX)
+
+    @staticmethod
+    def _source_signature(ontology_path: Path) -> np.ndarray:
+        st = os.stat(ontology_path)
+        return np.array([INDEX_FORMAT, st.st_size, int(st.st_mtime)], dtype=np.int64)
+
+    # --- Build ---
+
+    @classmethod
+    def build(cls, triples_by_predicate) -> "RootAggregates":
+        """
+        `triples_by_predicate(predicate)` yields (subject, object) pairs; this keeps
+        the builder independent of the storage backend.
+        """
+        root_prefix, lemma_prefix = str(ROOT), str(LEMMA)
+
+        # A segment may carry several roots (and lemmas); each one counts
+        segment_roots = defaultdict(set)
+        for s, o in triples_by_predicate(QURAN.hasRoot):
+            if str(o).startswith(root_prefix):
+                segment_roots[str(s)].add(str(o)[len(root_prefix):])
+        segment_lemmas = defaultdict(set)
+        for s, o in triples_by_predicate(QURAN.hasLemma):
+            if str(o).startswith(lemma_prefix):
+                segment_lemmas[str(s)].add(str(o)[len(lemma_prefix):])
+
+        occurrences = Counter()
+        lemma_dist = defaultdict(Counter)
+        ayah_dist = defaultdict(Counter)
+        roots_by_ayah = defaultdict(set)
+
+        for segment, roots in segment_roots.items():
+            match = LOCATION_PATTERN.search(segment.rsplit("/", 1)[-1])
+            ayah = (int(match.group(1)), int(match.group(2))) if match else None
+            for root in roots:
+                occurrences[root] += 1
+                for lemma in segment_lemmas.get(segment, ()):
+                    lemma_dist[root][lemma] += 1
+                if ayah is not None:
+                    ayah_dist[root][ayah] += 1
+                    roots_by_ayah[ayah].add(root)
+
+        cooccurring = defaultdict(Counter)
+        for roots in roots_by_ayah.values():
+            for root in roots:
+                for other in roots:
+                    if other != root:
+                        cooccurring[root][other] += 1
+
+        agg = cls()
+        agg.roots = sorted(occurrences)
+        agg.root_ids = {root: i for i, root in enumerate(agg.roots)}
+        agg.lemmas = sorted({lemma for dist in lemma_dist.values() for lemma in dist})
+        lemma_ids = {lemma: i for i, lemma in enumerate(agg.lemmas)}
+
+        lemma_rows = [[(lemma_ids[l], c) for l, c in _ranked(lemma_dist[r])] for r in agg.roots]
+        cooc_rows = [[(agg.root_ids[o], c) for o, c in _ranked(cooccurring[r], TOP_COOCCURRING)] for r in agg.roots]
+        ayah_rows = [sorted(ayah_dist[r].items()) for r in agg.roots]
+
+        agg.columns["occurrences"] = np.array([occurrences[r] for r in agg.roots], dtype=np.int32)
+        (agg.columns["lemma_offsets"], agg.columns["lemma_ids"],
+         agg.columns["lemma_counts"]) = _csr(lemma_rows)
+        (agg.columns["cooc_offsets"], agg.columns["cooc_ids"],
+         agg.columns["cooc_counts"]) = _csr(cooc_rows)
+
+        surah_rows = []
+        for row in ayah_rows:
+            per_surah = Counter()
+            for (surah, _), count in row:
+                per_surah[surah] += count
+            surah_rows.append(_ranked(per_surah))
+        (agg.columns["surah_offsets"], agg.columns["surah_ids"],
+         agg.columns["surah_counts"]) = _csr(surah_rows)
+        agg.columns["ayah_offsets"] = np.concatenate(([0], np.cumsum([len(row) for row in ayah_rows]))).astype(np.int64)
+        agg.columns["ayah_surah"] = np.fromiter((s for row in ayah_rows for (s, _), _ in row), dtype=np.int16)
+        agg.columns["ayah_number"] = np.fromiter((a for row in ayah_rows for (_, a), _ in row), dtype=np.int16)
+        agg.columns["ayah_counts"] = np.fromiter((c for row in ayah_rows for _, c in row), dtype=np.int32)
+
+        logger.info(f"Built aggregates for {len(agg.roots):,} roots / {len(agg.lemmas):,} lemmas.")
+        return agg
+
+    # --- Persistence ---
+
+    def save(self, ontology_path: Path):
+        path = self.index_path(ontology_path)
+        try:
+            with open(path, "wb") as f:
+                np.savez_compressed(
+                    f,
+                    signature=self._source_signature(ontology_path),
+                    roots=np.array(self.roots, dtype=object).astype(str),
+                    lemmas=np.array(self.lemmas, dtype=object).astype(str),
+                    **self.columns
+                )
+            logger.info(f"Saved root aggregates to {path}")
+        except Exception as e:
+            logger.error(f"Failed to save root aggregates: {e}")
+
+    @classmethod
+    def load(cls, ontology_path: Path) -> Optional["RootAggregates"]:
+        """Loads persisted aggregates, or returns None if missing or stale."""
+        path = cls.index_path(ontology_path)
+        if not path.exists():
+            return None
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                if not np.array_equal(data["signature"], cls._source_signature(ontology_path)):
+                    logger.info("Root aggregates are stale; rebuilding.")
+                    return None
+                agg = cls()
+                agg.roots = data["roots"].tolist()
+                agg.lemmas = data["lemmas"].tolist()
+                agg.columns = {k: data[k] for k in data.files if k not in ("signature", "roots", "lemmas")}
+            agg.root_ids = {root: i for i, root in enumerate(agg.roots)}
+            logger.info(f"Loaded root aggregates for {len(agg.roots):,} roots.")
+            return agg
+        except Exception as e:
+            logger.error(f"Failed to load root aggregates: {e}")
+            return None
+
+    # --- Lookups ---
+
+    def _slice(self, prefix: str, root_id: int) -> slice:
+        offsets = self.columns[f"{prefix}_offsets"]
+        return slice(int(offsets[root_id]), int(offsets[root_id + 1]))
+
+    def summary(self, root: str, top: int = 5) -> Optional[Dict]:
+        """Root summary from array slices (dict lookup + offsets; no graph access)."""
+        root_id = self.root_ids.get(root)
+        if root_id is None:
+            return None
+        lemmas = self._slice("lemma", root_id)
+        cooc = self._slice("cooc", root_id)
+        ayahs = self._slice("ayah", root_id)
+        surahs = self._slice("surah", root_id)
+        return {
+            "root": root,
+            "occurrences": int(self.columns["occurrences"][root_id]),
+            "lemmas": [(self.lemmas[i], int(c)) for i, c in
+                       zip(self.columns["lemma_ids"][lemmas][:top], self.columns["lemma_counts"][lemmas][:top])],
+            "ayahs": ayahs.stop - ayahs.start,
+            "top_surahs": [(int(i), int(c)) for i, c in
+                           zip(self.columns["surah_ids"][surahs][:top], self.columns["surah_counts"][surahs][:top])],
+            "cooccurring_roots": [(self.roots[i], int(c)) for i, c in
+                                  zip(self.columns["cooc_ids"][cooc][:top], self.columns["cooc_counts"][cooc][:top])],
+        }
+
+    def context_line(self, root: str) -> Optional[str]:
+        """One-line summary of a root for the LLM context block."""
+        summary = self.summary(root)
+        if summary is None:
+            return None
+        lemmas = ", ".join(f"lemma:{l}({c})" for l, c in summary["lemmas"]) or "-"
+        cooc = ", ".join(f"root:{r}({c})" for r, c in summary["cooccurring_roots"]) or "-"
+        return (f"root:{root} [Summary] occurrences={summary['occurrences']} ayahs={summary['ayahs']} "
+                f"lemmas: {lemmas} | co-occurs with: {cooc}")
@@ -0,0 +1,243 @@
+"""
+Partitioned ontology: per-root (or root-prefix) N-Triples shards plus a small manifest.
+
+Offline step:
+    python -m qusai_core.ontology.shards path/to/ontology.ttl [--out DIR] [--prefix-len N]
+
+A segment's triples go to the shard of its root; triples about a root URI go to that
+root's shard; everything else goes to a "common" shard that lookups by root never need.
+A triple whose object is another root is also written to that root's shard, so its
+incoming links are complete.
+"""
+import argparse
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict, defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import rdflib
+from rdflib import Graph
+
+from qusai_core.utils.constants import ALIGN, QURAN, ROOT, LEMMA
+from qusai_core.ontology.sqlite_store import _InsertionOrderStore
+from qusai_core.ontology.aggregates import RootAggregates
+from qusai_core.utils.memory import deep_sizeof
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "manifest.json"
+SHARD_FORMAT = 1
+COMMON_SHARD = "_common"
+NAMESPACES = {"align": ALIGN, "quran": QURAN, "root": ROOT, "lemma": LEMMA}
+
+def default_shard_dir(ontology_path: Path) -> Path:
+    return Path(str(ontology_path) + ".shards")
+
+def source_signature(ontology_path: Path) -> str:
+    st = os.stat(ontology_path)
+    return f"{st.st_size}:{int(st.st_mtime)}"
+
+def shard_key(root: str, prefix_len: int = 0) -> str:
+    return root[:prefix_len] if prefix_len > 0 else root
+
+def _shard_file(key: str) -> str:
+    # Buckwalter is case-sensitive and uses $*'<>|} etc.: hex keeps names portable
+    return f"{key.encode('utf-8').hex()}.nt" if key != COMMON_SHARD else f"{COMMON_SHARD}.nt"
+
+def build_shards(ontology_path: Path, shard_dir: Optional[Path] = None, prefix_len: int = 0) -> Path:
+    """Parses the ontology once and writes the shards and manifest. Returns the manifest path."""
+    ontology_path = Path(ontology_path)
+    shard_dir = Path(shard_dir) if shard_dir else default_shard_dir(ontology_path)
+    shard_dir.mkdir(parents=True, exist_ok=True)
+
+    logger.info(f"Partitioning {ontology_path} into shards at {shard_dir}...")
+    # Keep parse order so lookups within a shard match the in-memory graph's order
+    collector = _InsertionOrderStore()
+    rdflib.Graph(store=collector).parse(str(ontology_path), format="turtle")
+    triples = list(collector.ordered)
+
+    root_prefix = str(ROOT)
+    def local_root(term) -> Optional[str]:
+        value = str(term)
+        return value[len(root_prefix):] if value.startswith(root_prefix) and len(value) > len(root_prefix) else None
+
+    # A segment can carry several roots; each of their shards needs all of its triples
+    segment_roots: Dict[object, List[str]] = defaultdict(list)
+    for s, p, o in triples:
+        root = local_root(o) if p == QURAN.hasRoot else None
+        if root and root not in segment_roots[s]:
+            segment_roots[s].append(root)
+
+    lines: Dict[str, List[str]] = defaultdict(list)
+    roots_by_key: Dict[str, set] = defaultdict(set)
+    for s, p, o in triples:
+        object_root = local_root(o)
+        roots = list(segment_roots.get(s) or [r for r in (local_root(s) or object_root,) if r])
+        # Root-to-root (or segment-to-other-root) links: the target's shard needs the incoming edge
+        if object_root and object_root not in roots:
+            roots.append(object_root)
+        line = f"{s.n3()} {p.n3()} {o.n3()} .\n"
+        if not roots:
+            lines[COMMON_SHARD].append(line)
+        keys = []
+        for root in roots:
+            key = shard_key(root, prefix_len)
+            roots_by_key[key].add(root)
+            if key not in keys:
+                keys.append(key)
+                lines[key].append(line)
+
+    shards = {}
+    for key, shard_lines in lines.items():
+        file_name = _shard_file(key)
+        tmp_path = shard_dir / f"{file_name}.{os.getpid()}.tmp"  # concurrent builders never share a tmp file
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.writelines(shard_lines)
+        os.replace(tmp_path, shard_dir / file_name)
+        shards[key] = {"file": file_name, "triples": len(shard_lines), "roots": sorted(roots_by_key.get(key, ()))}
+
+    manifest = {
+        "format": SHARD_FORMAT,
+        "source": str(ontology_path),
+        "source_signature": source_signature(ontology_path),
+        "prefix_len": prefix_len,
+        "triples": len(triples),
+        "shards": shards,
+    }
+    manifest_path = shard_dir / MANIFEST_NAME
+    tmp_path = shard_dir / f"{MANIFEST_NAME}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False)
+    os.replace(tmp_path, manifest_path)
+
+    # Root summaries need the whole corpus: persist them now so sharded startup never does
+    RootAggregates.build(lambda predicate: ((s, o) for s, p, o in triples if p == predicate)).save(ontology_path)
+    logger.info(f"Wrote {len(shards):,} shards ({len(triples):,} triples) to {shard_dir}")
+    return manifest_path
+
+
+class ShardedOntology:
+    """
+    Lazily loaded view over a shard directory.
+    Only the manifest is read up front; a root's shard is parsed on first use and kept
+    in an LRU of at most `max_resident` shards.
+    """
+
+    def __init__(self, shard_dir: Path, max_resident: int = 64):
+        self.shard_dir = Path(shard_dir)
+        self.max_resident = max(1, max_resident)
+        with open(self.shard_dir / MANIFEST_NAME, "r", encoding="utf-8") as f:
+            self.manifest = json.load(f)
+        if self.manifest.get("format") != SHARD_FORMAT:
+            raise ValueError(f"Unsupported shard format {self.manifest.get('format')} in {self.shard_dir}")
+        self.prefix_len = self.manifest.get("prefix_len", 0)
+        self.roots = sorted(root for shard in self.manifest["shards"].values() for root in shard["roots"])
+
+        self._resident: "OrderedDict[str, Graph]" = OrderedDict()
+        self._key_locks: Dict[str, threading.Lock] = {}
+        self._sizes: Dict[str, int] = {}  # measured lazily by resident_bytes()
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "evictions": 0}
+
+    @classmethod
+    def is_fresh(cls, shard_dir: Path, ontology_path: Path) -> bool:
+        """True if a manifest exists and matches the source (or the source is not deployed)."""
+        manifest_path = Path(shard_dir) / MANIFEST_NAME
+        if not manifest_path.exists():
+            return False
+        if not Path(ontology_path).exists():
+            return True
+        try:
+            with open(manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except Exception as e:
+            logger.error(f"Failed to read shard manifest: {e}")
+            return False
+        return (manifest.get("format") == SHARD_FORMAT
+                and manifest.get("source_signature") == source_signature(ontology_path))
+
+    def __len__(self) -> int:
+        return self.manifest.get("triples", 0)
+
+    def graph_for_root(self, root: str) -> Optional[Graph]:
+        """The shard holding `root` (loading it on first use), or None for unknown roots."""
+        key = shard_key(root, self.prefix_len)
+        if key not in self.manifest["shards"] or key == COMMON_SHARD:
+            return None
+        return self._get(key)
+
+    def _get(self, key: str) -> Graph:
+        with self._lock:
+            graph = self._resident.get(key)
+            if graph is not None:
+                self._resident.move_to_end(key)
+                self._counters["hits"] += 1
+                return graph
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        # One loader per shard; other shards stay available meanwhile
+        with key_lock:
+            with self._lock:
+                graph = self._resident.get(key)
+                if graph is not None:
+                    self._resident.move_to_end(key)
+                    self._counters["hits"] += 1
+                    return graph
+            graph = self._load(key)
+            with self._lock:
+                self._counters["misses"] += 1
+                self._resident[key] = graph
+                while len(self._resident) > self.max_resident:
+                    evicted, _ = self._resident.popitem(last=False)
+                    self._sizes.pop(evicted, None)
+                    self._counters["evictions"] += 1
+        return graph
+
+    def _load(self, key: str) -> Graph:
+        graph = rdflib.Graph()
+        for prefix, namespace in NAMESPACES.items():
+            graph.bind(prefix, namespace)
+        graph.parse(str(self.shard_dir / self.manifest["shards"][key]["file"]), format="nt")
+        return graph
+
+    def resident_bytes(self) -> int:
+        """Approximate memory of the resident shards (each shard is sized once while resident)."""
+        with self._lock:
+            resident = list(self._resident.items())
+        total = 0
+        for key, graph in resident:
+            size = self._sizes.get(key)
+            if size is None:
+                size = deep_sizeof(graph.store)
+                with self._lock:
+                    if key in self._resident:
+                        self._sizes[key] = size
+            total += size
+        return total
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {
+                **self._counters,
+                "shards": len(self.manifest["shards"]),
+                "resident": len(self._resident),
+                "resident_triples": sum(len(g) for g in self._resident.values()),
+                "max_resident": self.max_resident,
+            }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Partition the ontology into per-root shards.")
+    parser.add_argument("ontology", type=Path)
+    parser.add_argument("--out", type=Path, default=None, help="Shard directory (default: <ontology>.shards)")
+    parser.add_argument("--prefix-len", type=int, default=0,
+                        help="Group roots by their first N letters (0 = one shard per root)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    build_shards(args.ontology, args.out, args.prefix_len)
+
+if __name__ == "__main__":
+    main()
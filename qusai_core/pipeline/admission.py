@@ -0,0 +1,136 @@
+import heapq
+import itertools
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Lower value = served first
+PRIORITY_CLASSES = {
+    "interactive": 0,
+    "batch": 1,
+}
+
+class AdmissionRejected(Exception):
+    """Raised when a request is shed instead of queued (maps to HTTP 429)."""
+
+    def __init__(self, reason: str, retry_after: float = 1.0):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Bounded admission queue in front of the model backend.
+    Limits concurrent generations, bounds the number of waiting requests,
+    and sheds requests early when their expected wait exceeds the deadline.
+    """
+
+    def __init__(self,
+                 max_concurrency: int = 4,
+                 max_queue_depth: int = 32,
+                 default_timeout: float = 30.0,
+                 priority_classes: Optional[Dict[str, int]] = None):
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue_depth = max(0, max_queue_depth)
+        self.default_timeout = default_timeout
+        self.priority_classes = priority_classes or PRIORITY_CLASSES
+
+        self._cond = threading.Condition()
+        self._waiters = []  # heap of (priority, seq)
+        self._seq = itertools.count()
+        self._in_flight = 0
+
+        # Metrics
+        self._service_time_ema: Optional[float] = None
+        self._wait_times = deque(maxlen=1000)
+        self._counters = {"admitted": 0, "rejected_full": 0, "rejected_deadline": 0, "timed_out": 0}
+
+    def _estimated_wait(self, position: int) -> float:
+        """Rough wait estimate: batches of max_concurrency ahead of us, each taking one service time."""
+        if self._service_time_ema is None:
+            return 0.0
+        return ((position // self.max_concurrency) + 1) * self._service_time_ema
+
+    def _record_service_time(self, seconds: float):
+        if self._service_time_ema is None:
+            self._service_time_ema = seconds
+        else:
+            self._service_time_ema = 0.8 * self._service_time_ema + 0.2 * seconds
+
+    @contextmanager
+    def admit(self, priority: str = "interactive", timeout: Optional[float] = None):
+        """
+        Context manager guarding one unit of work.
+        Raises AdmissionRejected if the request is shed.
+        """
+        timeout = self.default_timeout if timeout is None else timeout
+        prio = self.priority_classes.get(priority, max(self.priority_classes.values()))
+        enqueued_at = time.monotonic()
+        deadline = enqueued_at + timeout
+
+        with self._cond:
+            if self._in_flight >= self.max_concurrency or self._waiters:
+                if len(self._waiters) >= self.max_queue_depth:
+                    self._counters["rejected_full"] += 1
+                    raise AdmissionRejected("Queue full", retry_after=self._service_time_ema or 1.0)
+
+                ahead = sum(1 for p, _ in self._waiters if p <= prio)
+                expected = self._estimated_wait(ahead) if self._in_flight >= self.max_concurrency else 0.0
+                if expected > timeout:
+                    self._counters["rejected_deadline"] += 1
+                    raise AdmissionRejected(
+                        f"Expected wait {expected:.1f}s exceeds deadline {timeout:.1f}s",
+                        retry_after=expected
+                    )
+
+            ticket = (prio, next(self._seq))
+            heapq.heappush(self._waiters, ticket)
+            try:
+                while self._waiters[0] != ticket or self._in_flight >= self.max_concurrency:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._counters["timed_out"] += 1
+                        raise AdmissionRejected("Timed out waiting in queue", retry_after=self._service_time_ema or 1.0)
+                    self._cond.wait(remaining)
+            except AdmissionRejected:
+                self._waiters.remove(ticket)
+                heapq.heapify(self._waiters)
+                self._cond.notify_all()
+                raise
+
+            heapq.heappop(self._waiters)
+            self._in_flight += 1
+            self._counters["admitted"] += 1
+            waited = time.monotonic() - enqueued_at
+            self._wait_times.append(waited)
+            # Let the next head of queue re-check (there may be more free slots)
+            self._cond.notify_all()
+
+        started_at = time.monotonic()
+        try:
+            yield waited
+        finally:
+            with self._cond:
+                self._in_flight -= 1
+                self._record_service_time(time.monotonic() - started_at)
+                self._cond.notify_all()
+
+    def get_stats(self) -> Dict:
+        with self._cond:
+            waits = sorted(self._wait_times)
+            return {
+                "in_flight": self._in_flight,
+                "queue_depth": len(self._waiters),
+                "max_concurrency": self.max_concurrency,
+                "max_queue_depth": self.max_queue_depth,
+                "wait_p50_ms": round(waits[len(waits) // 2] * 1000, 1) if waits else 0.0,
+                "wait_p95_ms": round(waits[int(len(waits) * 0.95)] * 1000, 1) if waits else 0.0,
+                "service_time_ms": round((self._service_time_ema or 0.0) * 1000, 1),
+                **self._counters,
+            }
@@ -0,0 +1,131 @@
+import gzip
+import json
+import logging
+import os
+import queue
+import socket
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List
+
+logger = logging.getLogger(__name__)
+
+AUDIT_PREFIX = "audit-"
+AUDIT_SUFFIX = ".jsonl.gz"
+
+class AuditLog:
+    """
+    Asynchronous audit trail of Mizan decisions.
+
+    `record()` only enqueues: a background writer drains the queue in batches and appends
+    each batch as one gzip member to the current JSONL file (concatenated members read as
+    one stream with `gzip.open` / `zcat`). Files rotate at `max_bytes` and only the newest
+    `backup_count` are kept. When the queue is full, events are dropped and counted.
+
+    File names carry the host and pid, and a writer only ever prunes its own files, so
+    several workers can share one directory. Files left by exited workers are never pruned.
+    """
+
+    def __init__(self,
+                 output_dir: Path,
+                 max_queue: int = 10000,
+                 batch_size: int = 256,
+                 flush_interval: float = 1.0,
+                 max_bytes: int = 64 * 1024 * 1024,
+                 backup_count: int = 20):
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.backup_count = max(1, backup_count)
+
+        self._queue: "queue.Queue[Dict]" = queue.Queue(maxsize=max(1, max_queue))
+        self._lock = threading.Lock()
+        self._counters = {"recorded": 0, "written": 0, "dropped": 0, "batches": 0, "write_errors": 0, "rotations": 0}
+        self._file_seq = 0
+        self._prefix = f"{AUDIT_PREFIX}{socket.gethostname()}-{os.getpid()}-"
+        self._path = None
+        self._closed = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+        self._thread.start()
+
+    def record(self, event: Dict):
+        """Queues one event without blocking; drops it if the queue is full."""
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            with self._lock:
+                self._counters["dropped"] += 1
+            return
+        with self._lock:
+            self._counters["recorded"] += 1
+
+    def close(self, timeout: float = 5.0):
+        """Stops the writer after flushing what is already queued."""
+        self._closed.set()
+        self._thread.join(timeout)
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch:
+                self._write(batch)
+            elif self._closed.is_set():
+                return
+
+    def _next_batch(self) -> List[Dict]:
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=min(remaining, 0.1)))
+            except queue.Empty:
+                if self._closed.is_set():
+                    break
+        return batch
+
+    def _current_path(self) -> Path:
+        if self._path is None or (self._path.exists() and self._path.stat().st_size >= self.max_bytes):
+            if self._path is not None:
+                with self._lock:
+                    self._counters["rotations"] += 1
+            self._file_seq += 1
+            self._path = self.output_dir / (
+                f"{self._prefix}{time.strftime('%Y%m%d-%H%M%S')}-{self._file_seq:04d}{AUDIT_SUFFIX}")
+            self._prune()
+        return self._path
+
+    def _prune(self):
+        # Own files only; timestamp + sequence number keep name order equal to creation order
+        files = sorted(self.output_dir.glob(f"{self._prefix}*{AUDIT_SUFFIX}"),
+                       key=lambda p: p.name[len(self._prefix):])
+        # The new file does not exist yet, so keep one slot free for it
+        for old in files[:max(0, len(files) - self.backup_count + 1)]:
+            try:
+                old.unlink()
+            except OSError as e:
+                logger.error(f"Failed to remove old audit file {old}: {e}")
+
+    def _write(self, batch: List[Dict]):
+        lines = "".join(json.dumps(event, ensure_ascii=False, default=str) + "\n" for event in batch)
+        try:
+            with gzip.open(self._current_path(), "ab") as f:
+                f.write(lines.encode("utf-8"))
+        except Exception as e:
+            logger.error(f"Failed to write {len(batch)} audit events: {e}")
+            with self._lock:
+                self._counters["write_errors"] += 1
+                self._counters["dropped"] += len(batch)
+            return
+        with self._lock:
+            self._counters["written"] += len(batch)
+            self._counters["batches"] += 1
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {**self._counters, "queued": self._queue.qsize(), "file": str(self._path) if self._path else None}
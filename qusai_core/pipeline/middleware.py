@@ -1,10 +1,26 @@
+import hashlib
 import logging
+import time
+import uuid
+from contextlib import nullcontext
 from qusai_core.ontology.engine import OntologyEngine
+from qusai_core.ontology.registry import default_registry
 from qusai_core.alignment.mizan import MizanValidator
-from qusai_core.llm.loader import TransformersModel, HFInferenceModel
+from qusai_core.llm.loader import create_model, DEFAULT_STOP_SEQUENCES, DEFAULT_TEMPERATURE, DEFAULT_TOP_P
+from qusai_core.pipeline.sessions import SessionStore
+from qusai_core.pipeline.router import ModelRouter, FAILURE_PREFIXES
+from qusai_core.pipeline.coalesce import SingleFlight, coalesce_key, normalize_query
+from qusai_core.pipeline.profiling import RequestProfiler
+from qusai_core.pipeline.audit import AuditLog
+from qusai_core.utils.memory import process_rss, traced_memory
 
 logger = logging.getLogger(__name__)
 
+MAX_TEMPERATURE = 2.0
+MAX_STOP_SEQUENCES = 4
+MAX_STOP_LENGTH = 32
+MEMORY_TRIM_COOLDOWN = 30.0  # seconds; freed memory is not always returned to the OS at once
+
 class QusaiMiddleware:
     """
     Main entry point for the QUS-AI framework.
@@ -14,18 +30,65 @@ class QusaiMiddleware:
     def __init__(self,
                  repo_id: str = "Qwen/Qwen2.5-7B-Instruct",
                  api_token: str = None,
-                 lazy_load: bool = False):
+                 lazy_load: bool = False,
+                 backend: str = None,
+                 model_kwargs: dict = None,
+                 ontology_kwargs: dict = None,
+                 session_store: SessionStore = None,
+                 history_token_budget: int = 6000,
+                 max_new_tokens: int = 1024,
+                 router: ModelRouter = None,
+                 draft_repo_id: str = None,
+                 coalesce: bool = True,
+                 coalesce_timeout: float = 120.0,
+                 profiler: RequestProfiler = None,
+                 audit: AuditLog = None,
+                 memory_budget_bytes: int = None,
+                 shared_ontology: bool = True):
 
-        self.ontology = OntologyEngine()
+        # Middleware instances with the same ontology settings share one loaded engine
+        self._ontology_registry = default_registry if shared_ontology else None
+        if self._ontology_registry is not None:
+            self.ontology = self._ontology_registry.acquire(**(ontology_kwargs or {}))
+        else:
+            self.ontology = OntologyEngine(**(ontology_kwargs or {}))
         self.validator = MizanValidator()
+        self.sessions = session_store or SessionStore()
+        self.history_token_budget = history_token_budget
+        self.max_new_tokens = max_new_tokens
+        # Identical concurrent stateless queries share one generation
+        self.coalescer = SingleFlight() if coalesce else None
+        # Followers give up (TimeoutError) if the shared generation takes longer than this
+        self.coalesce_timeout = coalesce_timeout
+        # Opt-in per-request profiling (header/sampling driven, capped share of traffic)
+        self.profiler = profiler
+        # Optional audit trail: one structured event per query, written off the request path
+        self.audit = audit
+        # Process RSS above this trims caches and idle sessions' model state
+        self.memory_budget_bytes = memory_budget_bytes
+        self._last_memory_trim = 0.0
+        self.memory_trims = 0
 
-        # Choose model type based on whether API token is provided
-        if api_token:
-            logger.info("Using HuggingFace Inference API mode")
-            self.model = HFInferenceModel(repo_id, api_token)
+        # With a router, backends come from its routes; the largest serves tokenization
+        self.router = router
+        if router is not None:
+            logger.info(f"Using model router: {', '.join(r.name for r in router.routes)}")
+            self.model = router.largest
+        # Choose model backend: explicit name, else based on whether API token is provided
         else:
-            logger.info("Using local Transformers GPU mode")
-            self.model = TransformersModel(repo_id)
+            if backend is None:
+                backend = "hf_api" if api_token else "transformers"
+            if draft_repo_id and backend != "hf_api":
+                # Assisted (speculative) decoding with a small model from the same family
+                model_kwargs = {**(model_kwargs or {}), "draft_repo_id": draft_repo_id}
+            elif draft_repo_id:
+                logger.warning("Draft models need a local transformers backend; ignoring draft_repo_id")
+            if backend == "hf_api":
+                logger.info("Using HuggingFace Inference API mode")
+                self.model = create_model(backend, repo_id, api_token=api_token, **(model_kwargs or {}))
+            else:
+                logger.info(f"Using local {backend} mode")
+                self.model = create_model(backend, repo_id, **(model_kwargs or {}))
 
         if not lazy_load:
             self.initialize()
@@ -34,48 +97,275 @@ class QusaiMiddleware:
         """Loads heavy resources."""
         logger.info("Initializing QUSAI Middleware...")
         self.ontology.load()
-        self.model.load()
+        if self.router is not None:
+            self.router.load()
+        else:
+            self.model.load()
         logger.info("Initialization complete.")
 
-    def process_query(self, user_input: str) -> str:
+    def close(self):
+        """Releases this instance's hold on the shared ontology engine."""
+        if self._ontology_registry is not None:
+            self._ontology_registry.release(self.ontology)
+            self._ontology_registry = None
+        else:
+            self.ontology.close()
+
+    def process_query(self, user_input: str, session_id: str = None, history=None, profile: bool = False,
+                      generation: dict = None, usage: dict = None) -> str:
+        """
+        Runs one query through the pipeline.
+        With a session_id, the conversation history is kept server-side (seeded from
+        `history` when the session is new) and sent as a sliding window.
+        `profile` asks the profiler (if configured) to profile this call.
+        `generation` overrides max_new_tokens / temperature / top_p / stop within the server
+        caps; `usage`, if given, is filled with the generation's token counts.
+        """
+        params = self.generation_params(generation)
+        event = None
+        if self.audit is not None:
+            event = {"id": uuid.uuid4().hex, "time": time.time(), "session_id": session_id,
+                     "query": user_input, "generation": params, "stages": {}, "timings": {}}
+        start = time.perf_counter()
+        try:
+            if self.profiler is None:
+                return self._process_query(user_input, session_id, history, params, usage, event)
+            with self.profiler.profile("process_query", force=profile):
+                return self._process_query(user_input, session_id, history, params, usage, event)
+        except Exception as e:
+            if event is not None:
+                event.update(outcome="error", error=str(e))
+            raise
+        finally:
+            if event is not None:
+                event["timings"]["total"] = round(time.perf_counter() - start, 4)
+                self.audit.record(event)
+            if self.memory_budget_bytes is not None:
+                self._check_memory_budget()
+
+    def _check_memory_budget(self):
+        rss = process_rss()
+        now = time.monotonic()
+        if rss is None or rss <= self.memory_budget_bytes or now - self._last_memory_trim < MEMORY_TRIM_COOLDOWN:
+            return
+        self._last_memory_trim = now
+        self.memory_trims += 1
+        freed = self.ontology.trim_caches(0)
+        released = self.sessions.release_model_states()
+        logger.warning(f"[MEMORY] RSS {rss / 2**20:.0f} MiB over budget {self.memory_budget_bytes / 2**20:.0f} MiB: "
+                       f"freed {freed / 2**20:.1f} MiB of caches, released {released} session model states")
+
+    def memory_usage(self) -> dict:
+        """Approximate memory per component (ontology, sessions, models) plus process totals."""
+        models = {r.name: r.model for r in self.router.routes} if self.router is not None else {"default": self.model}
+        return {
+            "process": {"rss": process_rss(), "tracemalloc": traced_memory(),
+                        "budget": self.memory_budget_bytes, "trims": self.memory_trims},
+            "ontology": self.ontology.memory_usage(),
+            "sessions": self.sessions.memory_usage(),
+            "models": {name: model.memory_usage() for name, model in models.items()},
+        }
+
+    def generation_params(self, generation: dict = None) -> dict:
+        """Per-request generation settings, clamped to the server limits."""
+        generation = generation or {}
+        max_new_tokens = generation.get("max_new_tokens") or self.max_new_tokens
+        temperature = generation.get("temperature")
+        top_p = generation.get("top_p")
+        extra_stop = [seq for seq in (generation.get("stop") or []) if isinstance(seq, str) and seq]
+        return {
+            "max_new_tokens": max(1, min(int(max_new_tokens), self.max_new_tokens)),
+            "temperature": DEFAULT_TEMPERATURE if temperature is None else max(0.0, min(float(temperature), MAX_TEMPERATURE)),
+            "top_p": DEFAULT_TOP_P if top_p is None else max(0.01, min(float(top_p), 1.0)),
+            "stop": list(DEFAULT_STOP_SEQUENCES) + [seq[:MAX_STOP_LENGTH] for seq in extra_stop[:MAX_STOP_SEQUENCES]],
+        }
+
+    def _process_query(self, user_input: str, session_id: str = None, history=None,
+                       params: dict = None, usage: dict = None, event: dict = None) -> str:
+        params = params or self.generation_params()
+        # Audit event is filled in place (a throwaway dict when auditing is off)
+        event = event if event is not None else {"stages": {}, "timings": {}}
+        stages, timings = event["stages"], event["timings"]
+        mark = time.perf_counter()
+
+        def lap(stage):
+            nonlocal mark
+            now = time.perf_counter()
+            timings[stage] = round(now - mark, 4)
+            mark = now
+
         # 1. Fajr (Intent Check)
-        if not self.validator.fajr_check(user_input):
+        stages["fajr"] = self.validator.fajr_check(user_input)
+        lap("fajr")
+        if not stages["fajr"]:
+            event["outcome"] = "blocked_fajr"
             return f"❌ SAWM RESTRAINT: Request blocked (Malicious Intent)\n\n{self.validator.maghrib_seal('')}"
 
         # 2. Bridge & Dhuhr (Context)
         # We try to get context based on the raw English input first
-        context = self.ontology.get_context(user_input)
+        context, pairs = self.ontology.get_context_and_roots(user_input)
         
         # Log Bridge
-        keywords = [w.lower() for w in user_input.split() if len(w) > 3]
-        mapped = [f"{k}->{self.ontology.concept_map[k]}" for k in keywords if k in self.ontology.concept_map]
+        mapped = [f"{term}->{root}" for term, root in pairs]
         if mapped:
             logger.info(f"[BRIDGE] Translated concepts: {', '.join(mapped)}")
+        stages["bridge"] = {"terms": [term for term, _ in pairs], "roots": sorted({root for _, root in pairs})}
+        event.update(ontology_version=self.ontology.version,
+                     context_hash=hashlib.sha256(context.encode("utf-8")).hexdigest())
+        lap("context")
+        features = self.router.features(user_input, context, len(mapped)) if self.router else None
 
-        # 3. System Prompt (The "Mizan")
-        # We instruct the model to perform the "Decryption" and "Weighing" explicitly.
-        system_prompt = self.validator.dhuhr_prompt(context)
-        
-        # 4. Construct Full Prompt with Chain-of-Thought trigger
-        # We ask for a "Reasoning Block" to be generated before the final answer if possible, 
-        # or we rely on the strong instructions in dhuhr_prompt.
-        # Qwen/Llama follow instructions well.
-        full_prompt = (
-            f"<|im_start|>system\n{system_prompt}\n"
-            f"TASK: 1. Identify key terms. 2. Map to Arabic Roots. 3. Weigh Ontologically. 4. Answer.\n<|im_end|>\n"
-            f"<|im_start|>user\n{user_input}<|im_end|>\n"
-            f"<|im_start|>assistant\n"
-        )
+        session, created = self.sessions.get_or_create(session_id) if session_id is not None else (None, False)
+        # One lock scope per conversation turn: prompt build, generation and session save
+        with session.lock if session is not None else nullcontext():
+            if session is None:
+                # 3. System Prompt (The "Mizan")
+                # We instruct the model to perform the "Decryption" and "Weighing" explicitly.
+                system_prompt = self.validator.dhuhr_prompt(context)
+
+                # 4. Construct Full Prompt with Chain-of-Thought trigger
+                # We ask for a "Reasoning Block" to be generated before the final answer if possible,
+                # or we rely on the strong instructions in dhuhr_prompt.
+                # Qwen/Llama follow instructions well.
+                full_prompt = (
+                    self._system_block(system_prompt) +
+                    f"<|im_start|>user\n{user_input}<|im_end|>\n"
+                    f"<|im_start|>assistant\n"
+                )
+
+                # 5. Generate
+                # We increase max_new_tokens slightly to allow for the reasoning process
+                if self.coalescer is not None:
+                    key = coalesce_key(normalize_query(user_input), context, sorted(params.items()))
+                    raw_response, generated = self.coalescer.do(key, lambda: self._generate(full_prompt, params, features),
+                                                               timeout=self.coalesce_timeout)
+                else:
+                    raw_response, generated = self._generate(full_prompt, params, features)
+            else:
+                # 3-5. Conversation turn: stable prefix (system + history) so the backend can reuse its cache
+                self._sync_session(session, created, history)
+                full_prompt = self._session_prompt(session, user_input, context)
+                raw_response, generated = self._generate(full_prompt, params, features, session.model_state)
 
-        # 5. Generate
-        # We increase max_new_tokens slightly to allow for the reasoning process
-        raw_response = self.model.generate(full_prompt, max_new_tokens=1024)
+            lap("generate")
+            event["usage"] = generated
+            if usage is not None:
+                usage.update(generated)
 
-        # 6. Asr (Aseity Check)
-        if not self.validator.asr_check(raw_response):
-             return f"❌ HAJJ RETURN PROTOCOL: Aseity claim detected\n\n{self.validator.maghrib_seal('')}"
+            if session is not None and (not raw_response or raw_response.startswith(FAILURE_PREFIXES)):
+                # Backend failure: keep neither the error text nor the user turn that led to it
+                session.turns.pop()
+                event["outcome"] = "generation_failed"
+                return self.validator.maghrib_seal(raw_response)
+
+            # 6. Asr (Aseity Check)
+            stages["asr"] = self.validator.asr_check(raw_response)
+            if not stages["asr"]:
+                if session is not None:
+                    session.turns.pop()  # drop the user turn (and the context it carried)
+                event.update(outcome="rejected_asr", raw_response=raw_response)
+                return f"❌ HAJJ RETURN PROTOCOL: Aseity claim detected\n\n{self.validator.maghrib_seal('')}"
+
+            if session is not None:
+                session.add_turn("assistant", raw_response, self.model.count_tokens(raw_response))
+                self.sessions.save(session)
 
         # 7. Maghrib (Seal)
         final_response = self.validator.maghrib_seal(raw_response)
-        
+        event.update(outcome="ok", response=final_response)
+
         return final_response
+
+    def _generate(self, prompt: str, params: dict, features=None, state=None):
+        """
+        Generates with the single backend, or through the router (with Asr-driven fallback).
+        Returns (text, usage); coalesced callers share both.
+        """
+        usage = {}
+
+        def call(model, model_state):
+            usage.clear()
+            # An aseity claim fails Asr anyway: stop decoding as soon as one appears
+            kwargs = dict(params, usage=usage, stopping_criteria=lambda text: not self.validator.asr_check(text))
+            if model_state is None:
+                return model.generate(prompt, **kwargs)
+            return model.generate_incremental(prompt, model_state, **kwargs)
+
+        if self.router is None:
+            return call(self.model, state), usage
+        text, _ = self.router.run(
+            features,
+            lambda route: call(route.model, None if state is None else state.setdefault(route.name, {})),
+            accept=self.validator.asr_check
+        )
+        return text, usage
+
+    def _system_block(self, system_prompt: str) -> str:
+        return (
+            f"<|im_start|>system\n{system_prompt}\n"
+            f"TASK: 1. Identify key terms. 2. Map to Arabic Roots. 3. Weigh Ontologically. 4. Answer.\n<|im_end|>\n"
+        )
+
+    @staticmethod
+    def _history_turns(history):
+        """(role, content) pairs from client-side history (Gradio messages or [user, bot] pairs)."""
+        turns = []
+        for item in history or []:
+            if isinstance(item, dict):
+                pairs = [(item.get("role"), item.get("content"))]
+            else:
+                pairs = [("user", item[0]), ("assistant", item[1])]
+            turns.extend((role, content) for role, content in pairs
+                         if role in ("user", "assistant") and isinstance(content, str) and content)
+        return turns
+
+    def _sync_session(self, session, created: bool, history):
+        """
+        Seeds a new session from client-side history. If the client's history is shorter
+        than the server's (cleared, retried or undone), the session restarts from it.
+        """
+        if history is None:
+            return
+        turns = self._history_turns(history)
+        if not created:
+            if len(turns) >= len(session.turns):
+                return
+            logger.info(f"Session {session.session_id}: client history rewound "
+                        f"({len(turns)} < {len(session.turns)} turns), resetting")
+            session.reset()
+        for role, content in turns:
+            session.add_turn(role, content, self.model.count_tokens(content))
+
+    def _session_prompt(self, session, user_input: str, context: str) -> str:
+        """
+        Builds the prompt for the next turn and records the user turn.
+        The system prompt is fixed at the first turn; ontology context found by later
+        turns rides inside the user turn that needed it, and is sent again whenever the
+        turn that carried it is no longer in the window (or was rolled back).
+        """
+        lines = [line for line in context.splitlines() if line]
+        if session.system_prompt is None:
+            session.system_prompt = self.validator.dhuhr_prompt(context)
+            session.system_context = lines
+            lines = []
+
+        # The new turn's size decides which older turns stay in the window, and the window
+        # decides which lines are already visible: shrink the visible set until it is stable
+        visible = session.visible_context(session.window(self.history_token_budget))
+        while True:
+            fresh = [line for line in lines if line not in visible]
+            user_content = user_input
+            if fresh:
+                user_content = "[Additional Ontological Context]\n" + "\n".join(fresh) + f"\n\n{user_input}"
+            session.add_turn("user", user_content, self.model.count_tokens(user_content), context=fresh)
+            window = session.window(self.history_token_budget)
+            still_visible = session.visible_context(window[:-1])
+            if all(line in still_visible for line in lines if line not in fresh):
+                break
+            session.turns.pop()
+            visible = still_visible
+
+        prompt = self._system_block(session.system_prompt)
+        for turn in window:
+            prompt += f"<|im_start|>{turn['role']}\n{turn['content']}<|im_end|>\n"
+        return prompt + "<|im_start|>assistant\n"
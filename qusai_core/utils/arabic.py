@@ -0,0 +1,208 @@
+import re
+from itertools import islice
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# --- Normalization ---
+
+# Tashkeel (fathatan..sukun), superscript alef, Quranic annotation marks, tatweel
+DIACRITICS = re.compile("[\u0610-\u061a\u064b-\u065f\u0670\u06d6-\u06ed\u0640]")
+ARABIC_SCRIPT = re.compile("[\u0600-\u06ff]")
+ARABIC_WORD = re.compile("[\u0621-\u064a\u0671]+")
+
+# Alef/hamza-seat variants -> bare alef, alef maqsura -> ya, ta marbuta -> ha
+NORMALIZATION_TABLE = str.maketrans({
+    "أ": "ا", "إ": "ا", "آ": "ا", "ٱ": "ا",
+    "ى": "ي",
+    "ة": "ه",
+})
+
+# Buckwalter transliteration, precompiled for str.translate
+BUCKWALTER_TABLE = str.maketrans({
+    "ء": "'", "أ": ">", "إ": "<", "آ": "|", "ؤ": "&", "ئ": "}", "ا": "A", "ٱ": "{",
+    "ب": "b", "ة": "p", "ت": "t", "ث": "v", "ج": "j", "ح": "H", "خ": "x",
+    "د": "d", "ذ": "*", "ر": "r", "ز": "z", "س": "s", "ش": "$", "ص": "S",
+    "ض": "D", "ط": "T", "ظ": "Z", "ع": "E", "غ": "g", "ف": "f", "ق": "q",
+    "ك": "k", "ل": "l", "م": "m", "ن": "n", "ه": "h", "و": "w", "ى": "Y", "ي": "y",
+})
+
+# Particles, pronouns and relatives that never carry a content root (normalized spelling)
+STOP_WORDS = {word.translate(NORMALIZATION_TABLE) for word in (
+    "من", "في", "على", "الى", "عن", "ما", "لا", "لم", "لن", "ان", "إن", "أن", "إنما", "انما", "هل", "او", "ثم",
+    "هو", "هي", "هم", "هن", "انا", "انت", "انتم", "نحن", "هذا", "هذه", "ذلك", "تلك", "اولئك", "هؤلاء",
+    "التي", "الذي", "الذين", "اللاتي", "كل", "قد", "مع", "بين", "عند", "اذا", "إذ", "لو", "لولا", "حتى",
+    "الا", "إلا", "بل", "لكن", "ليس", "كما", "كيف", "يا", "اي", "بما", "لما", "لمن", "بمن", "مما", "عما", "ممن", "فيما",
+)}
+
+# Particles that take attached pronouns (انك, عليهم, فيه, له ...)
+SUFFIXED_PARTICLES = {word.translate(NORMALIZATION_TABLE) for word in (
+    "من", "في", "على", "الى", "عن", "ان", "لكن", "مع", "عند", "ل", "ب")}
+PRONOUN_SUFFIXES = ("هما", "كما", "هم", "هن", "كم", "كن", "نا", "ها", "ه", "ك", "ي")
+# Conjunctions attach to anything; prepositions/ka only when a word of 3+ letters remains
+CONJUNCTIONS = "وف"
+PREPOSITIONS = "بكل"
+
+# Buckwalter clitics stripped before root matching (longest first)
+PREFIXES = ("wAl", "fAl", "bAl", "kAl", "ll", "Al", "w", "f", "b", "k", "l", "s")
+SUFFIXES = ("hmA", "kmA", "hm", "hn", "km", "kn", "nA", "hA", "wn", "yn", "An", "At", "h", "k", "y")
+
+# Letters that are often pattern/affix material rather than radicals: cheap to skip
+WEAK_LETTERS = set("AwyYtmn")
+
+# Weak radicals surface as one another in hollow/defective forms (qwl -> qAl, rmy -> rmY)
+WEAK_RADICALS = set("AwyY")
+
+# Hamza and its seats all fold to one radical when matching (>mn, m&mn, |mn -> Amn)
+HAMZA_FOLD = str.maketrans("'><|&}{", "AAAAAAA")
+
+# Stems shorter than this must spell the root exactly (a geminate written once is fine):
+# two letters leave no room for pattern letters
+MIN_STEM_LENGTH = 3
+# Match quality = 1 - cost / stem length; below this the root explains too little of the stem
+MIN_MATCH_QUALITY = 0.8
+
+def normalize_arabic(text: str) -> str:
+    """Strips diacritics/tatweel and unifies alef, ya and ta-marbuta variants."""
+    return DIACRITICS.sub("", text).translate(NORMALIZATION_TABLE)
+
+def is_particle(word: str) -> bool:
+    """True for a normalized word that is a stop word, optionally with a proclitic or attached pronoun."""
+    bases = {word}
+    if len(word) > 2 and (word[0] in CONJUNCTIONS or (word[0] in PREPOSITIONS and len(word) > 3)):
+        bases.add(word[1:])
+    for base in list(bases):
+        if base in STOP_WORDS:
+            return True
+        for suffix in PRONOUN_SUFFIXES:
+            if base.endswith(suffix) and base[:-len(suffix)] in SUFFIXED_PARTICLES:
+                return True
+    return False
+
+def to_buckwalter(text: str) -> str:
+    return text.translate(BUCKWALTER_TABLE)
+
+def has_arabic(text: str) -> bool:
+    return bool(ARABIC_SCRIPT.search(text))
+
+def looks_like_buckwalter_root(token: str) -> bool:
+    """Buckwalter roots carry no short-vowel letters (a/i/u/o/e are diacritics in Buckwalter)."""
+    return 2 <= len(token) <= 5 and not re.search(r"[aiueo~FNK]", token)
+
+# --- Root Trie ---
+
+class _Node:
+    __slots__ = ("children", "root")
+
+    def __init__(self):
+        self.children: Dict[str, "_Node"] = {}
+        self.root: Optional[str] = None
+
+
+class RootTrie:
+    """
+    Trie over the ontology's Buckwalter roots.
+    Matches a word stem to the roots whose radicals appear in it in order,
+    allowing skipped (affix/pattern) letters and geminate radicals written once.
+    """
+
+    def __init__(self, roots: Iterable[str] = ()):
+        self._root = _Node()
+        self.roots = set()
+        for root in roots:
+            self.add(root)
+
+    def add(self, root: str):
+        node = self._root
+        for ch in root.translate(HAMZA_FOLD):
+            node = node.children.setdefault(ch, _Node())
+        node.root = root
+        self.roots.add(root)
+
+    def __contains__(self, root: str) -> bool:
+        return root in self.roots
+
+    def __len__(self) -> int:
+        return len(self.roots)
+
+    def _skip_cost(self, letters: str) -> float:
+        return sum(0.3 if ch in WEAK_LETTERS else 1.0 for ch in letters)
+
+    def match(self, stem: str, max_cost: float = 1.0) -> List[Tuple[float, str]]:
+        """Returns (cost, root) candidates for a stem, best first."""
+        results: Dict[str, float] = {}
+        stem = stem.translate(HAMZA_FOLD)
+
+        def walk(node: _Node, pos: int, cost: float, last: str):
+            if cost > max_cost:
+                return
+            if node.root is not None and len(node.root) >= 2:
+                total = cost + self._skip_cost(stem[pos:])
+                if total <= max_cost and total < results.get(node.root, float("inf")):
+                    results[node.root] = total
+            for ch, child in node.children.items():
+                # Geminate radical written once (e.g. jnn in "jn")
+                if ch == last:
+                    walk(child, pos, cost, ch)
+                for nxt in range(pos, len(stem)):
+                    if stem[nxt] == ch:
+                        substitution = 0.0
+                    elif ch in WEAK_RADICALS and stem[nxt] in WEAK_RADICALS:
+                        substitution = 0.3
+                    else:
+                        continue
+                    walk(child, nxt + 1, cost + substitution + self._skip_cost(stem[pos:nxt]), ch)
+
+        walk(self._root, 0, 0.0, "")
+        return sorted(((c, r) for r, c in results.items()), key=lambda x: (x[0], -len(x[1])))
+
+    def stems(self, word: str) -> List[str]:
+        """The word itself plus versions with one prefix and/or one suffix clitic removed."""
+        variants = {word}
+        for prefix in PREFIXES:
+            if word.startswith(prefix) and len(word) - len(prefix) >= 2:
+                variants.add(word[len(prefix):])
+                break
+        for base in list(variants):
+            for suffix in SUFFIXES:
+                if base.endswith(suffix) and len(base) - len(suffix) >= 2:
+                    variants.add(base[:-len(suffix)])
+                    break
+        return list(variants)
+
+    def best_root(self, word: str) -> Optional[str]:
+        """
+        The root best explaining a Buckwalter word, or None. Candidates must reach
+        MIN_MATCH_QUALITY, and stems shorter than MIN_STEM_LENGTH only match exactly.
+        """
+        candidates = []
+        for stem in self.stems(word):
+            if stem in self.roots:
+                return stem
+            max_cost = 1.0 if len(stem) >= MIN_STEM_LENGTH else 0.0
+            candidates.extend((cost, root) for cost, root in self.match(stem, max_cost)
+                              if 1.0 - cost / len(stem) >= MIN_MATCH_QUALITY)
+        if not candidates:
+            return None
+        return min(candidates, key=lambda x: (x[0], -len(x[1])))[1]
+
+    def roots_for_query(self, query: str, limit: int = 5, max_words: int = 8) -> List[Tuple[str, str]]:
+        """
+        Maps Arabic-script words and Buckwalter root tokens in a query to ontology roots.
+        Only the first `max_words` Arabic content words are matched, so long inputs stay cheap.
+        Returns (term, root) pairs.
+        """
+        pairs: List[Tuple[str, str]] = []
+        if has_arabic(query):
+            words = (w for w in ARABIC_WORD.findall(normalize_arabic(query)) if len(w) >= 2 and not is_particle(w))
+            for word in islice(words, max_words):
+                root = self.best_root(to_buckwalter(word))
+                if root is not None:
+                    pairs.append((word, root))
+                if len(pairs) >= limit:
+                    return pairs
+        for token in query.split():
+            token = token.strip(".,;:!?()\"'")
+            if token in self.roots and looks_like_buckwalter_root(token):
+                pairs.append((token, token))
+                if len(pairs) >= limit:
+                    break
+        return pairs
@@ -0,0 +1,31 @@
+from qusai_core.pipeline.admission import AdmissionController, AdmissionRejected
+import threading
+import time
+
+def test_admission_sheds_when_queue_full():
+    controller = AdmissionController(max_concurrency=1, max_queue_depth=1, default_timeout=2.0)
+    results = []
+
+    def worker():
+        try:
+            with controller.admit():
+                time.sleep(0.2)
+                results.append("ok")
+        except AdmissionRejected as e:
+            results.append(e.reason)
+
+    threads = [threading.Thread(target=worker) for _ in range(3)]
+    for t in threads:
+        t.start()
+        time.sleep(0.02)
+    for t in threads:
+        t.join()
+
+    stats = controller.get_stats()
+    print(results, stats)
+    assert results.count("ok") == 2
+    assert stats["rejected_full"] == 1
+    assert stats["in_flight"] == 0 and stats["queue_depth"] == 0
+
+if __name__ == "__main__":
+    test_admission_sheds_when_queue_full()
@@ -0,0 +1,87 @@
+from qusai_core.utils.arabic import RootTrie, is_particle, normalize_arabic, to_buckwalter
+from qusai_core.pipeline.middleware import QusaiMiddleware
+from qusai_core.llm.loader import ModelInterface
+from pathlib import Path
+import tempfile
+
+ROOTS = ["ktb", "Elm", "qwl", "rHm", "jnn", "'mn", "slm", "b'*", "''n", "nzl", "hdy", "sbl",
+         "$kr", "kfr", "Ebd", "rbb", "Hmd", "sjd", "*hb", "Hqq", "hlk", "klm"]
+
+KNOWN_ROOTS = {
+    "كتاب": "ktb", "يعلمون": "Elm", "قال": "qwl", "الرحمن": "rHm", "مؤمنون": "'mn", "الجنة": "jnn",
+    "سبيل": "sbl", "هدى": "hdy", "تنزيل": "nzl", "شكرا": "$kr", "الكافرون": "kfr", "عباده": "Ebd",
+    "الحمد": "Hmd", "يسجدون": "sjd", "ذهب": "*hb", "بالحق": "Hqq", "ربك": "rbb", "السلام": "slm",
+    "هلك": "hlk", "كلم": "klm",
+}
+
+# Particles (with clitics / attached pronouns) and words whose true root is not in the trie
+KNOWN_NEGATIVES = ["بالذي", "انك", "عليهم", "وما", "فيه", "الذي", "على", "ولا", "منهم", "ابن"]
+
+def _root(trie: RootTrie, word: str):
+    return trie.best_root(to_buckwalter(normalize_arabic(word)))
+
+def test_known_words_map_to_their_roots():
+    trie = RootTrie(ROOTS)
+    for word, root in KNOWN_ROOTS.items():
+        assert _root(trie, word) == root, word
+        assert trie.roots_for_query(word) == [(normalize_arabic(word), root)], word
+
+def test_particles_and_weak_matches_are_rejected():
+    trie = RootTrie(ROOTS)
+    for word in KNOWN_NEGATIVES:
+        assert trie.roots_for_query(word) == [], word
+    # Loose matches the quality threshold rules out even without the particle list
+    assert trie.best_root("bAl*y") is None
+    assert trie.best_root("Abn") is None
+    # Content words that merely start like a particle are kept
+    assert not is_particle(normalize_arabic("هلك")) and not is_particle(normalize_arabic("كلم"))
+
+def test_short_stems_only_match_exactly():
+    trie = RootTrie(["jnn", "Elm"])
+    assert trie.best_root("jn") == "jnn"  # geminate written once, nothing skipped
+    assert trie.best_root("Em") is None
+
+class CountingTrie(RootTrie):
+    calls = 0
+
+    def best_root(self, stem):
+        self.calls += 1
+        return super().best_root(stem)
+
+def test_long_queries_scan_a_bounded_number_of_words():
+    trie = CountingTrie(ROOTS)
+    query = " ".join(["كتاب"] + ["مستقبلات"] * 200)
+    assert trie.roots_for_query(query) == [("كتاب", "ktb")]
+    assert trie.calls == 8
+
+class EchoModel(ModelInterface):
+    def load(self):
+        pass
+
+    def generate(self, prompt, max_new_tokens=100, **params):
+        return "answer"
+
+def test_middleware_maps_query_roots_once():
+    with tempfile.TemporaryDirectory() as tmp:
+        ttl = Path(tmp) / "ontology.ttl"
+        ttl.write_text("@prefix quran: <http://ontology.quran/> .\n@prefix root: <http://ontology.quran/root/> .\n"
+                       "quran:1_1_1 quran:hasRoot root:jnn .\n", encoding="utf-8")
+        middleware = QusaiMiddleware(lazy_load=True, shared_ontology=False, coalesce=False,
+                                     ontology_kwargs={"ontology_path": ttl})
+        middleware.model = EchoModel()
+        middleware.initialize()
+        engine, calls = middleware.ontology, []
+        map_query_roots = engine.map_query_roots
+        engine.map_query_roots = lambda query: calls.append(query) or map_query_roots(query)
+        for _ in range(2):
+            middleware.process_query("ما هي الجنة")
+        assert calls == ["ما هي الجنة"]
+        assert engine.get_context_and_roots("ما هي الجنة")[1] == [("الجنه", "jnn")]
+
+if __name__ == "__main__":
+    test_known_words_map_to_their_roots()
+    test_particles_and_weak_matches_are_rejected()
+    test_short_stems_only_match_exactly()
+    test_long_queries_scan_a_bounded_number_of_words()
+    test_middleware_maps_query_roots_once()
+    print("✅ Arabic root matching behaves")
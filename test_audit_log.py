@@ -0,0 +1,39 @@
+from qusai_core.pipeline.audit import AuditLog
+import gzip
+import json
+import tempfile
+from pathlib import Path
+
+def test_audit_log_batches_rotates_and_counts_drops():
+    with tempfile.TemporaryDirectory() as tmp:
+        audit = AuditLog(tmp, batch_size=10, flush_interval=0.05, max_bytes=200, backup_count=3)
+        for i in range(50):
+            audit.record({"id": i, "outcome": "ok"})
+        audit.close()
+
+        stats = audit.get_stats()
+        print(stats)
+        assert stats["written"] == stats["recorded"] == 50 and stats["dropped"] == 0
+        files = sorted(Path(tmp).glob("audit-*.jsonl.gz"))
+        assert stats["rotations"] > 0 and len(files) <= 3
+        events = [json.loads(line) for f in files for line in gzip.open(f, "rt", encoding="utf-8")]
+        assert events and all(e["outcome"] == "ok" for e in events)
+
+        # Another worker's files in the same directory are never pruned
+        other = Path(tmp) / "audit-otherhost-1-20260101-000000-0001.jsonl.gz"
+        other.write_bytes(gzip.compress(b"{}\n"))
+        audit = AuditLog(tmp, batch_size=10, flush_interval=0.05, max_bytes=200, backup_count=2)
+        for i in range(50):
+            audit.record({"id": i})
+        audit.close()
+        assert other.exists()
+
+        # Full queue: record() never blocks, the overflow is counted
+        full = AuditLog(tmp, max_queue=1, flush_interval=60)
+        for i in range(5):
+            full.record({"id": i})
+        assert full.get_stats()["dropped"] >= 3
+        full.close()
+
+if __name__ == "__main__":
+    test_audit_log_batches_rotates_and_counts_drops()
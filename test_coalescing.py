@@ -0,0 +1,99 @@
+from qusai_core.pipeline.coalesce import SingleFlight
+import threading
+import time
+
+N = 8
+
+def _wait_for_waiters(flight: SingleFlight, key: str, count: int):
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        with flight._lock:
+            call = flight._calls.get(key)
+            if call is not None and call.waiters >= count:
+                return
+        time.sleep(0.01)
+    raise AssertionError("followers never queued up")
+
+def _run_concurrently(flight: SingleFlight, fn, timeout=None):
+    """Starts one leader, queues N - 1 followers behind it and returns every outcome."""
+    started, release = threading.Event(), threading.Event()
+    outcomes = [None] * N
+
+    def work():
+        started.set()
+        release.wait(5)
+        return fn()
+
+    def call(i):
+        try:
+            outcomes[i] = ("ok", flight.do("k", work, timeout=timeout))
+        except Exception as e:
+            outcomes[i] = ("error", e)
+
+    threads = [threading.Thread(target=call, args=(0,))]
+    threads[0].start()
+    assert started.wait(5)
+    threads += [threading.Thread(target=call, args=(i,)) for i in range(1, N)]
+    for thread in threads[1:]:
+        thread.start()
+    _wait_for_waiters(flight, "k", N - 1)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    return outcomes
+
+def test_concurrent_callers_share_one_generation():
+    flight = SingleFlight()
+    generations = []
+
+    def generate():
+        generations.append(1)
+        return "answer"
+
+    outcomes = _run_concurrently(flight, generate)
+    assert len(generations) == 1
+    assert outcomes == [("ok", "answer")] * N
+    stats = flight.get_stats()
+    assert stats["leaders"] == 1 and stats["generations_saved"] == N - 1 and stats["in_flight"] == 0
+
+def test_leader_error_reaches_every_follower_and_saves_nothing():
+    flight = SingleFlight()
+
+    def generate():
+        raise RuntimeError("backend down")
+
+    outcomes = _run_concurrently(flight, generate)
+    assert all(kind == "error" and str(e) == "backend down" for kind, e in outcomes)
+    stats = flight.get_stats()
+    assert stats["generations_saved"] == 0 and stats["shared_errors"] == N - 1
+
+    # The failed call is gone: the next caller runs the work again
+    assert flight.do("k", lambda: "retry") == "retry"
+
+def test_followers_time_out_without_stopping_the_leader():
+    flight = SingleFlight()
+    release, leader_result = threading.Event(), []
+
+    def slow():
+        release.wait(5)
+        return "late"
+
+    leader = threading.Thread(target=lambda: leader_result.append(flight.do("k", slow)))
+    leader.start()
+    _wait_for_waiters(flight, "k", 0)
+    try:
+        flight.do("k", slow, timeout=0.05)
+        raise AssertionError("follower should have timed out")
+    except TimeoutError:
+        pass
+    release.set()
+    leader.join(5)
+    assert leader_result == ["late"]
+    stats = flight.get_stats()
+    assert stats["follower_timeouts"] == 1 and stats["generations_saved"] == 0
+
+if __name__ == "__main__":
+    test_concurrent_callers_share_one_generation()
+    test_leader_error_reaches_every_follower_and_saves_nothing()
+    test_followers_time_out_without_stopping_the_leader()
+    print("✅ Coalescing shares one generation and propagates errors")
@@ -0,0 +1,55 @@
+from qusai_core.llm.loader import HFInferenceModel
+from qusai_core.pipeline.middleware import QusaiMiddleware
+from loadtest import FakeInferenceHandler
+from http.server import ThreadingHTTPServer
+import threading
+
+class RecordingHandler(FakeInferenceHandler):
+    config = {**FakeInferenceHandler.config, "latency": 0.0, "token_rate": 0, "max_tokens": 12}
+    requests = []
+
+    def do_POST(self):
+        self.requests.append(self.path)
+        super().do_POST()
+
+def _serve():
+    RecordingHandler.requests = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), RecordingHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+def test_endpoint_url_replaces_the_hub_model():
+    server, url = _serve()
+    try:
+        model = HFInferenceModel("Qwen/not-contacted", api_token=None, endpoint_url=url)
+        model.load()
+        usage = {}
+        text = model.generate("Salam", max_new_tokens=8, usage=usage)
+        assert text and not text.startswith("Error:")
+        assert usage["completion_tokens"] == 8 and usage["finish_reason"] == "length"
+        # Streaming (custom stopping criterion) goes to the same endpoint
+        assert not model.generate("Salam", max_new_tokens=8, stopping_criteria=lambda t: False).startswith("Error:")
+        assert len(RecordingHandler.requests) == 2
+    finally:
+        server.shutdown()
+
+def test_middleware_passes_endpoint_url_to_the_backend():
+    server, url = _serve()
+    try:
+        middleware = QusaiMiddleware(repo_id="Qwen/not-contacted", api_token="t", lazy_load=True,
+                                     shared_ontology=False, model_kwargs={"endpoint_url": url})
+        middleware.model.load()
+        assert middleware.model.endpoint_url == url
+        assert not middleware.model.generate("Salam", max_new_tokens=4).startswith("Error:")
+        # The server enforces TGI's stop-sequence limit; the fullest request still passes
+        params = middleware.generation_params({"max_new_tokens": 4, "stop": ["a", "b", "c", "d"]})
+        assert not middleware.model.generate("Salam", **params).startswith("Error:")
+        assert len(RecordingHandler.requests) == 2
+    finally:
+        server.shutdown()
+
+if __name__ == "__main__":
+    test_endpoint_url_replaces_the_hub_model()
+    test_middleware_passes_endpoint_url_to_the_backend()
+    print("✅ endpoint_url routes generation to the configured server")
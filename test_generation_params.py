@@ -0,0 +1,80 @@
+from qusai_core.pipeline.middleware import QusaiMiddleware, MAX_STOP_LENGTH, MAX_STOP_SEQUENCES, MAX_TEMPERATURE
+from qusai_core.llm.loader import HFInferenceModel, DEFAULT_STOP_SEQUENCES, DEFAULT_TEMPERATURE, DEFAULT_TOP_P
+from types import SimpleNamespace
+
+class FakeClient:
+    """Stands in for huggingface_hub.InferenceClient; replays canned output."""
+
+    def __init__(self, text, finish_reason="length"):
+        self.text, self.finish_reason, self.calls = text, finish_reason, []
+
+    def text_generation(self, prompt, stream=False, **kwargs):
+        self.calls.append(kwargs)
+        details = SimpleNamespace(generated_tokens=len(self.text.split()), finish_reason=self.finish_reason)
+        if not stream:
+            return SimpleNamespace(generated_text=self.text, details=details)
+        words = self.text.split(" ")
+        return (SimpleNamespace(token=SimpleNamespace(text=(" " if i else "") + word, special=False),
+                                details=details if i == len(words) - 1 else None)
+                for i, word in enumerate(words))
+
+def _model(client) -> HFInferenceModel:
+    model = HFInferenceModel("test/model", api_token=None)
+    model.client, model.is_ready = client, True
+    return model
+
+def test_generation_params_are_clamped():
+    middleware = QusaiMiddleware(lazy_load=True, backend="hf_api", shared_ontology=False, max_new_tokens=256)
+    defaults = middleware.generation_params()
+    assert defaults == {"max_new_tokens": 256, "temperature": DEFAULT_TEMPERATURE, "top_p": DEFAULT_TOP_P,
+                        "stop": list(DEFAULT_STOP_SEQUENCES)}
+
+    params = middleware.generation_params({"max_new_tokens": 10_000, "temperature": 9, "top_p": 0,
+                                           "stop": ["x" * 100] + ["END", "", 7] + [f"s{i}" for i in range(10)]})
+    assert params["max_new_tokens"] == 256
+    assert params["temperature"] == MAX_TEMPERATURE and params["top_p"] == 0.01
+    extra = params["stop"][len(DEFAULT_STOP_SEQUENCES):]
+    assert len(extra) == MAX_STOP_SEQUENCES and extra[:2] == ["x" * MAX_STOP_LENGTH, "END"]
+
+    low = middleware.generation_params({"max_new_tokens": -5, "temperature": -1, "top_p": 3})
+    assert low["max_new_tokens"] == 1 and low["temperature"] == 0.0 and low["top_p"] == 1.0
+
+def test_client_side_stop_reports_stop():
+    client = FakeClient("The jinn are hidden.<|im_end|>\nuser: more", finish_reason="length")
+    model = _model(client)
+    usage = {}
+    text = model.generate("prompt", max_new_tokens=16, stop=["<|im_end|>"], usage=usage)
+    assert text == "The jinn are hidden." and usage["finish_reason"] == "stop"
+    assert client.calls[0]["stop"] == ["<|im_end|>"]
+
+    # Streaming path (custom stopping criterion) truncates the same way
+    usage = {}
+    text = model.generate("prompt", stop=["<|im_end|>"], stopping_criteria=lambda t: False, usage=usage)
+    assert text == "The jinn are hidden." and usage["finish_reason"] == "stop"
+
+def test_server_gets_at_most_four_stop_sequences():
+    client = FakeClient("The jinn are hidden. END more text", finish_reason="length")
+    model = _model(client)
+    stop = list(DEFAULT_STOP_SEQUENCES) + ["a1", "a2", "a3", "END"]
+    usage = {}
+    assert model.generate("prompt", stop=stop, usage=usage) == "The jinn are hidden."
+    assert client.calls[0]["stop"] == stop[:4] and usage["finish_reason"] == "stop"
+
+    # The middleware's worst case (defaults plus MAX_STOP_SEQUENCES from the client) stays within the limit
+    middleware = QusaiMiddleware(lazy_load=True, backend="hf_api", shared_ontology=False)
+    params = middleware.generation_params({"stop": [f"s{i}" for i in range(MAX_STOP_SEQUENCES)]})
+    model.generate("prompt", stop=params["stop"])
+    assert len(client.calls[-1]["stop"]) <= 4
+
+def test_server_finish_reason_kept_without_stop():
+    model = _model(FakeClient("The jinn are hidden", finish_reason="length"))
+    usage = {}
+    assert model.generate("prompt", stop=["<|im_end|>"], usage=usage) == "The jinn are hidden"
+    assert usage["finish_reason"] == "length"
+
+if __name__ == "__main__":
+    test_generation_params_are_clamped()
+    test_client_side_stop_reports_stop()
+    test_server_gets_at_most_four_stop_sequences()
+    test_server_finish_reason_kept_without_stop()
+    print("✅ Generation parameters are clamped and stop sequences report 'stop'")
@@ -0,0 +1,41 @@
+from qusai_core.llm.loader import TransformersCPUModel
+import threading
+
+ROUNDS = 100
+
+def test_concurrent_calls_count_their_own_forward_passes():
+    model = TransformersCPUModel("unused")
+    barrier = threading.Barrier(2, timeout=5)
+    seen = {}
+
+    def call(name, target_passes, draft_passes):
+        with model._count_forwards() as forwards:
+            # Interleave with the other call's forward passes, as concurrent generate() calls would
+            for i in range(ROUNDS):
+                if i % 10 == 0:
+                    barrier.wait()
+                if i < target_passes:
+                    model._count_forward("target")
+                if i < draft_passes:
+                    model._count_forward("draft")
+        seen[name] = dict(forwards)
+        model._record(target_passes * 2, 0.5, 10, assisted=True, forwards=forwards)
+
+    threads = [threading.Thread(target=call, args=("a", 30, 90), daemon=True),
+               threading.Thread(target=call, args=("b", 30, 40), daemon=True)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+
+    assert seen == {"a": {"target": 30, "draft": 90}, "b": {"target": 30, "draft": 40}}
+    stats = model.get_stats()
+    assert stats["tokens_generated"] == 120 and stats["generation_seconds"] == 1.0
+    assert model.speculative["target_forwards"] == 60 and model.speculative["draft_forwards"] == 130
+    # Forward passes outside a generate() call are not counted
+    model._count_forward("target")
+    assert model.speculative["target_forwards"] == 60
+
+if __name__ == "__main__":
+    test_concurrent_calls_count_their_own_forward_passes()
+    print("✅ Generation stats are per call and thread-safe")
@@ -0,0 +1,106 @@
+from qusai_core.ontology.engine import OntologyEngine
+from qusai_core.pipeline.middleware import QusaiMiddleware
+from qusai_core.llm.loader import ModelInterface
+from pathlib import Path
+import tempfile
+
+SAMPLE_TTL = """
+@prefix quran: <http://ontology.quran/> .
+@prefix root: <http://ontology.quran/root/> .
+quran:1_1_1 quran:hasRoot root:jnn .
+quran:2_2_1 quran:hasRoot root:rHm .
+quran:3_3_1 quran:hasRoot root:rb .
+"""
+
+QUERIES = ["Tell me about jinn", "What is mercy", "Who is the lord", "jinn and mercy", "the lord of mercy"]
+
+class EchoModel(ModelInterface):
+    def load(self):
+        pass
+
+    def generate(self, prompt, max_new_tokens=100, **params):
+        return "The jinn are created beings."
+
+def _engine(tmp, **kwargs) -> OntologyEngine:
+    ttl = Path(tmp) / "ontology.ttl"
+    ttl.write_text(SAMPLE_TTL, encoding="utf-8")
+    engine = OntologyEngine(ttl, **kwargs)
+    engine.load()
+    return engine
+
+def test_context_cache_is_lru_bounded():
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = _engine(tmp, max_context_cache=2)
+        for query in QUERIES[:3]:
+            engine.get_context(query)
+        assert len(engine._context_cache) == 2 and engine._cache_counters["evictions"] == 1
+        # The oldest entry went; the newest two are still hits
+        engine.get_context(QUERIES[2])
+        engine.get_context(QUERIES[1])
+        assert engine._cache_counters["hits"] == 2
+        engine.get_context(QUERIES[0])
+        assert engine._cache_counters["misses"] == 4
+
+def test_cache_budget_trims_caches():
+    with tempfile.TemporaryDirectory() as tmp:
+        unbounded = _engine(tmp)
+        for query in QUERIES:
+            unbounded.get_context(query)
+        full = unbounded._context_cache_bytes
+        assert unbounded.query("root_segments", bindings={"root": "jnn"})
+        assert unbounded.queries.result_bytes > 0
+
+        budget = full // 2
+        engine = _engine(tmp, cache_budget_bytes=budget)
+        for query in QUERIES:
+            engine.get_context(query)
+            assert engine._context_cache_bytes + engine.queries.result_bytes <= budget
+        assert engine._cache_counters["budget_evictions"] > 0
+
+        freed = unbounded.trim_caches(0)
+        assert freed > 0 and unbounded._context_cache_bytes == 0 and unbounded.queries.result_bytes == 0
+        assert not unbounded._context_cache
+
+def test_stats_stay_cheap_and_memory_usage_is_cached_per_version():
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = _engine(tmp)
+        engine.get_context(QUERIES[0])
+        stats = engine.get_stats()
+        assert "memory" not in stats and stats["context_cache"]["bytes"] == engine._context_cache_bytes
+        assert engine._memory_snapshot is None
+
+        usage = engine.memory_usage()
+        assert usage["graph"] > 0 and usage["caches"]["context"] == engine._context_cache_bytes
+        snapshot = engine._memory_snapshot
+        engine.memory_usage()
+        assert engine._memory_snapshot is snapshot
+        engine.reload(background=False)
+        engine.memory_usage()
+        assert engine._memory_snapshot[0] == engine.version != snapshot[0]
+
+def test_rss_over_budget_trims_caches_and_model_states():
+    with tempfile.TemporaryDirectory() as tmp:
+        ttl = Path(tmp) / "ontology.ttl"
+        ttl.write_text(SAMPLE_TTL, encoding="utf-8")
+        # Any real process is over a one-byte budget
+        middleware = QusaiMiddleware(lazy_load=True, backend="hf_api", shared_ontology=False,
+                                     ontology_kwargs={"ontology_path": ttl}, memory_budget_bytes=1)
+        middleware.model = EchoModel()
+        middleware.ontology.load()
+        session, _ = middleware.sessions.get_or_create("s")
+        session.model_state = {"kv": b"x" * 1024}
+
+        middleware.process_query("Tell me about jinn", session_id="t")
+        assert middleware.memory_trims == 1
+        assert not middleware.ontology._context_cache and session.model_state == {}
+
+        # Cooldown: the next request does not trim again
+        middleware.process_query("What is mercy", session_id="t")
+        assert middleware.memory_trims == 1 and middleware.ontology._context_cache
+
+if __name__ == "__main__":
+    test_context_cache_is_lru_bounded()
+    test_cache_budget_trims_caches()
+    test_stats_stay_cheap_and_memory_usage_is_cached_per_version()
+    test_rss_over_budget_trims_caches_and_model_states()
+    print("✅ Cache budgets and memory trimming behave")
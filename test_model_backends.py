@@ -0,0 +1,52 @@
+from qusai_core.llm.loader import (BACKENDS, HFInferenceModel, ModelInterface, TransformersCPUModel,
+                                   TransformersModel, create_model, register_backend)
+from qusai_core.pipeline.middleware import QusaiMiddleware
+import subprocess
+import sys
+
+def test_importing_the_loader_imports_no_backend_library():
+    code = ("import sys; import qusai_core.llm.loader, qusai_core.pipeline.middleware; "
+            "print([m for m in ('torch', 'transformers', 'huggingface_hub') if m in sys.modules])")
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == "[]"
+
+def test_create_model_resolves_registered_backends():
+    assert {"transformers", "transformers_cpu", "hf_api"} <= set(BACKENDS)
+    assert isinstance(create_model("hf_api", "test/model", api_token=None), HFInferenceModel)
+    cpu = create_model("transformers_cpu", "test/model")
+    assert isinstance(cpu, TransformersCPUModel) and cpu.device == "cpu" and cpu.dtype == "float32"
+    gpu = create_model("transformers", "test/model")
+    assert type(gpu) is TransformersModel and gpu.model is None  # nothing loaded until load()
+    try:
+        create_model("gguf", "test/model")
+        raise AssertionError("unknown backend accepted")
+    except ValueError as e:
+        assert "hf_api" in str(e)
+
+def test_registered_backend_is_selectable_by_name():
+    @register_backend("echo_test")
+    class EchoModel(ModelInterface):
+        def __init__(self, repo_id, **kwargs):
+            self.repo_id, self.kwargs = repo_id, kwargs
+
+        def load(self):
+            pass
+
+        def generate(self, prompt, max_new_tokens=100, **params):
+            return prompt
+
+    try:
+        middleware = QusaiMiddleware(repo_id="r", lazy_load=True, backend="echo_test", shared_ontology=False,
+                                     model_kwargs={"flag": 1})
+        assert isinstance(middleware.model, EchoModel) and middleware.model.kwargs == {"flag": 1}
+        # Without an explicit backend, an API token selects the hosted API
+        assert isinstance(QusaiMiddleware(lazy_load=True, api_token="t", shared_ontology=False).model,
+                          HFInferenceModel)
+    finally:
+        BACKENDS.pop("echo_test", None)
+
+if __name__ == "__main__":
+    test_importing_the_loader_imports_no_backend_library()
+    test_create_model_resolves_registered_backends()
+    test_registered_backend_is_selectable_by_name()
+    print("✅ Model backends resolve lazily by name")
@@ -0,0 +1,75 @@
+from qusai_core.pipeline.router import ModelRouter, Route
+from qusai_core.pipeline.middleware import QusaiMiddleware
+from qusai_core.llm.loader import ModelInterface
+from pathlib import Path
+import tempfile
+
+SAMPLE_TTL = """
+@prefix quran: <http://ontology.quran/> .
+@prefix root: <http://ontology.quran/root/> .
+quran:1_1_1 quran:hasRoot root:jnn .
+"""
+
+class FixedModel(ModelInterface):
+    def __init__(self, reply):
+        self.reply, self.calls = reply, 0
+
+    def load(self):
+        pass
+
+    def generate(self, prompt, max_new_tokens=100, **params):
+        self.calls += 1
+        return self.reply
+
+SIMPLE = {"words": 3, "mapped_roots": 0, "context_lines": 0, "arabic": False}
+COMPLEX = {"words": 80, "mapped_roots": 4, "context_lines": 20, "arabic": True}
+
+def _router(small_reply, large_reply, **kwargs):
+    small, large = FixedModel(small_reply), FixedModel(large_reply)
+    return ModelRouter([Route("large", large, min_score=2), Route("small", small)], **kwargs), small, large
+
+def test_routes_by_score():
+    router, small, large = _router("small answer", "large answer")
+    call = lambda route: route.model.generate("p")
+    assert router.run(SIMPLE, call) == ("small answer", "small")
+    assert router.run(COMPLEX, call) == ("large answer", "large")
+    assert router.largest is large
+
+def test_failures_and_rejections_escalate():
+    router, small, large = _router("Error: backend unavailable", "large answer")
+    call = lambda route: route.model.generate("p")
+    assert router.run(SIMPLE, call) == ("large answer", "large")
+
+    router, small, large = _router("[Model Not Loaded]", "large answer")
+    assert router.run(SIMPLE, call) == ("large answer", "large")
+
+    router, small, large = _router("bad answer", "good answer")
+    assert router.run(SIMPLE, call, accept=lambda text: text.startswith("good")) == ("good answer", "large")
+    stats = router.get_stats()
+    assert stats["escalations"] == 1 and stats["routes"]["small"]["failures"] == 1
+
+def test_largest_failure_is_returned_and_fallback_can_be_disabled():
+    router, small, large = _router("Error: small down", "Error: large down")
+    assert router.run(SIMPLE, lambda route: route.model.generate("p")) == ("Error: large down", "large")
+
+    router, small, large = _router("Error: small down", "large answer", fallback=False)
+    assert router.run(SIMPLE, lambda route: route.model.generate("p")) == ("Error: small down", "small")
+    assert large.calls == 0
+
+def test_middleware_fails_over_to_the_larger_backend():
+    with tempfile.TemporaryDirectory() as tmp:
+        ttl = Path(tmp) / "ontology.ttl"
+        ttl.write_text(SAMPLE_TTL, encoding="utf-8")
+        router, small, large = _router("Error: backend unavailable", "The jinn are created beings.")
+        middleware = QusaiMiddleware(lazy_load=True, router=router, shared_ontology=False, coalesce=False,
+                                     ontology_kwargs={"ontology_path": ttl})
+        middleware.initialize()
+        response = middleware.process_query("Tell me about the jinn")
+        assert "created beings" in response and small.calls == 1 and large.calls == 1
+
+if __name__ == "__main__":
+    test_routes_by_score()
+    test_failures_and_rejections_escalate()
+    test_largest_failure_is_returned_and_fallback_can_be_disabled()
+    test_middleware_fails_over_to_the_larger_backend()
+    print("✅ Router picks routes by score and fails over")
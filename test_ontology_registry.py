@@ -0,0 +1,39 @@
+from qusai_core.ontology.registry import OntologyRegistry
+from pathlib import Path
+import os
+import tempfile
+
+SAMPLE_TTL = """
+@prefix quran: <http://ontology.quran/> .
+@prefix root: <http://ontology.quran/root/> .
+quran:1_1_1 quran:hasRoot root:jnn .
+quran:2_4_1 quran:hasRoot root:rb .
+"""
+
+def test_registry_shares_engines_and_releases_them():
+    with tempfile.TemporaryDirectory() as tmp:
+        ttl = Path(tmp) / "ontology.ttl"
+        ttl.write_text(SAMPLE_TTL, encoding="utf-8")
+        registry = OntologyRegistry()
+
+        first = registry.acquire(ontology_path=ttl)
+        first.load()
+        second = registry.acquire(ontology_path=ttl)
+        assert second is first and second.is_ready()
+        assert registry.acquire(ontology_path=ttl, storage="sqlite") is not first
+
+        # Source changed on disk and not reloaded: new holders get a fresh engine
+        st = os.stat(ttl)
+        os.utime(ttl, (st.st_atime, st.st_mtime + 10))
+        fresh = registry.acquire(ontology_path=ttl)
+        assert fresh is not first
+
+        registry.release(first)
+        assert first.is_ready()
+        registry.release(second)
+        assert not first.is_ready()
+        print(registry.get_stats())
+        assert [e["references"] for e in registry.get_stats()["engines"]] == [1, 1]
+
+if __name__ == "__main__":
+    test_registry_shares_engines_and_releases_them()
@@ -0,0 +1,104 @@
+from qusai_core.ontology.engine import OntologyEngine
+from pathlib import Path
+import os
+import tempfile
+
+SAMPLE_TTL = """
+@prefix quran: <http://ontology.quran/> .
+@prefix root: <http://ontology.quran/root/> .
+quran:1_1_1 quran:hasRoot root:jnn .
+quran:2_4_1 quran:hasRoot root:jnn .
+quran:2_4_2 quran:hasRoot root:rb .
+root:jnn quran:label "jnn" .
+"""
+
+ADDITIONS = "<http://ontology.quran/3_9_1> <http://ontology.quran/hasRoot> <http://ontology.quran/root/jnn> .\n"
+DELETIONS = "<http://ontology.quran/root/jnn> <http://ontology.quran/label> \"jnn\" .\n"
+
+def _write_ontology(tmp: str) -> Path:
+    ttl = Path(tmp) / "ontology.ttl"
+    ttl.write_text(SAMPLE_TTL, encoding="utf-8")
+    return ttl
+
+def test_reload_swaps_graph_and_invalidates_context_cache():
+    with tempfile.TemporaryDirectory() as tmp:
+        ttl = _write_ontology(tmp)
+        engine = OntologyEngine(ttl)
+        engine.load()
+        before = engine.get_context("Tell me about jinn")
+        assert engine.get_context("Tell me about jinn") == before
+        assert engine._cache_counters["hits"] == 1
+        version = engine.version
+
+        ttl.write_text(SAMPLE_TTL + "quran:4_1_1 quran:hasRoot root:jnn .\n", encoding="utf-8")
+        st = os.stat(ttl)
+        os.utime(ttl, (st.st_atime, st.st_mtime + 10))
+        assert not engine.is_current()
+        engine.reload(background=False)
+
+        assert engine.version > version and engine.is_current()
+        after = engine.get_context("Tell me about jinn")
+        assert after != before and "4_1_1" in after
+
+def test_apply_delta_updates_graph_and_bumps_version():
+    with tempfile.TemporaryDirectory() as tmp:
+        ttl = _write_ontology(tmp)
+        additions, deletions = Path(tmp) / "add.nt", Path(tmp) / "del.nt"
+        additions.write_text(ADDITIONS, encoding="utf-8")
+        deletions.write_text(DELETIONS, encoding="utf-8")
+        engine = OntologyEngine(ttl)
+        engine.load()
+        engine.get_context("Tell me about jinn")
+        version = engine.version
+
+        result = engine.apply_delta(additions, deletions)
+        assert result["added"] == 1 and result["removed"] == 1
+        assert engine.version > version
+        info = engine.get_root_info("jnn")
+        assert any("3_9_1" in line for line in info)
+        assert not any("label" in line for line in info)
+        assert engine.get_root_summary("jnn")["occurrences"] == 3
+        assert "3_9_1" in engine.get_context("Tell me about jinn")
+
+def test_sqlite_reload_closes_replaced_store():
+    with tempfile.TemporaryDirectory() as tmp:
+        ttl = _write_ontology(tmp)
+        engine = OntologyEngine(ttl, storage="sqlite")
+        engine.load()
+        old_store = engine.graph.store
+        engine.get_root_info("jnn")
+        assert old_store._connections
+
+        engine.reload(background=False)
+        assert engine.graph.store is not old_store
+        assert not old_store._connections
+        assert engine.get_root_info("jnn")
+        engine.close()
+
+def test_sqlite_delta_reaches_other_workers():
+    with tempfile.TemporaryDirectory() as tmp:
+        ttl = _write_ontology(tmp)
+        additions = Path(tmp) / "add.nt"
+        additions.write_text(ADDITIONS, encoding="utf-8")
+        writer = OntologyEngine(ttl, storage="sqlite")
+        writer.load()
+        reader = OntologyEngine(ttl, storage="sqlite")
+        reader.load()
+        before = reader.get_context("Tell me about jinn")
+        version = reader.version
+
+        writer.apply_delta(additions_path=additions)
+        reader._delta_checked = 0.0  # skip the once-per-second rate limit
+        after = reader.get_context("Tell me about jinn")
+        assert reader.version > version
+        assert after != before and "3_9_1" in after
+        assert reader.get_root_summary("jnn")["occurrences"] == 3
+        writer.close()
+        reader.close()
+
+if __name__ == "__main__":
+    test_reload_swaps_graph_and_invalidates_context_cache()
+    test_apply_delta_updates_graph_and_bumps_version()
+    test_sqlite_reload_closes_replaced_store()
+    test_sqlite_delta_reaches_other_workers()
+    print("✅ Reload, deltas and cache invalidation behave")
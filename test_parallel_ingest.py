@@ -0,0 +1,48 @@
+from qusai_core.ontology.engine import OntologyEngine
+from qusai_core.ontology.ingest import parallel_parse, ntriples_path
+from rdflib.compare import isomorphic
+from pathlib import Path
+import rdflib
+import tempfile
+
+SAMPLE_TTL = """
+@prefix quran: <http://ontology.quran/> .
+@prefix root: <http://ontology.quran/root/> .
+@prefix lemma: <http://ontology.quran/lemma/> .
+root:jnn quran:label "jnn" ; quran:gloss "hidden"@en , "مستور"@ar .
+quran:source quran:note [ quran:label "blank node spanning lines" ; quran:weight 3 ] .
+"""
+
+def _write_ontology(tmp: str) -> Path:
+    lines = [SAMPLE_TTL]
+    roots = ["jnn", "rHm", "Elm", "ktb", "qwl"]
+    for i in range(400):
+        root = roots[i % len(roots)]
+        lines.append(f"quran:{i // 20 + 1}_{i % 20 + 1}_1 quran:hasRoot root:{root} ; quran:hasLemma lemma:{root}{i % 3} .")
+    ttl = Path(tmp) / "ontology.ttl"
+    ttl.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return ttl
+
+def test_parallel_parse_matches_serial_parse():
+    with tempfile.TemporaryDirectory() as tmp:
+        ttl = _write_ontology(tmp)
+        serial = rdflib.Graph()
+        serial.parse(str(ttl), format="turtle")
+        parallel = parallel_parse(ttl, rdflib.Graph(), workers=2)
+        assert len(parallel) == len(serial) and isomorphic(parallel, serial)
+        assert dict(parallel.namespaces())["root"] == rdflib.URIRef("http://ontology.quran/root/")
+        assert ntriples_path(ttl).exists() and not list(Path(tmp).glob("*.tmp"))
+
+        # Engines built either way answer identically (same insertion order, same contexts)
+        one = OntologyEngine(ttl, ingest_workers=1)
+        one.load()
+        two = OntologyEngine(ttl, ingest_workers=2)
+        two.load()
+        for root in ["jnn", "rHm", "missing"]:
+            assert one.get_root_info(root) == two.get_root_info(root)
+        for query in ["Tell me about jinn", "mercy and knowledge"]:
+            assert one.get_context(query) == two.get_context(query)
+
+if __name__ == "__main__":
+    test_parallel_parse_matches_serial_parse()
+    print("✅ Parallel ingestion matches the serial parse")
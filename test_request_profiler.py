@@ -0,0 +1,25 @@
+from qusai_core.pipeline.profiling import RequestProfiler
+import tempfile
+import time
+
+def test_profiler_writes_folded_stacks_within_budget():
+    with tempfile.TemporaryDirectory() as tmp:
+        profiler = RequestProfiler(tmp, max_fraction=0.1, interval=0.001)
+        paths = []
+        for _ in range(20):
+            with profiler.profile("test", force=True) as path:
+                time.sleep(0.02)
+            if path is not None:
+                paths.append(path)
+
+        stats = profiler.get_stats()
+        print(paths, stats)
+        # One up front, then no more than 10% of traffic
+        assert stats["profiled"] == len(paths) == 3
+        assert stats["refused_budget"] == 17
+        lines = paths[0].read_text().splitlines()
+        assert lines and all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+        assert any("test_profiler_writes_folded_stacks_within_budget" in line for line in lines)
+
+if __name__ == "__main__":
+    test_profiler_writes_folded_stacks_within_budget()
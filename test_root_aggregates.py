@@ -0,0 +1,81 @@
+from qusai_core.ontology.aggregates import RootAggregates, LOCATION_PATTERN
+from qusai_core.utils.constants import QURAN, ROOT, LEMMA
+from collections import Counter
+from pathlib import Path
+import rdflib
+import tempfile
+
+# 2_4_1 carries two roots; jnn/rb/Allh tie in several co-occurrence and surah counts
+SAMPLE_TTL = """
+@prefix quran: <http://ontology.quran/> .
+@prefix root: <http://ontology.quran/root/> .
+@prefix lemma: <http://ontology.quran/lemma/> .
+quran:1_1_1 quran:hasRoot root:jnn ; quran:hasLemma lemma:jinap .
+quran:1_1_2 quran:hasRoot root:Allh ; quran:hasLemma lemma:Allah .
+quran:1_1_3 quran:hasRoot root:rb .
+quran:2_4_1 quran:hasRoot root:jnn , root:rb ; quran:hasLemma lemma:janap .
+quran:2_4_2 quran:hasRoot root:Allh .
+quran:3_9_1 quran:hasRoot root:jnn ; quran:hasLemma lemma:majonuwn .
+quran:3_9_2 quran:hasRoot root:Elm .
+quran:4_2_1 quran:hasRoot root:Elm , root:Allh .
+"""
+
+def _ranked(counts):
+    return sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+
+def _baseline(graph: rdflib.Graph, root: str) -> dict:
+    """The summary computed per query straight from the graph, as before the aggregate tables."""
+    segments = [s for s, _, _ in graph.triples((None, QURAN.hasRoot, ROOT[root]))]
+    lemmas, ayahs, cooc = Counter(), Counter(), Counter()
+    for segment in segments:
+        for _, _, lemma in graph.triples((segment, QURAN.hasLemma, None)):
+            lemmas[str(lemma)[len(str(LEMMA)):]] += 1
+        match = LOCATION_PATTERN.search(str(segment).rsplit("/", 1)[-1])
+        ayahs[(int(match.group(1)), int(match.group(2)))] += 1
+    for surah, ayah in ayahs:
+        others = set()
+        for s, _, o in graph.triples((None, QURAN.hasRoot, None)):
+            match = LOCATION_PATTERN.search(str(s).rsplit("/", 1)[-1])
+            if (int(match.group(1)), int(match.group(2))) == (surah, ayah):
+                others.add(str(o)[len(str(ROOT)):])
+        for other in others - {root}:
+            cooc[other] += 1
+    surahs = Counter()
+    for (surah, _), count in ayahs.items():
+        surahs[surah] += count
+    return {
+        "root": root,
+        "occurrences": len(segments),
+        "lemmas": _ranked(lemmas),
+        "ayahs": len(ayahs),
+        "top_surahs": _ranked(surahs),
+        "cooccurring_roots": _ranked(cooc),
+    }
+
+def _graph(tmp) -> tuple:
+    ttl = Path(tmp) / "ontology.ttl"
+    ttl.write_text(SAMPLE_TTL, encoding="utf-8")
+    graph = rdflib.Graph()
+    graph.parse(str(ttl), format="turtle")
+    return ttl, graph
+
+def test_aggregates_match_per_query_baseline():
+    with tempfile.TemporaryDirectory() as tmp:
+        ttl, graph = _graph(tmp)
+        agg = RootAggregates.build(lambda p: ((s, o) for s, _, o in graph.triples((None, p, None))))
+        assert agg.roots == ["Allh", "Elm", "jnn", "rb"]
+        for root in agg.roots:
+            assert agg.summary(root, top=100) == _baseline(graph, root), root
+        # Multi-root segment counted for both roots
+        assert agg.summary("rb")["occurrences"] == 2 and agg.summary("jnn")["occurrences"] == 3
+        # Ties ordered by root name
+        assert agg.summary("jnn")["cooccurring_roots"] == [("Allh", 2), ("rb", 2), ("Elm", 1)]
+
+        agg.save(ttl)
+        loaded = RootAggregates.load(ttl)
+        for root in agg.roots:
+            assert loaded.summary(root, top=100) == agg.summary(root, top=100)
+
+if __name__ == "__main__":
+    test_aggregates_match_per_query_baseline()
+    print("✅ Root aggregates match the per-query baseline")
@@ -0,0 +1,148 @@
+from qusai_core.pipeline.middleware import QusaiMiddleware
+from qusai_core.pipeline.sessions import Session, SessionStore
+from qusai_core.llm.loader import ModelInterface
+from pathlib import Path
+import tempfile
+
+SAMPLE_TTL = """
+@prefix quran: <http://ontology.quran/> .
+@prefix root: <http://ontology.quran/root/> .
+quran:1_1_1 quran:hasRoot root:jnn .
+quran:2_2_1 quran:hasRoot root:rHm .
+"""
+
+class ScriptedModel(ModelInterface):
+    """Returns queued replies and records the prompts it was given."""
+
+    def __init__(self):
+        self.replies, self.prompts = [], []
+
+    def load(self):
+        pass
+
+    def generate(self, prompt, max_new_tokens=100, **params):
+        self.prompts.append(prompt)
+        return self.replies.pop(0) if self.replies else "The jinn are created beings."
+
+def _middleware(tmp, **kwargs):
+    ttl = Path(tmp) / "ontology.ttl"
+    ttl.write_text(SAMPLE_TTL, encoding="utf-8")
+    middleware = QusaiMiddleware(lazy_load=True, backend="hf_api", shared_ontology=False,
+                                 ontology_kwargs={"ontology_path": ttl}, **kwargs)
+    middleware.model = ScriptedModel()
+    middleware.ontology.load()
+    return middleware
+
+def test_window_keeps_latest_whole_turns():
+    session = Session("s")
+    for i, tokens in enumerate([50, 40, 30, 200]):
+        session.add_turn("user", f"t{i}", tokens)
+    assert [t["content"] for t in session.window(100)] == ["t3"]
+    session.add_turn("assistant", "t4", 10)
+    assert [t["content"] for t in session.window(240)] == ["t2", "t3", "t4"]
+
+def test_seeding_and_rewound_history():
+    with tempfile.TemporaryDirectory() as tmp:
+        middleware = _middleware(tmp)
+        history = [{"role": "user", "content": "hello"}, {"role": "assistant", "content": "peace"}]
+        middleware.process_query("what of the jinn", session_id="g", history=history)
+        session, _ = middleware.sessions.get_or_create("g")
+        assert [t["role"] for t in session.turns] == ["user", "assistant", "user", "assistant"]
+
+        # Client cleared its chat: the server forgets the stale turns
+        middleware.process_query("what of the jinn", session_id="g", history=[])
+        assert len(session.turns) == 2 and "hello" not in middleware.model.prompts[-1]
+
+def test_asr_rollback_and_failures_resend_context():
+    with tempfile.TemporaryDirectory() as tmp:
+        middleware = _middleware(tmp)
+        middleware.process_query("hello", session_id="s")
+        session, _ = middleware.sessions.get_or_create("s")
+
+        middleware.model.replies = ["I am God and independent of any creator."]
+        assert "HAJJ RETURN" in middleware.process_query("what of the jinn", session_id="s")
+        assert len(session.turns) == 2
+
+        middleware.model.replies = ["Error: backend unavailable"]
+        middleware.process_query("what of the jinn", session_id="s")
+        assert len(session.turns) == 2 and not any("Error" in t["content"] for t in session.turns)
+
+        # The rolled-back turns never reached the model's history: the context is sent again
+        middleware.process_query("what of the jinn", session_id="s")
+        assert "root:jnn" in session.turns[-2]["content"] and session.turns[-2]["context"]
+
+def test_context_is_resent_after_sliding_out_of_window():
+    with tempfile.TemporaryDirectory() as tmp:
+        middleware = _middleware(tmp, history_token_budget=60)
+        middleware.process_query("hello", session_id="w")
+        middleware.process_query("what of the jinn", session_id="w")
+        middleware.model.replies = ["x " * 200]
+        middleware.process_query("tell me more", session_id="w")
+        middleware.process_query("and the jinn again", session_id="w")
+        assert "root:jnn" in middleware.model.prompts[-1].split("<|im_start|>user")[-1]
+
+def test_persistence_and_model_state_cap():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SessionStore(persist_dir=tmp, max_model_states=2)
+        for session_id in ("a.b", "ab"):
+            session, created = store.get_or_create(session_id)
+            session.add_turn("user", session_id, 1)
+            store.save(session)
+        reloaded = SessionStore(persist_dir=tmp)
+        assert [reloaded.get_or_create(sid)[0].turns[0]["content"] for sid in ("a.b", "ab")] == ["a.b", "ab"]
+
+        for session_id in ("x", "y", "z"):
+            session, _ = store.get_or_create(session_id)
+            session.model_state["kv"] = session_id
+        assert sum(1 for sid in ("x", "y", "z") if store.get_or_create(sid)[0].model_state) <= 2
+
+def test_restore_from_another_process():
+    with tempfile.TemporaryDirectory() as tmp:
+        # The worker's store starts from the caller's state and hands its changes back
+        main, worker = _middleware(tmp), _middleware(tmp)
+        main_session, _ = main.sessions.get_or_create("r")
+        main_session.model_state["kv"] = "local"
+        worker.sessions.restore(main_session.to_dict())
+        worker.process_query("what of the jinn", session_id="r")
+
+        restored = main.sessions.restore(worker.sessions.get_or_create("r")[0].to_dict())
+        assert restored is main_session and [t["role"] for t in restored.turns] == ["user", "assistant"]
+        assert restored.model_state == {"kv": "local"}
+        main.process_query("tell me more", session_id="r")
+        assert "what of the jinn" in main.model.prompts[-1]
+
+class BrokenUsage(dict):
+    def update(self, *args, **kwargs):
+        raise RuntimeError("usage sink failed")
+
+def _raises(fn) -> bool:
+    try:
+        fn()
+    except RuntimeError:
+        return True
+    return False
+
+def test_errors_after_generation_release_the_session_lock():
+    with tempfile.TemporaryDirectory() as tmp:
+        middleware = _middleware(tmp)
+        middleware.process_query("hello", session_id="s")
+        session, _ = middleware.sessions.get_or_create("s")
+        assert _raises(lambda: middleware.process_query("what of the jinn", session_id="s", usage=BrokenUsage()))
+        assert session.lock.acquire(blocking=False)
+        session.lock.release()
+
+        def broken_save(session):
+            raise RuntimeError("disk full")
+        middleware.sessions.save = broken_save
+        assert _raises(lambda: middleware.process_query("and the angels", session_id="s"))
+        assert session.lock.acquire(blocking=False)
+        session.lock.release()
+
+if __name__ == "__main__":
+    test_window_keeps_latest_whole_turns()
+    test_seeding_and_rewound_history()
+    test_asr_rollback_and_failures_resend_context()
+    test_context_is_resent_after_sliding_out_of_window()
+    test_persistence_and_model_state_cap()
+    test_restore_from_another_process()
+    test_errors_after_generation_release_the_session_lock()
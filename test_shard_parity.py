@@ -0,0 +1,42 @@
+from qusai_core.ontology.engine import OntologyEngine
+from qusai_core.ontology.shards import build_shards
+from pathlib import Path
+import tempfile
+
+SAMPLE_TTL = """
+@prefix quran: <http://ontology.quran/> .
+@prefix root: <http://ontology.quran/root/> .
+@prefix lemma: <http://ontology.quran/lemma/> .
+quran:1_1_1 quran:hasRoot root:jnn ; quran:hasLemma lemma:jinap .
+quran:1_1_2 quran:hasRoot root:Allh ; quran:hasLemma lemma:llah .
+quran:2_4_1 quran:hasRoot root:jnn ; quran:hasLemma lemma:janap ; quran:mentions root:rb .
+quran:2_4_2 quran:hasRoot root:rb .
+quran:3_2_1 quran:hasRoot root:jnn , root:rHm ; quran:hasLemma lemma:raHiym .
+root:jnn quran:label "jnn" ; quran:gloss "hidden"@en ; quran:related root:rb .
+root:rb quran:label "rb" ; quran:related root:Allh .
+"""
+
+def test_shards_match_memory():
+    with tempfile.TemporaryDirectory() as tmp:
+        ttl = Path(tmp) / "ontology.ttl"
+        ttl.write_text(SAMPLE_TTL, encoding="utf-8")
+
+        memory = OntologyEngine(ttl)
+        memory.load()
+        for prefix_len in (0, 1):
+            sharded = OntologyEngine(ttl, storage="shards", shard_dir=Path(tmp) / f"shards{prefix_len}")
+            if prefix_len:
+                build_shards(ttl, sharded.shard_dir, prefix_len=prefix_len)
+            sharded.load()
+
+            for root in ("jnn", "Allh", "rb", "rHm"):
+                # Includes incoming root-to-root and segment-to-other-root links
+                assert sharded.get_root_info(root) == memory.get_root_info(root), root
+            for query in ("jinn", "god and lord", "worship", "mercy"):
+                assert sharded.get_context(query) == memory.get_context(query), query
+            # A segment with several roots keeps its lemma in every root's shard
+            assert "quran:3_2_1 --[hasRoot]--> quran:root/jnn (Lemma: quran:lemma/raHiym)" in sharded.get_context("jinn")
+        assert any("links to Root(rb)" in line for line in memory.get_root_info("rb"))
+
+if __name__ == "__main__":
+    test_shards_match_memory()
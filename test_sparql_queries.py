@@ -0,0 +1,77 @@
+from qusai_core.ontology.sparql import PreparedQueryRegistry, QueryTimeout
+from qusai_core.utils.constants import QURAN, ROOT, LEMMA
+import rdflib
+import threading
+import time
+
+def _graph(segments: int = 6) -> rdflib.Graph:
+    graph = rdflib.Graph()
+    for i in range(segments):
+        segment = QURAN[f"1_{i}_1"]
+        graph.add((segment, QURAN.hasRoot, ROOT["jnn"] if i % 2 else ROOT["rb"]))
+        graph.add((segment, QURAN.hasLemma, LEMMA[f"l{i % 3}"]))
+    return graph
+
+def _raises(exc_type, fn) -> bool:
+    try:
+        fn()
+    except exc_type:
+        return True
+    return False
+
+def test_templates_bind_and_cache():
+    registry = PreparedQueryRegistry()
+    graph = _graph()
+    rows = registry.run(graph, version=0, template="root_segments", bindings={"root": "jnn"})
+    assert len(rows) == 3 and all(row["segment"].startswith(str(QURAN)) for row in rows)
+    assert registry.run(graph, version=0, template="root_segments", bindings={"root": "jnn"}) is rows
+    assert registry.get_stats()["hits"] == 1
+    # A new ontology version never reuses old results
+    assert registry.run(graph, version=1, template="root_segments", bindings={"root": "jnn"}) is not rows
+
+    assert _raises(KeyError, lambda: registry.run(graph, 0, template="nope"))
+    assert _raises(ValueError, lambda: registry.run(graph, 0, template="root_segments", bindings={"x": "1"}))
+
+def test_rejects_updates_and_remote_access():
+    registry = PreparedQueryRegistry()
+    graph = _graph()
+    assert _raises(Exception, lambda: registry.run(graph, 0, sparql="INSERT DATA { <urn:a> <urn:b> <urn:c> }"))
+    assert _raises(ValueError, lambda: registry.run(
+        graph, 0, sparql="SELECT * WHERE { SERVICE <http://127.0.0.1:9/> { ?s ?p ?o } }"))
+    assert _raises(ValueError, lambda: registry.run(
+        graph, 0, sparql="SELECT * WHERE { OPTIONAL { SERVICE <http://127.0.0.1:9/> { ?s ?p ?o } } }"))
+    assert _raises(ValueError, lambda: registry.run(graph, 0, sparql="SELECT * FROM <http://127.0.0.1:9/> WHERE { ?s ?p ?o }"))
+    assert _raises(ValueError, lambda: registry.run(graph, 0, sparql="SELECT * FROM NAMED <http://127.0.0.1:9/> WHERE { ?s ?p ?o }"))
+    assert registry.run(graph, 0, sparql="ASK { ?s ?p ?o }") == [{"ask": True}]
+
+def test_timeout_interrupts_work_before_first_row():
+    registry = PreparedQueryRegistry()
+    graph = _graph(100)
+    start = time.perf_counter()
+    # Cross join + ORDER BY: all the work happens before the first row
+    assert _raises(QueryTimeout, lambda: registry.run(
+        graph, 0, sparql="SELECT * WHERE { ?a ?p ?b . ?c ?q ?d . ?e ?r ?f } ORDER BY ?f ?d", timeout=0.3))
+    assert time.perf_counter() - start < 3
+    assert registry.get_stats()["cached_results"] == 0
+    # The timed-out worker stopped itself and serves the next query
+    assert len(registry.run(graph, 0, template="root_segments", bindings={"root": "jnn"})) == 50
+
+def test_queries_reuse_worker_threads():
+    registry = PreparedQueryRegistry(max_workers=2)
+    graph = _graph()
+    threads = threading.active_count()
+    for i in range(50):
+        registry.run(graph, version=i, template="root_segments", bindings={"root": "jnn"})
+    assert threading.active_count() <= threads + 2
+
+def test_large_results_are_not_cached():
+    registry = PreparedQueryRegistry(max_result_bytes=100)
+    rows = registry.run(_graph(), 0, sparql="SELECT * WHERE { ?s ?p ?o }")
+    assert len(rows) == 12 and registry.get_stats()["cached_results"] == 0
+
+if __name__ == "__main__":
+    test_templates_bind_and_cache()
+    test_rejects_updates_and_remote_access()
+    test_timeout_interrupts_work_before_first_row()
+    test_queries_reuse_worker_threads()
+    test_large_results_are_not_cached()
@@ -0,0 +1,47 @@
+import pytest
+
+torch = pytest.importorskip("torch")
+transformers = pytest.importorskip("transformers")
+import tempfile
+
+from tokenizers import Tokenizer, models, pre_tokenizers
+from transformers import PreTrainedTokenizerFast, Qwen2Config, Qwen2ForCausalLM
+
+from qusai_core.llm.loader import TransformersCPUModel
+
+def _tiny_model(path, layers):
+    """Random-weight Qwen2 model + word-level tokenizer, small enough for CPU tests."""
+    words = ["[UNK]", "<|im_start|>", "<|im_end|>", "user", "assistant", "Salam", "jinn", "root", "hidden"]
+    words += [f"w{i}" for i in range(64 - len(words))]
+    tokenizer = Tokenizer(models.WordLevel({w: i for i, w in enumerate(words)}, unk_token="[UNK]"))
+    tokenizer.pre_tokenizer = pre_tokenizers.WhitespaceSplit()
+    PreTrainedTokenizerFast(tokenizer_object=tokenizer, unk_token="[UNK]", eos_token="<|im_end|>").save_pretrained(path)
+
+    config = Qwen2Config(vocab_size=64, hidden_size=32, intermediate_size=64, num_hidden_layers=layers,
+                         num_attention_heads=4, num_key_value_heads=2, max_position_embeddings=512,
+                         eos_token_id=2, bos_token_id=1)
+    torch.manual_seed(0)
+    Qwen2ForCausalLM(config).save_pretrained(path)
+
+def test_assisted_decoding_reports_acceptance_and_speedup():
+    with tempfile.TemporaryDirectory() as target, tempfile.TemporaryDirectory() as draft:
+        _tiny_model(target, layers=4)
+        _tiny_model(draft, layers=1)
+
+        model = TransformersCPUModel(target, draft_repo_id=draft, draft_tokens=4)
+        model.load()
+        assert model.is_ready and model.draft_model is not None
+
+        for _ in range(2):
+            text = model.generate("<|im_start|> user jinn root <|im_end|> <|im_start|> assistant", max_new_tokens=24)
+            assert not text.startswith("Error:")
+
+        spec = model.get_stats()["speculative"]
+        print(spec)
+        assert spec["tokens"] > 0 and spec["target_forwards"] > 0 and spec["draft_forwards"] > 0
+        assert 0.0 <= spec["acceptance_rate"] <= 1.0
+        assert spec["tokens_per_target_forward"] >= 1.0
+        assert spec["baseline_tokens_per_sec"] > 0 and spec["speedup"] is not None
+
+if __name__ == "__main__":
+    test_assisted_decoding_reports_acceptance_and_speedup()
@@ -0,0 +1,67 @@
+from qusai_core.ontology.engine import OntologyEngine
+from pathlib import Path
+import tempfile
+import threading
+
+SAMPLE_TTL = """
+@prefix quran: <http://ontology.quran/> .
+@prefix root: <http://ontology.quran/root/> .
+@prefix lemma: <http://ontology.quran/lemma/> .
+quran:1_1_1 quran:hasRoot root:jnn ; quran:hasLemma lemma:jin~ap .
+quran:1_1_2 quran:hasRoot root:Allh ; quran:hasLemma lemma:{ll~ah .
+quran:2_4_1 quran:hasRoot root:jnn ; quran:hasLemma lemma:jan~ap .
+quran:2_4_2 quran:hasRoot root:rb .
+quran:3_9_1 quran:hasRoot root:jnn ; quran:hasLemma lemma:majonuwn .
+root:jnn quran:label "jnn" ; quran:gloss "hidden"@en .
+"""
+
+def test_sqlite_store_matches_memory():
+    with tempfile.TemporaryDirectory() as tmp:
+        ttl = Path(tmp) / "ontology.ttl"
+        ttl.write_text(SAMPLE_TTL.replace("~", "").replace("{", ""), encoding="utf-8")
+
+        memory = OntologyEngine(ttl)
+        memory.load()
+        sqlite = OntologyEngine(ttl, storage="sqlite")
+        sqlite.load()
+
+        for query in ["Tell me about jinn", "Who is the lord allah", "nothing relevant here"]:
+            assert memory.get_context(query) == sqlite.get_context(query)
+        for root in ["jnn", "Allh", "rb", "missing"]:
+            assert memory.get_root_info(root) == sqlite.get_root_info(root)
+        assert len(memory.graph) == len(sqlite.graph)
+
+def test_connections_are_pooled_across_threads():
+    with tempfile.TemporaryDirectory() as tmp:
+        ttl = Path(tmp) / "ontology.ttl"
+        ttl.write_text(SAMPLE_TTL.replace("~", "").replace("{", ""), encoding="utf-8")
+        engine = OntologyEngine(ttl, storage="sqlite")
+        engine.load()
+        store = engine.graph.store
+        expected = engine.get_root_info("jnn")
+
+        results = []
+        def work():
+            for _ in range(5):
+                results.append(engine.get_root_info("jnn") == expected
+                               and len(list(store.triples((None, None, None)))) == len(engine.graph))
+        threads = [threading.Thread(target=work) for _ in range(20)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert len(results) == 100 and all(results)
+        for _ in range(50):
+            engine.query("root_segments", bindings={"root": "jnn"})
+        assert len(store._connections) <= store.max_connections
+
+        # A partly consumed iterator hands its connection back when closed
+        it = store.triples((None, None, None))
+        next(it)
+        it.close()
+        assert store._idle.qsize() == len(store._connections)
+
+if __name__ == "__main__":
+    test_sqlite_store_matches_memory()
+    test_connections_are_pooled_across_threads()
+    print("✅ SQLite store matches in-memory graph")